@@ -0,0 +1,212 @@
+"""Async views, served under ASGI
+
+DRF views are synchronous: under ASGI every request is handed to a worker
+thread. The most frequent reads are served here with the async ORM instead
+(see API_ASYNC_READS), producing the exact payloads of the viewsets. A
+handler returns None for anything it does not cover (browsable API, ?format=,
+pagination, 404s...) and the request then goes through the DRF viewset.
+
+The list event streams live here too, they hold their connection open.
+"""
+import asyncio
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, Max
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import NotAcceptable, ValidationError
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.request import Request
+from categories.models import Category
+from core.middleware import compress_content, select_encoding, set_content_encoding
+from categories.serializers import CategorySerializer
+from lists.models import List
+from lists.serializers import ListSerializer
+from tasks.serializers import TaskSerializer
+from .cache import list_cache
+from .conditional import make_validators, set_validators
+from .events import broker
+from .filters import TaskFilterBackend
+from .renderers import FastJSONRenderer, dump_json
+from .views import API_RENDERERS, ListViewSet, TaskViewSet
+
+renderer = FastJSONRenderer()
+negotiation = DefaultContentNegotiation()
+
+# milliseconds browsers wait before reconnecting a dropped event stream
+EVENTS_RETRY = 3000
+
+
+def async_read(handler, fallback):
+    """builds a view serving GET requests with an async handler
+
+    Args:
+        handler (coroutine function): async read path, returns None to decline a request
+        fallback (callable): the DRF view serving every other request
+
+    Returns:
+        coroutine function: the view
+    """
+    fallback = sync_to_async(fallback)
+
+    @csrf_exempt
+    async def view(request, *args, **kwargs):
+        if request.method == "GET":
+            response = await handler(request, *args, **kwargs)
+            if response is not None:
+                return response
+        return await fallback(request, *args, **kwargs)
+
+    return view
+
+
+def accepts(request, params=()):
+    """whether the async path can answer a request
+
+    Args:
+        request (HttpRequest): the request
+        params (iterable[str]): query parameters the handler understands
+
+    Returns:
+        bool: False when the client negotiates another format than JSON or
+        passes unknown query parameters
+    """
+    if not set(request.GET) <= set(params):
+        return False
+    try:
+        renderer, _ = negotiation.select_renderer(Request(request), [cls() for cls in API_RENDERERS])
+    except NotAcceptable:
+        return False
+    return renderer.format == "json"
+
+
+def json_response(data, status=200):
+    """renders data the way DRF renders it for JSON clients"""
+    response = HttpResponse(renderer.render(data), content_type=renderer.media_type, status=status)
+    response["Vary"] = "Accept"
+    return response
+
+
+async def conditional(request, state, build):
+    """async counterpart of ConditionalMixin.conditional() for GET requests
+
+    Args:
+        request (HttpRequest): the request
+        state (tuple): (last_modified, size) of the resource
+        build (coroutine function): builds the response
+
+    Returns:
+        HttpResponse: 304, or the built response carrying validators
+    """
+    validators = make_validators(request.get_full_path(), state)
+    etag, last_modified = validators
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return response
+    return set_validators(await build(), validators)
+
+
+async def task_list(request):
+    """GET /api/tasks/, with the filters of TaskFilterBackend"""
+    if not accepts(request, TaskFilterBackend.params):
+        return None
+    try:
+        # the ordering and prefetches of the DRF view, for the same bytes
+        queryset = TaskFilterBackend().filter_queryset(Request(request), TaskViewSet.queryset.all(), None)
+    except ValidationError:
+        return None
+    state = await queryset.aaggregate(last_modified=Max("updated_at"), size=Count("id"))
+
+    async def build():
+        tasks = [task async for task in queryset]
+        return json_response(TaskSerializer(tasks, many=True).data)
+
+    return await conditional(request, (state["last_modified"], state["size"]), build)
+
+
+async def list_detail(request, token):
+    """GET /api/lists/<token>/, read through the list payload cache"""
+    if not accepts(request):
+        return None
+    lists = List.objects.filter(public_token=token)
+    state = ListViewSet.validator_state(await lists.aaggregate(**ListViewSet.validator_aggregates()), True)
+    if state is None:
+        return None
+
+    encoding = select_encoding(request)
+
+    async def build_content():
+        todo_list = await ListViewSet.queryset.aget(public_token=token)
+        return compress_content(renderer.render(ListSerializer(todo_list).data), encoding)
+
+    async def build():
+        (content, content_encoding), hit = await list_cache.aget_or_build(
+            token, request.GET, build_content, representation=f"{renderer.media_type}|{encoding or ''}"
+        )
+        response = HttpResponse(content, content_type=renderer.media_type)
+        response["Vary"] = "Accept"
+        set_content_encoding(response, content_encoding)
+        response["X-Cache"] = "HIT" if hit else "MISS"
+        return response
+
+    try:
+        return await conditional(request, state, build)
+    except List.DoesNotExist:
+        # deleted since the validators were read
+        return None
+
+
+async def category_list(request):
+    """GET /api/categories/"""
+    if not accepts(request):
+        return None
+    categories = [category async for category in Category.objects.all()]
+    return json_response(CategorySerializer(categories, many=True).data)
+
+
+async def list_events(request, token):
+    """GET /api/lists/<token>/events/, a Server-Sent Events stream of the list changes"""
+    if request.method != "GET":
+        return json_response({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+    if not isinstance(request, ASGIRequest):
+        # a WSGI worker would be held for the lifetime of the stream
+        return json_response({"detail": "Event streams are served by the ASGI application."}, status=501)
+    if not await List.objects.filter(public_token=token).aexists():
+        return json_response({"detail": "No List matches the given query."}, status=404)
+    response = StreamingHttpResponse(event_stream(token), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # disables proxy buffering (nginx)
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+async def event_stream(token):
+    """subscribes to the events of a list and formats them as Server-Sent Events
+
+    A comment line is sent when no event came for LIST_EVENTS_HEARTBEAT
+    seconds, so that proxies keep the connection open. A client that fell too
+    far behind gets a reset event and should reload the list.
+
+    Args:
+        token (str): list public token
+
+    Yields:
+        str: event stream chunks
+    """
+    subscription = broker.subscribe(token)
+    try:
+        yield f"retry: {EVENTS_RETRY}\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), settings.LIST_EVENTS_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ":\n\n"
+                continue
+            if event is None:
+                yield "event: reset\ndata: {}\n\n"
+                return
+            yield f"id: {event['id']}\nevent: {event['type']}\ndata: {dump_json(event['data'])}\n\n"
+    finally:
+        subscription.close()
@@ -0,0 +1,156 @@
+import threading
+import time
+from urllib.parse import quote
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.http import urlencode
+from lists.models import List
+
+
+class ListPayloadCache:
+    """Read-through cache of serialized lists keyed by public token and version
+
+    Every list has a version number stored next to its payloads; writes bump it
+    once their transaction commits, so payloads built from older data are never
+    read again and simply age out of the LRU backend.
+
+    The views store payloads the way they are sent, rendered and compressed,
+    one entry per representation (media type and content coding).
+    """
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def version_key(self, token):
+        return f"list:{token}:version"
+
+    def get_version(self, token):
+        """reads the version of a list, initializing it when missing
+
+        Args:
+            token (str): list public token
+
+        Returns:
+            int: the version
+        """
+        key = self.version_key(token)
+        version = self.cache.get(key)
+        if version is None:
+            # a clock based start never collides with versions evicted earlier
+            version = time.time_ns()
+            self.cache.add(key, version, timeout=None)
+            version = self.cache.get(key, version)
+        return version
+
+    def get_or_build(self, token, params, build, representation=""):
+        """returns the cached payload of a list, building and storing it on a miss
+
+        Args:
+            token (str): list public token
+            params (QueryDict): query parameters selecting the payload
+            build (callable): builds the payload
+            representation (str): how the payload is encoded, e.g. "application/json|gzip"
+
+        Returns:
+            tuple[object, bool]: the payload and whether it was a hit
+        """
+        key = self.payload_key(token, self.get_version(token), params, representation)
+        data = self.cache.get(key)
+        hit = self.record(data is not None)
+        if not hit:
+            data = build()
+            self.cache.set(key, data)
+        return data, hit
+
+    async def aget_version(self, token):
+        """async get_version()"""
+        key = self.version_key(token)
+        version = await self.cache.aget(key)
+        if version is None:
+            version = time.time_ns()
+            await self.cache.aadd(key, version, timeout=None)
+            version = await self.cache.aget(key, version)
+        return version
+
+    async def aget_or_build(self, token, params, build, representation=""):
+        """async get_or_build(), build being a coroutine function"""
+        key = self.payload_key(token, await self.aget_version(token), params, representation)
+        data = await self.cache.aget(key)
+        hit = self.record(data is not None)
+        if not hit:
+            data = await build()
+            await self.cache.aset(key, data)
+        return data, hit
+
+    def payload_key(self, token, version, params, representation=""):
+        variant = urlencode(sorted(params.lists()), doseq=True)
+        # media types carry client supplied parameters
+        return f"list:{token}:{version}:{variant}:{quote(representation)}"
+
+    def record(self, hit):
+        """counts a lookup in the hit / miss counters
+
+        Args:
+            hit (bool): whether the payload was cached
+
+        Returns:
+            bool: hit
+        """
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return hit
+
+    def stats(self):
+        """returns the hit / miss counters of this process
+
+        Returns:
+            dict: hits, misses and hit ratio
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "ratio": self.hits / total if total else 0.0}
+
+    def invalidate(self, tokens=(), list_ids=()):
+        """bumps the versions of lists once the current transaction commits
+
+        Args:
+            tokens (iterable[str]): public tokens of the changed lists
+            list_ids (iterable[int]): ids of the changed lists, resolved in one query on commit
+        """
+        pending = getattr(self._local, "pending", None)
+        if pending is None:
+            pending = self._local.pending = (set(), set())
+        pending[0].update(tokens)
+        pending[1].update(list_ids)
+        transaction.on_commit(self.flush)
+
+    def flush(self):
+        """bumps the versions collected by invalidate()"""
+        pending = getattr(self._local, "pending", None)
+        if not pending or not any(pending):
+            return
+        self._local.pending = None
+        tokens, list_ids = pending
+        if list_ids:
+            tokens |= set(List.objects.filter(pk__in=list_ids).values_list("public_token", flat=True))
+        for token in tokens:
+            key = self.version_key(token)
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                self.cache.set(key, time.time_ns(), timeout=None)
+
+
+list_cache = ListPayloadCache(settings.LIST_CACHE_ALIAS)
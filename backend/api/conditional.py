@@ -0,0 +1,110 @@
+import hashlib
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+SAFE_METHODS = ("GET", "HEAD")
+
+
+def make_validators(path, state, variant=None):
+    """computes the ETag and Last-Modified of a resource from its state
+
+    Args:
+        path (str): full path of the request
+        state (tuple | None): (last_modified, size) of the resource, None when it does not exist
+        variant (str | None): media type of a representation other than JSON
+
+    Returns:
+        tuple[str, int | None] | None: quoted etag and last modified timestamp
+    """
+    if state is None:
+        return None
+    last_modified, size = state
+    # the query string is part of the tag: filters and pages are distinct representations
+    raw = "|".join([
+        path,
+        last_modified.isoformat() if last_modified else "",
+        str(size),
+        # e.g. MessagePack, distinct bytes need distinct tags
+        *([variant] if variant else []),
+    ])
+    etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+    return etag, int(last_modified.timestamp()) if last_modified else None
+
+
+def set_validators(response, validators):
+    """adds the ETag / Last-Modified headers to a successful response
+
+    Args:
+        response (HttpResponse): the response
+        validators (tuple | None): result of make_validators()
+
+    Returns:
+        HttpResponse: the response
+    """
+    if validators is not None and response.status_code == 200:
+        etag, last_modified = validators
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+class ConditionalMixin:
+    """Adds ETag / Last-Modified validators to viewset reads and If-Match to writes
+
+    Viewsets implement get_validator_state(), returning the (last_modified, size)
+    state of the resource from a single aggregate query, or None when it does not
+    exist. The size (a row count) catches deletions, which leave no updated_at
+    behind. The response is only built when the client copy is stale.
+    """
+
+    def get_validator_state(self):
+        raise NotImplementedError("Conditional viewsets must implement get_validator_state()")
+
+    def get_validators(self):
+        """computes the ETag and Last-Modified of the requested resource
+
+        Returns:
+            tuple[str, int | None] | None: quoted etag and last modified timestamp
+        """
+        renderer = getattr(self.request, "accepted_renderer", None)
+        variant = self.request.accepted_media_type if renderer is not None and renderer.format != "json" else None
+        return make_validators(self.request.get_full_path(), self.get_validator_state(), variant)
+
+    def conditional(self, handler, request, *args, **kwargs):
+        """runs a handler unless the request preconditions short-circuit it
+
+        Args:
+            handler (callable): the wrapped viewset action
+
+        Returns:
+            HttpResponse: 304 / 412, or the handler response carrying validators
+        """
+        safe = request.method in SAFE_METHODS
+        if not safe and not any(header in request.headers for header in ("If-Match", "If-Unmodified-Since")):
+            return handler(request, *args, **kwargs)
+
+        validators = self.get_validators()
+        if validators is None:
+            return handler(request, *args, **kwargs)
+        etag, last_modified = validators
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            return response
+
+        response = handler(request, *args, **kwargs)
+        if not safe and response.status_code == 200:
+            validators = self.get_validators()
+        return set_validators(response, validators)
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+    def update(self, request, *args, **kwargs):
+        return self.conditional(super().update, request, *args, **kwargs)
+
+    def destroy(self, request, *args, **kwargs):
+        return self.conditional(super().destroy, request, *args, **kwargs)
@@ -0,0 +1,407 @@
+import asyncio
+import json
+import threading
+import time
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from categories.models import Category
+from categories.serializers import CategorySerializer
+from lists.models import List
+from lists.serializers import ListHeaderSerializer
+from tasks.models import Task, categories_by_id
+from tasks.serializers import TaskSerializer
+from .renderers import dump_json
+
+# events buffered per client, a client falling further behind gets a reset
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+# seconds the Redis listener waits for a message before applying subscription changes
+REDIS_LISTENER_POLL = 0.2
+
+# seconds publishers reuse the subscriber presence read from Redis
+REDIS_PRESENCE_TTL = 1.0
+
+# seconds the Redis listener waits before reconnecting after an error
+REDIS_RECONNECT_DELAY = 1.0
+
+
+class Subscription:
+    """Queue of the events of one list, read by one event stream
+
+    Events are put from any thread (signals run in the request thread) and
+    read from the event loop the subscription was created in.
+    """
+
+    def __init__(self, broker, token, size=SUBSCRIBER_QUEUE_SIZE):
+        self.broker = broker
+        self.token = token
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(size)
+        self.overflow = False
+
+    def put(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            # the loop of a stream that is gone
+            self.close()
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflow = True
+
+    async def get(self):
+        """waits for the next event
+
+        Returns:
+            dict | None: the event, None once events were dropped and the client must reload
+        """
+        if self.overflow:
+            return None
+        event = await self.queue.get()
+        return None if self.overflow else event
+
+    def drop(self):
+        """makes the stream send a reset, from the event loop of the subscription"""
+        self.overflow = True
+        try:
+            self.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """Fans list events out to the subscribers of this process"""
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    @property
+    def idle(self):
+        """whether no event can reach a subscriber, publishers skip their work then"""
+        return not self._subscribers
+
+    def listening(self, tokens):
+        """filters the lists having subscribers
+
+        Args:
+            tokens (iterable[str]): list public tokens
+
+        Returns:
+            set[str]: the tokens events should be published to
+        """
+        with self._lock:
+            return {token for token in tokens if token in self._subscribers}
+
+    def publish(self, token, event):
+        self.deliver(token, event)
+
+    def deliver(self, token, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(token, ()))
+        for subscription in subscribers:
+            subscription.put(event)
+
+    def subscribe(self, token):
+        """subscribes the running event loop to the events of a list
+
+        Args:
+            token (str): list public token
+
+        Returns:
+            Subscription: the subscription, to be closed by the caller
+        """
+        subscription = Subscription(self, token)
+        with self._lock:
+            self._subscribers.setdefault(token, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.token, set())
+            subscribers.discard(subscription)
+            if not subscribers:
+                self._subscribers.pop(subscription.token, None)
+
+
+class RedisBroker(LocalBroker):
+    """Relays list events through Redis pub/sub so that they reach every worker
+
+    Publishers write to the lists:events:<token> channel. Each process runs
+    one listener, subscribed to the channels of the lists its clients follow
+    and, while it has any, to the lists:listeners presence channel: PUBSUB
+    NUMSUB then tells publishers whether anyone listens, without any state
+    left behind by a crashed worker. The presence is cached for
+    REDIS_PRESENCE_TTL seconds so that a write costs no Redis round trip.
+
+    Redis errors never fail a write: publishers see an idle broker and the
+    listener reconnects, resetting the streams of this process as their
+    events were lost meanwhile. Requires redis.
+    """
+
+    prefix = "lists:events:"
+    presence = "lists:listeners"
+
+    def __init__(self, url=None):
+        super().__init__()
+        try:
+            import redis
+        except ImportError:
+            raise ImproperlyConfigured("RedisBroker requires the redis package")
+        self.url = url or settings.LIST_EVENTS_REDIS_URL
+        self.client = redis.Redis.from_url(self.url)
+        self.errors = redis.RedisError
+        self._listener = None
+        self._changed = None
+        # (whether anyone listens, monotonic time the answer expires)
+        self._presence = (False, 0.0)
+
+    @property
+    def idle(self):
+        present, expires = self._presence
+        now = time.monotonic()
+        if now >= expires:
+            try:
+                [(_, count)] = self.client.pubsub_numsub(self.presence)
+            except self.errors:
+                count = 0
+            present = bool(count)
+            self._presence = (present, now + REDIS_PRESENCE_TTL)
+        return not present
+
+    def listening(self, tokens):
+        tokens = list(tokens)
+        if not tokens:
+            return set()
+        try:
+            counts = self.client.pubsub_numsub(*(f"{self.prefix}{token}" for token in tokens))
+        except self.errors:
+            return set()
+        return {token for token, (_, count) in zip(tokens, counts) if count}
+
+    def publish(self, token, event):
+        try:
+            self.client.publish(f"{self.prefix}{token}", dump_json(event))
+        except self.errors:
+            # the streams reset once the listeners reconnect
+            pass
+
+    def subscribe(self, token):
+        subscription = super().subscribe(token)
+        # this process listens now, whatever the cached presence says
+        self._presence = (True, time.monotonic() + REDIS_PRESENCE_TTL)
+        if self._listener is None or self._listener.done():
+            self._changed = asyncio.Event()
+            self._listener = subscription.loop.create_task(self.listen())
+        self.changed()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        super().unsubscribe(subscription)
+        self.changed()
+
+    def changed(self):
+        """wakes the listener up to update its Redis subscriptions, from any thread"""
+        listener = self._listener
+        if listener is None or listener.done():
+            return
+        try:
+            listener.get_loop().call_soon_threadsafe(self._changed.set)
+        except RuntimeError:
+            # the loop is closed, the listener with it
+            pass
+
+    async def listen(self):
+        """forwards the events of the lists followed in this process to the local subscribers"""
+        import redis.asyncio
+        while True:
+            try:
+                async with redis.asyncio.Redis.from_url(self.url) as client:
+                    await self.relay(client)
+            except self.errors:
+                with self._lock:
+                    subscriptions = [subscription for subscribers in self._subscribers.values() for subscription in subscribers]
+                for subscription in subscriptions:
+                    subscription.drop()
+                await asyncio.sleep(REDIS_RECONNECT_DELAY)
+
+    async def relay(self, client):
+        """subscribes to the channels of the followed lists and delivers their messages, until an error"""
+        subscribed = set()
+        async with client.pubsub() as pubsub:
+            while True:
+                self._changed.clear()
+                with self._lock:
+                    wanted = {f"{self.prefix}{token}" for token in self._subscribers}
+                if wanted:
+                    wanted.add(self.presence)
+                if wanted - subscribed:
+                    await pubsub.subscribe(*(wanted - subscribed))
+                if subscribed - wanted:
+                    await pubsub.unsubscribe(*(subscribed - wanted))
+                subscribed = wanted
+                if not subscribed:
+                    await self._changed.wait()
+                    continue
+                # bounded wait, so that subscription changes are applied soon
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=REDIS_LISTENER_POLL)
+                if message is not None and message["type"] == "message":
+                    channel = message["channel"].decode()
+                    if channel.startswith(self.prefix):
+                        self.deliver(channel[len(self.prefix):], json.loads(message["data"]))
+
+
+class ListEvents:
+    """Collects the row changes of a transaction and publishes them as list events
+
+    Receivers record what changed; once the transaction commits, the changed
+    rows are read back in a few queries and published to the lists holding
+    them, right away outside of a transaction. Reading back also drops changes
+    of rolled back transactions, whose pending records are flushed by the next
+    commit of the thread. Nothing is read while no client is subscribed.
+
+    Events are {"id", "type", "data"} dicts, the types being task.saved,
+    task.deleted, list.saved, list.deleted, category.saved and category.deleted.
+    """
+
+    def __init__(self, broker):
+        self.broker = broker
+        self._local = threading.local()
+
+    @property
+    def pending(self):
+        pending = getattr(self._local, "pending", None)
+        if pending is None:
+            pending = self._local.pending = {
+                "tasks": {}, "deleted_tasks": {}, "lists": set(), "deleted_lists": set(),
+                "categories": {}, "deleted_categories": {},
+            }
+        return pending
+
+    def schedule(self):
+        """publishes the pending changes once the transaction commits, receivers call it after recording
+
+        In autocommit on_commit() runs the flush immediately: recording first
+        keeps it from publishing an empty batch.
+        """
+        transaction.on_commit(self.flush)
+
+    def task_saved(self, tasks):
+        """records saved tasks
+
+        Args:
+            tasks (iterable[Task]): the tasks, a task moved to another list is removed from the one it was loaded from
+        """
+        if self.broker.idle:
+            return
+        saved = self.pending["tasks"]
+        for task in tasks:
+            loaded = getattr(task, "_loaded_values", {}).get("list_id", task.list_id)
+            saved.setdefault(task.pk, set()).update((task.list_id, loaded))
+        self.schedule()
+
+    def task_ids_saved(self, ids):
+        if self.broker.idle:
+            return
+        saved = self.pending["tasks"]
+        for task in Task.objects.filter(pk__in=list(ids)).only("id", "list_id"):
+            saved.setdefault(task.pk, set()).add(task.list_id)
+        self.schedule()
+
+    def task_deleted(self, task):
+        if not self.broker.idle:
+            self.pending["deleted_tasks"][task.pk] = task.list_id
+            self.schedule()
+
+    def list_saved(self, todo_list):
+        if not self.broker.idle:
+            self.pending["lists"].add(todo_list.public_token)
+            self.schedule()
+
+    def list_deleted(self, todo_list):
+        if not self.broker.idle:
+            self.pending["deleted_lists"].add(todo_list.public_token)
+            self.schedule()
+
+    def category_changed(self, category, deleted=False):
+        if self.broker.idle:
+            return
+        list_ids = set(Task.objects.filter(categories=category).values_list("list_id", flat=True))
+        key = "deleted_categories" if deleted else "categories"
+        self.pending[key].setdefault(category.pk, set()).update(list_ids)
+        self.schedule()
+
+    def flush(self):
+        """publishes the changes collected by the receivers"""
+        pending = getattr(self._local, "pending", None)
+        self._local.pending = None
+        if not pending or self.broker.idle:
+            return
+        list_ids = set().union(
+            *pending["tasks"].values(), pending["deleted_tasks"].values(),
+            *pending["categories"].values(), *pending["deleted_categories"].values()
+        )
+        tokens = dict(List.objects.filter(pk__in=list_ids).values_list("pk", "public_token")) if list_ids else {}
+        wanted = self.broker.listening(set(tokens.values()) | pending["lists"] | pending["deleted_lists"])
+        if not wanted:
+            return
+        wanted_ids = {pk for pk, token in tokens.items() if token in wanted}
+        event_id = timezone.now().isoformat()
+        events = []
+
+        def emit(list_id, kind, data):
+            token = tokens.get(list_id)
+            if token in wanted:
+                events.append((token, {"id": event_id, "type": kind, "data": data}))
+
+        saved = {pk: ids for pk, ids in pending["tasks"].items() if ids & wanted_ids}
+        if saved:
+            serializer = TaskSerializer()
+            for task in Task.objects.filter(pk__in=saved).prefetch_related(categories_by_id()):
+                emit(task.list_id, "task.saved", serializer.to_representation(task))
+                for list_id in saved[task.pk] - {task.list_id}:
+                    emit(list_id, "task.deleted", {"id": task.pk})
+        deleted = {pk: list_id for pk, list_id in pending["deleted_tasks"].items() if list_id in wanted_ids}
+        if deleted:
+            existing = set(Task.objects.filter(pk__in=deleted).values_list("pk", flat=True))
+            for pk in set(deleted) - existing:
+                emit(deleted[pk], "task.deleted", {"id": pk})
+
+        changed = pending["categories"]
+        if changed:
+            serializer = CategorySerializer()
+            for category in Category.objects.filter(pk__in=changed):
+                for list_id in changed[category.pk]:
+                    emit(list_id, "category.saved", serializer.to_representation(category))
+        removed = pending["deleted_categories"]
+        if removed:
+            existing = set(Category.objects.filter(pk__in=removed).values_list("pk", flat=True))
+            for pk in set(removed) - existing:
+                for list_id in removed[pk]:
+                    emit(list_id, "category.deleted", {"id": pk})
+
+        lists = pending["lists"] & wanted
+        if lists:
+            serializer = ListHeaderSerializer()
+            for todo_list in List.objects.filter(public_token__in=lists):
+                events.append((todo_list.public_token, {"id": event_id, "type": "list.saved", "data": serializer.to_representation(todo_list)}))
+        gone = pending["deleted_lists"] & wanted
+        if gone:
+            for token in gone - set(List.objects.filter(public_token__in=gone).values_list("public_token", flat=True)):
+                events.append((token, {"id": event_id, "type": "list.deleted", "data": {"public_token": token}}))
+
+        for token, event in events:
+            self.broker.publish(token, event)
+
+
+broker = import_string(settings.LIST_EVENTS_BROKER)()
+list_events = ListEvents(broker)
@@ -0,0 +1,89 @@
+from .renderers import dump_csv, dump_json
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+def batched(rows, size):
+    """groups an iterable into lists of at most size items"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def keyset_batches(queryset, pagination, size=EXPORT_CHUNK_SIZE):
+    """reads the rows of a queryset one LIMIT query at a time, each seeking past the previous one
+
+    QuerySet.iterator() does not stream on MySQL: PyMySQL has no server side
+    cursors and buffers the whole result set. Separate batches bound memory
+    on every backend, and prefetches run per batch.
+
+    Args:
+        queryset (QuerySet): the rows, the columns of the ordering loaded
+        pagination (KeysetPagination): the ordering and its seek filter
+        size (int): rows per query
+
+    Yields:
+        Model: the rows, in the order of the pagination
+    """
+    queryset = queryset.order_by(*pagination.get_ordering())
+    position = None
+    while True:
+        batch = queryset if position is None else queryset.filter(pagination.seek(position, False))
+        rows = list(batch[:size])
+        yield from rows
+        if len(rows) < size:
+            return
+        position = pagination.get_position(rows[-1])
+
+
+def stream_json(header, rows):
+    """streams {header..., "tasks": [rows...]} without holding the rows in memory
+
+    Args:
+        header (dict): list fields, sent first
+        rows (iterator[dict]): serialized tasks
+
+    Yields:
+        str: json chunks
+    """
+    opening = dump_json(header)[:-1]
+    yield f'{opening}{"," if header else ""}"tasks":['
+    first = True
+    for batch in batched(rows, EXPORT_CHUNK_SIZE):
+        chunk = ",".join(dump_json(row) for row in batch)
+        yield chunk if first else f",{chunk}"
+        first = False
+    yield "]}"
+
+
+def stream_json_lines(rows):
+    """streams rows as JSON Lines
+
+    Args:
+        rows (iterator[dict]): serialized tasks
+
+    Yields:
+        str: lines, grouped by chunk
+    """
+    for batch in batched(rows, EXPORT_CHUNK_SIZE):
+        yield "".join(dump_json(row) + "\n" for row in batch)
+
+
+def stream_csv(columns, rows):
+    """streams rows as CSV, header line first
+
+    Args:
+        columns (list[str]): column names
+        rows (iterator[dict]): serialized tasks
+
+    Yields:
+        str: csv chunks
+    """
+    yield dump_csv([], columns, header=True)
+    for batch in batched(rows, EXPORT_CHUNK_SIZE):
+        yield dump_csv(batch, columns)
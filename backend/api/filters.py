@@ -0,0 +1,171 @@
+import zoneinfo
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+from tasks.models import Task
+
+TRUE_VALUES = {"1", "true", "yes"}
+FALSE_VALUES = {"0", "false", "no"}
+NULL_VALUES = {"null", "none"}
+
+
+class TaskFilterBackend(BaseFilterBackend):
+    """Filters tasks from query parameters
+
+    Supported parameters:
+        list: list id or public token
+        list_token: list public token
+        done: true / false
+        priority, priority_min, priority_max: priority value or bounds
+        due_after, due_before: ISO 8601 datetimes bounding due_at
+        parent: parent task id, or "null" for root tasks
+        categories: comma separated category ids, matches tasks having any of them
+    """
+
+    params = {
+        "list", "list_token", "done", "priority", "priority_min", "priority_max",
+        "due_after", "due_before", "parent", "categories",
+    }
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        errors = {}
+
+        def parse(name, parser):
+            try:
+                return parser(params[name])
+            except ValueError as e:
+                errors[name] = [str(e)]
+
+        if "list" in params:
+            value = params["list"]
+            condition = Q(list__public_token=value)
+            if value.isdigit():
+                condition |= Q(list_id=int(value))
+            queryset = queryset.filter(condition)
+        if "list_token" in params:
+            queryset = queryset.filter(list__public_token=params["list_token"])
+        if "done" in params:
+            done = parse("done", parse_bool)
+            if done is not None:
+                queryset = queryset.filter(done=done)
+        for name, lookup in (("priority", "priority"), ("priority_min", "priority__gte"), ("priority_max", "priority__lte")):
+            if name in params:
+                priority = parse(name, parse_int)
+                if priority is not None:
+                    queryset = queryset.filter(**{lookup: priority})
+        for name, lookup in (("due_after", "due_at__gte"), ("due_before", "due_at__lt")):
+            if name in params:
+                due = parse(name, parse_aware_datetime)
+                if due is not None:
+                    queryset = queryset.filter(**{lookup: due})
+        if "parent" in params:
+            if params["parent"].lower() in NULL_VALUES:
+                queryset = queryset.filter(parent__isnull=True)
+            else:
+                parent = parse("parent", parse_int)
+                if parent is not None:
+                    queryset = queryset.filter(parent_id=parent)
+        if "categories" in params:
+            ids = parse("categories", parse_id_list)
+            if ids is not None:
+                # subquery on the through table instead of a join, no DISTINCT needed
+                through = Task.categories.through.objects.filter(category_id__in=ids)
+                queryset = queryset.filter(id__in=through.values("task_id"))
+
+        if errors:
+            raise ValidationError(errors)
+        return queryset
+
+
+def parse_bool(value):
+    """parses a boolean query parameter
+
+    Args:
+        value (str): raw parameter
+
+    Raises:
+        ValueError: value is not a boolean
+
+    Returns:
+        bool: the parsed value
+    """
+    value = value.lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise ValueError("Expected true or false.")
+
+
+def parse_int(value):
+    """parses an integer query parameter
+
+    Args:
+        value (str): raw parameter
+
+    Raises:
+        ValueError: value is not an integer
+
+    Returns:
+        int: the parsed value
+    """
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError("Expected an integer.")
+
+
+def parse_aware_datetime(value):
+    """parses an ISO 8601 datetime query parameter
+
+    Args:
+        value (str): raw parameter
+
+    Raises:
+        ValueError: value is not a datetime
+
+    Returns:
+        datetime: the parsed value
+    """
+    parsed = parse_datetime(value.replace(" ", "+"))
+    if parsed is None:
+        raise ValueError("Expected an ISO 8601 datetime.")
+    return parsed
+
+
+def parse_timezone(value):
+    """parses an IANA time zone query parameter, e.g. Europe/Paris
+
+    Args:
+        value (str): raw parameter
+
+    Raises:
+        ValueError: value is not a known time zone
+
+    Returns:
+        ZoneInfo: the time zone
+    """
+    try:
+        return zoneinfo.ZoneInfo(value)
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+        raise ValueError("Expected an IANA time zone, e.g. Europe/Paris.")
+
+
+def parse_id_list(value):
+    """parses a comma separated list of ids
+
+    Args:
+        value (str): raw parameter
+
+    Raises:
+        ValueError: an item is not an integer
+
+    Returns:
+        list[int]: the parsed ids
+    """
+    try:
+        return [int(item) for item in value.split(",") if item]
+    except ValueError:
+        raise ValueError("Expected comma separated ids.")
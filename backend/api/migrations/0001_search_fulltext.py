@@ -0,0 +1,41 @@
+from django.db import migrations
+
+# FULLTEXT indexes of api/search.py, MySQL only: other databases are searched
+# through the in-process inverted index
+FULLTEXT_INDEXES = [
+    ("tasks", "Task", "task_fulltext_idx", ["name", "description"]),
+    ("lists", "List", "list_fulltext_idx", ["name", "description"]),
+    ("categories", "Category", "category_fulltext_idx", ["name"]),
+]
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "mysql":
+        return
+    quote = schema_editor.quote_name
+    for app_label, model_name, name, fields in FULLTEXT_INDEXES:
+        model = apps.get_model(app_label, model_name)
+        columns = ", ".join(quote(model._meta.get_field(field).column) for field in fields)
+        schema_editor.execute(f"CREATE FULLTEXT INDEX {quote(name)} ON {quote(model._meta.db_table)} ({columns})")
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "mysql":
+        return
+    quote = schema_editor.quote_name
+    for app_label, model_name, name, _ in FULLTEXT_INDEXES:
+        model = apps.get_model(app_label, model_name)
+        schema_editor.execute(f"DROP INDEX {quote(name)} ON {quote(model._meta.db_table)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0005_category_ordering'),
+        ('lists', '0003_alter_list_public_token'),
+        ('tasks', '0008_task_updated_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,298 @@
+import base64
+import json
+from datetime import date, datetime
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+from tasks.models import DISPLAY_ORDER
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination seeking on the full ordering key instead of an offset
+
+    The cursor holds the ordering values of the row a page stopped at, so every
+    page is a single indexed range scan whatever its depth. Pagination is opt-in:
+    requests without a cursor or page size keep receiving a bare array.
+    """
+    ordering = ("id",)
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Invalid cursor"
+
+    def __init__(self):
+        self.page_size = settings.REST_FRAMEWORK["PAGE_SIZE"]
+        self.max_page_size = settings.API_MAX_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """fetches the requested page, or None when pagination was not asked for
+
+        Args:
+            queryset (QuerySet): the filtered queryset
+            request (Request): the current request
+            view (APIView): the calling view
+
+        Returns:
+            list | None: the page rows
+        """
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+        return self.paginate(queryset, request)
+
+    def paginate(self, queryset, request):
+        """fetches the page of the request cursor, the first page without one
+
+        Args:
+            queryset (QuerySet): the filtered queryset
+            request (Request): the current request
+
+        Returns:
+            list: the page rows
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position, self.reverse = self.decode_cursor(request, queryset.model)
+
+        queryset = queryset.order_by(*self.get_ordering(self.reverse))
+        if position is not None:
+            queryset = queryset.filter(self.seek(position, self.reverse))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+
+        if self.reverse:
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        """reads the page size from the query string, bounded by max_page_size
+
+        Args:
+            request (Request): the current request
+
+        Returns:
+            int: the page size
+        """
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, reverse=False):
+        """returns the ordering, flipped when walking backwards
+
+        Args:
+            reverse (bool): whether the page is read backwards
+
+        Returns:
+            list[str]: order_by() arguments
+        """
+        if not reverse:
+            return list(self.ordering)
+        return [key[1:] if key.startswith("-") else f"-{key}" for key in self.ordering]
+
+    def seek(self, position, reverse):
+        """builds the filter selecting rows strictly after a position
+
+        Args:
+            position (list): the ordering values of the last seen row
+            reverse (bool): whether the page is read backwards
+
+        Returns:
+            Q: (a > x) OR (a = x AND b > y) OR ...
+        """
+        condition = Q()
+        equal = {}
+        for key, value in zip(self.get_ordering(reverse), position):
+            name = key.lstrip("-")
+            lookup = "lt" if key.startswith("-") else "gt"
+            condition |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+        return condition
+
+    def get_position(self, row):
+        return [getattr(row, key.lstrip("-")) for key in self.ordering]
+
+    def encode_cursor(self, position, reverse):
+        """serializes a position into an url safe cursor
+
+        Args:
+            position (list): ordering values
+            reverse (bool): whether the cursor walks backwards
+
+        Returns:
+            str: the cursor
+        """
+        values = [value.isoformat() if isinstance(value, (date, datetime)) else value for value in position]
+        payload = json.dumps({"p": values, "r": reverse}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, request, model):
+        """parses the cursor of a request
+
+        Args:
+            request (Request): the current request
+            model (Model): the paginated model, used to parse the values
+
+        Raises:
+            NotFound: the cursor is malformed
+
+        Returns:
+            tuple[list | None, bool]: the position and the direction
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4)))
+            values = payload["p"]
+            if len(values) != len(self.ordering):
+                raise ValueError
+            position = [
+                model._meta.get_field(key.lstrip("-")).to_python(value)
+                for key, value in zip(self.ordering, values)
+            ]
+            return position, bool(payload.get("r"))
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.get_position(self.page[-1]), False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self._link(self.get_position(self.page[0]), True)
+
+    def _link(self, position, reverse):
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(position, reverse))
+
+
+class TaskPagination(KeysetPagination):
+    """Keyset pagination following the order tasks are displayed in"""
+    ordering = DISPLAY_ORDER
+
+
+class AgendaPagination(KeysetPagination):
+    """Keyset pagination of one due window of the agenda, soonest first
+
+    Every window is paginated, its links carry the ?bucket= they page through.
+    """
+    ordering = ("due_at", "id")
+    bucket_query_param = "bucket"
+
+    def __init__(self, bucket):
+        super().__init__()
+        self.bucket = bucket
+
+    def _link(self, position, reverse):
+        return replace_query_param(super()._link(position, reverse), self.bucket_query_param, self.bucket)
+
+    def get_previous_link(self):
+        link = super().get_previous_link()
+        if link is not None and not self.page:
+            link = replace_query_param(link, self.bucket_query_param, self.bucket)
+        return link
+
+
+class RankedPagination(KeysetPagination):
+    """Pagination of ranked search results, the cursor holds the offset of the page
+
+    Results are ranked per request, the page at offset n being read from the
+    best n + page_size results: paging stops at SEARCH_MAX_RESULTS. Always on,
+    without parameters the first page is returned.
+    """
+
+    def paginate_ranked(self, rank, request):
+        """fetches the requested page of ranked results
+
+        Args:
+            rank (callable): returns the best n results, given n
+            request (Request): the current request
+
+        Returns:
+            list: the page rows
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.offset = self.decode_offset(request)
+        end = min(self.offset + self.page_size, settings.SEARCH_MAX_RESULTS)
+        rows = rank(end + 1)
+        self.page = rows[self.offset:end]
+        self.has_next = len(rows) > end and end < settings.SEARCH_MAX_RESULTS
+        self.has_previous = self.offset > 0
+        return self.page
+
+    def decode_offset(self, request):
+        """parses the cursor of a request
+
+        Raises:
+            NotFound: the cursor is malformed or out of range
+
+        Returns:
+            int: the offset
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return 0
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded + "=" * (-len(encoded) % 4)))
+            offset = payload["o"]
+            if not isinstance(offset, int) or not 0 <= offset < settings.SEARCH_MAX_RESULTS:
+                raise ValueError
+            return offset
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self._offset_link(self.offset + len(self.page))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self._offset_link(max(0, self.offset - self.page_size))
+
+    def _offset_link(self, offset):
+        url = replace_query_param(self.request.build_absolute_uri(), self.page_size_query_param, self.page_size)
+        if not offset:
+            return remove_query_param(url, self.cursor_query_param)
+        payload = json.dumps({"o": offset}, separators=(",", ":"))
+        return replace_query_param(url, self.cursor_query_param, base64.urlsafe_b64encode(payload.encode()).decode().rstrip("="))
@@ -0,0 +1,23 @@
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from .renderers import from_rows, is_rows_layout, msgpack
+
+
+class MessagePackParser(BaseParser):
+    """Parses MessagePack request bodies, requires msgpack
+
+    Content-Type: application/msgpack; layout=rows accepts the tables of
+    MessagePackRenderer in place of arrays of objects.
+    """
+    media_type = "application/msgpack"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            data = msgpack.unpackb(stream.read(), raw=False, strict_map_key=False)
+        except (TypeError, ValueError) as e:
+            raise ParseError(f"MessagePack parse error - {e}")
+        return from_rows(data) if is_rows_layout(media_type) else data
+
+
+# negotiated by the API viewsets
+MSGPACK_PARSERS = [MessagePackParser] if msgpack is not None else []
@@ -0,0 +1,174 @@
+import csv
+import io
+import json
+from django.utils.http import parse_header_parameters
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # optional, the json module produces the same bytes
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional, MessagePack is only negotiated when installed
+    msgpack = None
+
+_encoder = encoders.JSONEncoder()
+
+
+def encode_json(data):
+    """encodes data as compact utf-8 JSON bytes, DRF types supported
+
+    orjson is used when installed. Datetimes and dataclasses are passed to the
+    DRF encoder so that both encoders produce the same bytes.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                data,
+                default=_encoder.default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+            )
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits
+            pass
+    return json.dumps(data, cls=encoders.JSONEncoder, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def dump_json(data):
+    """encodes data the way JSONRenderer does: compact, utf-8, DRF types supported"""
+    return encode_json(data).decode()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer encoding through encode_json(), byte for byte the same output
+
+    Indented output (browsable API, ; indent=) goes through JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if orjson is None or indent is not None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = encode_json(data)
+        # escaped by JSONRenderer, see its render()
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+def dump_csv(rows, columns, header=False):
+    """encodes rows as csv text, list values are joined with ";"
+
+    Args:
+        rows (iterable[dict]): rows to encode
+        columns (list[str]): column names, in order
+        header (bool): whether the header line is written first
+
+    Returns:
+        str: the csv text
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(columns)
+    for row in rows:
+        writer.writerow([
+            ";".join(str(item) for item in row.get(column)) if isinstance(row.get(column), list) else row.get(column)
+            for column in columns
+        ])
+    return buffer.getvalue()
+
+
+class JSONLinesRenderer(BaseRenderer):
+    """Renders an array as JSON Lines, one compact object per line"""
+    media_type = "application/x-ndjson"
+    format = "jsonl"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        rows = data if isinstance(data, list) else [data]
+        return "".join(dump_json(row) + "\n" for row in rows).encode()
+
+
+class CSVRenderer(BaseRenderer):
+    """Renders an array of flat objects as CSV with a header line"""
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        rows = data if isinstance(data, list) else [data]
+        columns = list(rows[0]) if rows else []
+        return dump_csv(rows, columns, header=True).encode()
+
+
+def to_rows(data):
+    """turns arrays of objects sharing the same keys into {"columns", "rows"} tables, recursively
+
+    Args:
+        data: serialized data
+
+    Returns:
+        the data, each key being sent once per array instead of once per object
+    """
+    if isinstance(data, dict):
+        return {key: to_rows(value) for key, value in data.items()}
+    if isinstance(data, list):
+        if data and all(isinstance(item, dict) for item in data):
+            columns = list(data[0])
+            if all(item.keys() == data[0].keys() for item in data):
+                return {"columns": columns, "rows": [[to_rows(item[key]) for key in columns] for item in data]}
+        return [to_rows(item) for item in data]
+    return data
+
+
+def from_rows(data):
+    """inverse of to_rows(), expands {"columns", "rows"} tables back into arrays of objects"""
+    if isinstance(data, dict):
+        if data.keys() == {"columns", "rows"} and isinstance(data["columns"], list) and isinstance(data["rows"], list):
+            return [
+                dict(zip(data["columns"], (from_rows(value) for value in row)))
+                for row in data["rows"] if isinstance(row, list)
+            ]
+        return {key: from_rows(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [from_rows(item) for item in data]
+    return data
+
+
+def is_rows_layout(media_type):
+    """whether a MessagePack media type asks for the rows layout, e.g. application/msgpack; layout=rows"""
+    _, params = parse_header_parameters(media_type or "")
+    return params.get("layout") == "rows"
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Renders MessagePack, requires msgpack
+
+    Accept: application/msgpack; layout=rows renders arrays of objects as
+    {"columns": [...], "rows": [[...], ...]} tables, see to_rows().
+    """
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if is_rows_layout(accepted_media_type):
+            data = to_rows(data)
+        return msgpack.packb(data, default=_encoder.default, use_bin_type=True)
+
+
+# negotiated by the API viewsets
+MSGPACK_RENDERERS = [MessagePackRenderer] if msgpack is not None else []
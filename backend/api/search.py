@@ -0,0 +1,427 @@
+"""Full-text search over task, list and category names and descriptions
+
+On MySQL, FullTextSearch queries the FULLTEXT indexes created by
+api/migrations/0001_search_fulltext.py. Other databases go through
+InvertedIndex, an index of the searched columns held by each process (see
+SEARCH_BACKEND), or DatabaseSearch once the tables outgrow the index (see
+SEARCH_INDEX_MAX_ROWS). All return (score, type, id) hits, best first.
+"""
+import bisect
+import heapq
+import math
+import re
+import threading
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, FloatField, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+from categories.models import Category
+from categories.serializers import CategorySerializer
+from lists.models import List
+from lists.serializers import ListHeaderSerializer
+from tasks.models import Task, TaskTombstone, categories_by_id
+from tasks.serializers import TaskSerializer
+
+# searched columns and their weight in the ranking, by result type
+SEARCH_FIELDS = {
+    "task": (Task, {"name": 2, "description": 1}),
+    "list": (List, {"name": 2, "description": 1}),
+    "category": (Category, {"name": 2}),
+}
+
+# longest accepted query, in characters
+MAX_QUERY_LENGTH = 200
+
+# shortest last word of a query matched as a prefix, shorter ones must match whole
+MIN_PREFIX_LENGTH = 2
+
+# rows read per query while building the inverted index
+SYNC_CHUNK_SIZE = 5000
+
+WORD_RE = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """splits a text into lowercase words"""
+    return WORD_RE.findall(text.lower()) if text else []
+
+
+def parse_query(query):
+    """splits a query into the words matched whole and the last word, matched as a prefix
+
+    The last word is still being typed unless the query ends with a space.
+
+    Args:
+        query (str): the query
+
+    Returns:
+        tuple[list[str], str | None]: the whole words and the prefix
+    """
+    words = list(dict.fromkeys(tokenize(query)))
+    if not words or query[-1:].isspace() or len(words[-1]) < MIN_PREFIX_LENGTH:
+        return words, None
+    return words[:-1], words[-1]
+
+
+class FullTextSearch:
+    """Ranks rows with MATCH() AGAINST() in boolean mode, on MySQL
+
+    Every word is required and the last one is matched as a prefix. Each
+    table has one FULLTEXT index over its searched columns, the column weights
+    of SEARCH_FIELDS are not applied: MySQL relevance ranks the rows.
+    """
+
+    def search(self, query, types, limit):
+        """returns the best hits of a query
+
+        Args:
+            query (str): the query
+            types (iterable[str]): searched result types, keys of SEARCH_FIELDS
+            limit (int): maximum number of hits
+
+        Returns:
+            list[tuple[float, str, int]]: (score, type, id) hits, best first
+        """
+        exact, prefix = parse_query(query)
+        terms = [f"+{word}" for word in exact] + ([f"+{prefix}*"] if prefix else [])
+        if not terms:
+            return []
+        against = " ".join(terms)
+        hits = []
+        for kind in types:
+            model, fields = SEARCH_FIELDS[kind]
+            columns = ", ".join(connection.ops.quote_name(model._meta.get_field(name).column) for name in fields)
+            score = RawSQL(f"MATCH ({columns}) AGAINST (%s IN BOOLEAN MODE)", (against,), output_field=FloatField())
+            rows = model.objects.annotate(score=score).filter(score__gt=0).order_by("-score", "id")
+            hits.extend((score, kind, pk) for pk, score in rows.values_list("id", "score")[:limit])
+        hits.sort(key=lambda hit: (-hit[0], hit[1], hit[2]))
+        return hits[:limit]
+
+    def discard(self, docs):
+        """nothing to do, rows are searched in the database"""
+
+
+class DatabaseSearch:
+    """Matches words with LIKE queries, on databases without FULLTEXT indexes
+
+    Every word must be contained in one of the searched columns of a row, the
+    last one is a prefix and is contained just the same. Rows are ranked by the
+    SEARCH_FIELDS weights of the columns holding each word. Scans the tables,
+    it serves the tables too large for InvertedIndex.
+    """
+
+    def search(self, query, types, limit):
+        """returns the best hits of a query, see FullTextSearch.search()"""
+        exact, prefix = parse_query(query)
+        words = exact + ([prefix] if prefix else [])
+        if not words:
+            return []
+        hits = []
+        for kind in types:
+            model, fields = SEARCH_FIELDS[kind]
+            matches = Q()
+            scores = []
+            for word in words:
+                matches &= Q(*(Q(**{f"{name}__icontains": word}) for name in fields), _connector=Q.OR)
+                scores.extend(
+                    Case(When(**{f"{name}__icontains": word}, then=Value(weight)), default=Value(0), output_field=IntegerField())
+                    for name, weight in fields.items()
+                )
+            rows = model.objects.filter(matches).annotate(score=sum(scores[1:], scores[0])).order_by("-score", "id")
+            hits.extend((float(score), kind, pk) for pk, score in rows.values_list("id", "score")[:limit])
+        hits.sort(key=lambda hit: (-hit[0], hit[1], hit[2]))
+        return hits[:limit]
+
+    def discard(self, docs):
+        """nothing to do, rows are searched in the database"""
+
+
+class InvertedIndex:
+    """In-process inverted index of the searched columns, ranked by tf-idf
+
+    Built from the tables when a worker starts (see warm_up()) or by the first
+    search. Tables holding more than SEARCH_INDEX_MAX_ROWS rows are not
+    indexed, their searches go to DatabaseSearch. Before each search, rows
+    updated since the previous one are re-indexed and tombstoned tasks
+    removed. The window overlaps by SEARCH_INDEX_OVERLAP seconds for
+    transactions committing late. This picks up the writes of every worker.
+    Rows deleted without a tombstone (lists, categories, tasks of deleted
+    lists) are discarded once a search returns them.
+
+    Documents are (type, id) pairs. The weight of a word in a document is the
+    sum of the SEARCH_FIELDS weights of the columns holding it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """empties the index, the next search rebuilds it"""
+        # word: {doc: weight}
+        self.postings = {}
+        # doc: (updated_at, {word: weight})
+        self.documents = {}
+        # sorted vocabulary, for prefix lookups
+        self.words = []
+        # start of the latest sync, None until the index is built
+        self.synced_at = None
+        # word: [(-weight, doc)] sorted, dropped when the postings of the word change
+        self._ranked = {}
+        # whether the tables exceed SEARCH_INDEX_MAX_ROWS, None until counted
+        self.oversized = None
+
+    def fits(self):
+        """tells whether the searched tables fit in the index, counting their rows once"""
+        if self.oversized is None:
+            rows = sum(model.objects.count() for model, _ in SEARCH_FIELDS.values())
+            self.oversized = rows > settings.SEARCH_INDEX_MAX_ROWS
+        return not self.oversized
+
+    def warm(self):
+        """builds the index ahead of the first search, unless the tables do not fit"""
+        with self._lock:
+            if self.fits():
+                self.sync()
+
+    def search(self, query, types, limit):
+        """returns the best hits of a query, see FullTextSearch.search()"""
+        exact, prefix = parse_query(query)
+        if not exact and not prefix:
+            return []
+        types = set(types)
+        with self._lock:
+            if self.fits():
+                self.sync()
+            if self.oversized:
+                # the tables outgrew the index while it was synced
+                return database_search.search(query, types, limit)
+            if prefix and not exact:
+                ranked = self.search_prefix(prefix, types, limit)
+            else:
+                ranked = heapq.nsmallest(limit, self.score(exact, prefix, types))
+        return [(-score, kind, pk) for score, (kind, pk) in ranked]
+
+    def score(self, exact, prefix, types):
+        """scores the documents holding every whole word and a word starting with the prefix
+
+        Args:
+            exact (list[str]): whole words
+            prefix (str | None): the prefix
+            types (set[str]): searched result types
+
+        Yields:
+            tuple[float, tuple]: (-score, doc)
+        """
+        if any(word not in self.postings for word in exact):
+            return
+        idf = {}
+        rarest = min(exact, key=lambda word: len(self.postings[word]))
+        for doc in self.postings[rarest]:
+            if doc[0] not in types:
+                continue
+            words = self.documents[doc][1]
+            score = 0.0
+            for word in exact:
+                weight = words.get(word)
+                if weight is None:
+                    break
+                score += self.idf(word, idf) * weight
+            else:
+                if prefix is not None:
+                    best = max((self.idf(word, idf) * weight for word, weight in words.items() if word.startswith(prefix)), default=None)
+                    if best is None:
+                        continue
+                    score += best
+                yield -score, doc
+
+    def search_prefix(self, prefix, types, limit):
+        """ranks the documents holding a word starting with the prefix
+
+        The postings of every matching word are merged best first, so that only
+        the top of each one is read.
+
+        Returns:
+            list[tuple[float, tuple]]: (-score, doc), best first
+        """
+        idf = {}
+        streams = [self.stream(word, idf) for word in self.expand(prefix)]
+        ranked = []
+        seen = set()
+        for score, doc in heapq.merge(*streams):
+            if doc in seen or doc[0] not in types:
+                continue
+            # a document is ranked by its best matching word
+            seen.add(doc)
+            ranked.append((score, doc))
+            if len(ranked) == limit:
+                break
+        return ranked
+
+    def stream(self, word, idf):
+        """yields the (-score, doc) pairs of the postings of a word, best first"""
+        factor = self.idf(word, idf)
+        for weight, doc in self.ranked(word):
+            yield weight * factor, doc
+
+    def idf(self, word, cache):
+        value = cache.get(word)
+        if value is None:
+            value = cache[word] = math.log(1 + len(self.documents) / len(self.postings[word]))
+        return value
+
+    def ranked(self, word):
+        """the postings of a word as (-weight, doc) pairs, best first"""
+        ranked = self._ranked.get(word)
+        if ranked is None:
+            ranked = self._ranked[word] = sorted((-weight, doc) for doc, weight in self.postings[word].items())
+        return ranked
+
+    def expand(self, prefix):
+        """lists the indexed words starting with a prefix"""
+        start = bisect.bisect_left(self.words, prefix)
+        end = bisect.bisect_left(self.words, prefix + "\U0010ffff", start)
+        return self.words[start:end]
+
+    def sync(self):
+        """indexes the rows updated since the previous sync, the whole tables the first time"""
+        started = timezone.now()
+        since = self.synced_at
+        if since is not None:
+            since -= timedelta(seconds=settings.SEARCH_INDEX_OVERLAP)
+            ids = set(TaskTombstone.objects.filter(deleted_at__gte=since).values_list("task_id", flat=True))
+            if ids:
+                # tombstones are written for moved tasks too
+                ids -= set(Task.objects.filter(pk__in=ids).values_list("pk", flat=True))
+                for pk in ids:
+                    self.remove(("task", pk))
+
+        for kind, (model, fields) in SEARCH_FIELDS.items():
+            rows = model.objects.all() if since is None else model.objects.filter(updated_at__gte=since)
+            weights = list(fields.values())
+            for pk, updated_at, *texts in rows.values_list("id", "updated_at", *fields).iterator(chunk_size=SYNC_CHUNK_SIZE):
+                self.index((kind, pk), updated_at, zip(weights, texts))
+        if len(self.documents) > settings.SEARCH_INDEX_MAX_ROWS:
+            self.reset()
+            self.oversized = True
+            return
+        if self.synced_at is None:
+            self.words = sorted(self.postings)
+        self.synced_at = started
+
+    def index(self, doc, updated_at, texts):
+        """indexes a document, unless the indexed version is current
+
+        Args:
+            doc (tuple): (type, id)
+            updated_at (datetime): updated_at of the row
+            texts (iterable[tuple[int, str]]): (weight, text) of the searched columns
+        """
+        current = self.documents.get(doc)
+        if current is not None and current[0] == updated_at:
+            return
+        words = {}
+        for weight, text in texts:
+            for word in tokenize(text):
+                words[word] = words.get(word, 0) + weight
+        self.remove(doc)
+        self.documents[doc] = (updated_at, words)
+        for word, weight in words.items():
+            postings = self.postings.get(word)
+            if postings is None:
+                postings = self.postings[word] = {}
+                if self.synced_at is not None:
+                    bisect.insort(self.words, word)
+            postings[doc] = weight
+            self._ranked.pop(word, None)
+
+    def remove(self, doc):
+        current = self.documents.pop(doc, None)
+        if current is None:
+            return
+        for word in current[1]:
+            postings = self.postings[word]
+            del postings[doc]
+            self._ranked.pop(word, None)
+            if not postings:
+                del self.postings[word]
+                if self.synced_at is not None:
+                    del self.words[bisect.bisect_left(self.words, word)]
+
+    def discard(self, docs):
+        """removes documents whose rows were deleted
+
+        Args:
+            docs (iterable[tuple]): (type, id) pairs
+        """
+        with self._lock:
+            for doc in docs:
+                self.remove(doc)
+
+
+full_text_search = FullTextSearch()
+database_search = DatabaseSearch()
+inverted_index = InvertedIndex()
+
+
+def get_backend():
+    """returns the search backend of the database, see SEARCH_BACKEND"""
+    backend = settings.SEARCH_BACKEND
+    if backend == "auto":
+        backend = "fulltext" if connection.vendor == "mysql" else "index"
+    if backend == "fulltext":
+        return full_text_search
+    if backend == "database" or not inverted_index.fits():
+        return database_search
+    return inverted_index
+
+
+def warm_up():
+    """builds the inverted index when it is the search backend, see gunicorn.conf.py"""
+    if get_backend() is inverted_index:
+        inverted_index.warm()
+
+
+def serialize_hits(hits, context):
+    """serializes the rows of search hits, dropping the ones deleted since they were indexed
+
+    Args:
+        hits (list[tuple[float, str, int]]): (score, type, id) hits
+        context (dict): serializer context
+
+    Returns:
+        list[dict]: {"type", "score", "data"} results, tasks carry the public token of their list
+    """
+    ids = {}
+    for _, kind, pk in hits:
+        ids.setdefault(kind, []).append(pk)
+    rows = {}
+    if "task" in ids:
+        tasks = Task.objects.filter(pk__in=ids["task"]).select_related("list").prefetch_related(categories_by_id())
+        rows.update((("task", task.pk), task) for task in tasks)
+    if "list" in ids:
+        rows.update((("list", todo_list.pk), todo_list) for todo_list in List.objects.filter(pk__in=ids["list"]))
+    if "category" in ids:
+        rows.update((("category", category.pk), category) for category in Category.objects.filter(pk__in=ids["category"]))
+
+    serializers = {
+        "task": TaskSerializer(context=context),
+        "list": ListHeaderSerializer(context=context),
+        "category": CategorySerializer(context=context),
+    }
+    results = []
+    missing = []
+    for score, kind, pk in hits:
+        row = rows.get((kind, pk))
+        if row is None:
+            missing.append((kind, pk))
+            continue
+        result = {"type": kind, "score": round(score, 4), "data": serializers[kind].to_representation(row)}
+        if kind == "task":
+            result["list_token"] = row.list.public_token
+        results.append(result)
+    if missing:
+        get_backend().discard(missing)
+    return results
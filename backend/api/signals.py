@@ -0,0 +1,68 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from categories.models import Category
+from lists.models import List
+from tasks.models import Task
+from tasks.signals import tasks_bulk_saved
+from .cache import list_cache
+from .events import list_events
+
+
+@receiver([post_save, post_delete], sender=List)
+def list_changed(sender, instance, **kwargs):
+    list_cache.invalidate(tokens=[instance.public_token])
+    if kwargs["signal"] is post_save:
+        list_events.list_saved(instance)
+    else:
+        list_events.list_deleted(instance)
+
+
+def touched_list_ids(tasks):
+    """returns the lists holding the tasks, and the ones they were loaded from
+
+    Args:
+        tasks (iterable[Task]): written tasks
+
+    Returns:
+        set[int]: list ids
+    """
+    ids = set()
+    for task in tasks:
+        ids.add(task.list_id)
+        ids.add(getattr(task, "_loaded_values", {}).get("list_id", task.list_id))
+    return ids
+
+
+@receiver([post_save, post_delete], sender=Task)
+def task_changed(sender, instance, **kwargs):
+    list_cache.invalidate(list_ids=touched_list_ids([instance]))
+    if kwargs["signal"] is post_save:
+        list_events.task_saved([instance])
+    else:
+        list_events.task_deleted(instance)
+
+
+@receiver(tasks_bulk_saved, sender=Task)
+def tasks_bulk_changed(sender, tasks, **kwargs):
+    list_cache.invalidate(list_ids=touched_list_ids(tasks))
+    list_events.task_saved(tasks)
+
+
+@receiver(m2m_changed, sender=Task.categories.through)
+def task_categories_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith("post_"):
+            list_cache.invalidate(list_ids=[instance.list_id])
+            list_events.task_saved([instance])
+    elif action in ("post_add", "post_remove"):
+        list_cache.invalidate(list_ids=Task.objects.filter(pk__in=pk_set).values_list("list_id", flat=True))
+        list_events.task_ids_saved(pk_set)
+    elif action == "pre_clear":
+        list_cache.invalidate(list_ids=instance.tasks.values_list("list_id", flat=True))
+        list_events.task_ids_saved(instance.tasks.values_list("id", flat=True))
+
+
+@receiver([post_save, pre_delete], sender=Category)
+def category_changed(sender, instance, **kwargs):
+    list_cache.invalidate(list_ids=Task.objects.filter(categories=instance).values_list("list_id", flat=True))
+    list_events.category_changed(instance, deleted=kwargs["signal"] is pre_delete)
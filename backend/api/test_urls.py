@@ -0,0 +1,5 @@
+"""URLconf of the async read tests, API_ASYNC_READS is off under WSGI"""
+from django.urls import include, path
+from .urls import async_urlpatterns, router
+
+urlpatterns = [path("api/", include(async_urlpatterns + router.urls))]
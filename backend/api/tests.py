@@ -1,8 +1,31 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
 import pytest
 from lists.models import List
-from tasks.models import Task
+from tasks.models import DISPLAY_ORDER, Task, TaskTombstone, categories_by_id
+from tasks.serializers import TaskSerializer
 from categories.models import Category
-from datetime import datetime, timezone
+from lists.serializers import ListSerializer
+from core.serializers import serialize_values, values_plan
+from api.cache import list_cache
+from api.events import broker
+from api.export import keyset_batches
+from api.renderers import FastJSONRenderer
+from api.pagination import TaskPagination
+from api.search import inverted_index
+from api.views import ListViewSet
+from asgiref.sync import async_to_sync, sync_to_async
+from datetime import datetime, timedelta, timezone
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.utils import timezone as django_timezone
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
 
 ### TASKS ###
 
@@ -386,3 +409,1786 @@ def test_invalid_category_creation(api_client):
     response = api_client.post("/api/categories/", payload, format="json")
     assert response.status_code == 400
     assert "name" in response.json()
+
+### QUERY COUNTS ###
+
+def _populate(lists_count, tasks_per_list, category):
+    """creates lists holding tasks that all carry a category
+
+    Args:
+        lists_count (int): number of lists to create
+        tasks_per_list (int): number of tasks in each list
+        category (Category): category added to every task
+    """
+    for i in range(lists_count):
+        lst = List.objects.create(name = f"List {i}", description = "query count")
+        for j in range(tasks_per_list):
+            tsk = Task.objects.create(
+                name = f"Task {i}-{j}",
+                description = "query count",
+                due_at = datetime(2026, 1, 1, tzinfo=timezone.utc),
+                list = lst
+            )
+            tsk.categories.add(category)
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("lists_count, tasks_per_list", [(1, 1), (5, 20)])
+def test_task_listing_query_count(api_client, django_assert_num_queries, category, lists_count, tasks_per_list):
+    """tests listing tasks costs the same number of queries whatever the volume
+
+    Args:
+        api_client (APIClient): simulates http request
+        django_assert_num_queries (callable): query counting context manager
+        category (Category): a test category
+        lists_count (int): number of lists to create
+        tasks_per_list (int): number of tasks in each list
+    """
+    _populate(lists_count, tasks_per_list, category)
+
+    # validators, tasks, categories
+    with django_assert_num_queries(3):
+        response = api_client.get("/api/tasks/")
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == Task.objects.count()
+    assert all(category.id in tsk["categories"] for tsk in data)
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("lists_count, tasks_per_list", [(1, 1), (5, 20)])
+def test_list_listing_query_count(api_client, django_assert_num_queries, category, lists_count, tasks_per_list):
+    """tests listing lists with nested tasks costs a constant number of queries
+
+    Args:
+        api_client (APIClient): simulates http request
+        django_assert_num_queries (callable): query counting context manager
+        category (Category): a test category
+        lists_count (int): number of lists to create
+        tasks_per_list (int): number of tasks in each list
+    """
+    _populate(lists_count, tasks_per_list, category)
+
+    # validators, lists, tasks, categories
+    with django_assert_num_queries(4):
+        response = api_client.get("/api/lists/")
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == List.objects.count()
+    assert all(category.id in tsk["categories"] for lst in data for tsk in lst["tasks"])
+
+@pytest.mark.django_db
+def test_list_retrieve_query_count(api_client, django_assert_num_queries, todo_list, category):
+    """tests retrieving a list does not query categories once per task
+
+    Args:
+        api_client (APIClient): simulates http request
+        django_assert_num_queries (callable): query counting context manager
+        todo_list (List): a test list
+        category (Category): a test category
+    """
+    for i in range(10):
+        Task.objects.create(
+            name = f"Nested {i}",
+            description = "query count",
+            due_at = datetime(2026, 1, 1, tzinfo=timezone.utc),
+            list = todo_list
+        ).categories.add(category)
+
+    # validators, list, tasks, categories
+    with django_assert_num_queries(4):
+        response = api_client.get(f"/api/lists/{todo_list.public_token}/")
+    assert response.status_code == 200
+    assert len(response.json()["tasks"]) == 11
+
+### PAGINATION ###
+
+@pytest.mark.django_db
+def test_unpaginated_listing_stays_an_array(api_client, task):
+    """tests clients not asking for pages still receive a bare array
+
+    Args:
+        api_client (APIClient): simulates http request
+        task (Task): a test task
+    """
+    response = api_client.get("/api/tasks/")
+    assert response.status_code == 200
+    assert isinstance(response.json(), list)
+
+@pytest.mark.django_db
+def test_task_cursor_pagination(api_client, todo_list):
+    """tests tasks are paged forward and backward in display order
+
+    Args:
+        api_client (APIClient): simulates http request
+        todo_list (List): a test list
+    """
+    for i in range(7):
+        Task.objects.create(
+            name = f"Paged {i}",
+            description = "pagination",
+            priority = i % 3,
+            done = i % 2 == 0,
+            due_at = datetime(2026, 1, 1 + i % 2, tzinfo=timezone.utc),
+            list = todo_list
+        )
+    expected = list(
+        Task.objects.order_by("done", "-priority", "due_at", "id").values_list("name", flat=True)
+    )
+
+    names, pages = [], []
+    url = "/api/tasks/?page_size=3"
+    while url:
+        response = api_client.get(url)
+        assert response.status_code == 200
+        data = response.json()
+        pages.append(data)
+        names += [tsk["name"] for tsk in data["results"]]
+        url = data["next"]
+    assert names == expected
+    assert [len(page["results"]) for page in pages] == [3, 3, 1]
+    assert pages[0]["previous"] is None
+
+    response = api_client.get(pages[-1]["previous"])
+    assert [tsk["name"] for tsk in response.json()["results"]] == expected[3:6]
+
+@pytest.mark.django_db
+def test_list_cursor_pagination(api_client):
+    """tests lists are paged with their nested tasks
+
+    Args:
+        api_client (APIClient): simulates http request
+    """
+    for i in range(3):
+        List.objects.create(name = f"List {i}", description = "pagination")
+
+    response = api_client.get("/api/lists/?page_size=2")
+    data = response.json()
+    assert [lst["name"] for lst in data["results"]] == ["List 0", "List 1"]
+    assert "tasks" in data["results"][0]
+
+    data = api_client.get(data["next"]).json()
+    assert [lst["name"] for lst in data["results"]] == ["List 2"]
+    assert data["next"] is None
+
+@pytest.mark.django_db
+def test_page_size_is_capped(api_client, todo_list, settings):
+    """tests the requested page size cannot exceed the configured maximum
+
+    Args:
+        api_client (APIClient): simulates http request
+        todo_list (List): a test list
+        settings (SettingsWrapper): django settings override
+    """
+    settings.API_MAX_PAGE_SIZE = 2
+    for i in range(3):
+        Task.objects.create(
+            name = f"Capped {i}",
+            description = "pagination",
+            due_at = datetime(2026, 1, 1, tzinfo=timezone.utc),
+            list = todo_list
+        )
+
+    response = api_client.get("/api/tasks/?page_size=100")
+    assert len(response.json()["results"]) == 2
+
+@pytest.mark.django_db
+def test_invalid_cursor(api_client):
+    """tests a malformed cursor is rejected
+
+    Args:
+        api_client (APIClient): simulates http request
+    """
+    response = api_client.get("/api/tasks/?cursor=garbage")
+    assert response.status_code == 404
+
+### SUMMARY ###
+
+@pytest.mark.django_db
+def test_list_summary(api_client, django_assert_num_queries, todo_list):
+    """tests the summary view returns task counters in a single query
+
+    Args:
+        api_client (APIClient): simulates http request
+        django_assert_num_queries (callable): query counting context manager
+        todo_list (List): a test list
+    """
+    empty = List.objects.create(name = "Empty", description = "no tasks")
+    for i, (done, year) in enumerate([(True, 2000), (False, 2000), (False, 2999), (False, 2999)]):
+        Task.objects.create(
+            name = f"Counted {i}",
+            description = "summary",
+            done = done,
+            due_at = datetime(year, 1, 1, tzinfo=timezone.utc),
+            list = todo_list
+        )
+
+    with django_assert_num_queries(1):
+        response = api_client.get("/api/lists/?view=summary")
+    assert response.status_code == 200
+    data = {lst["public_token"]: lst for lst in response.json()}
+    assert "tasks" not in data[todo_list.public_token]
+    assert data[todo_list.public_token]["task_count"] == 4
+    assert data[todo_list.public_token]["done_count"] == 1
+    assert data[todo_list.public_token]["overdue_count"] == 1
+    assert data[empty.public_token]["task_count"] == 0
+
+@pytest.mark.django_db
+def test_list_summary_retrieve(api_client, task):
+    """tests a single list can be retrieved as a summary
+
+    Args:
+        api_client (APIClient): simulates http request
+        task (Task): a test task
+    """
+    response = api_client.get(f"/api/lists/{task.list.public_token}/?view=summary")
+    assert response.status_code == 200
+    assert response.json()["task_count"] == 1
+
+### FILTERS ###
+
+@pytest.fixture
+def filtered_tasks(todo_list, category):
+    """creates tasks spread over two lists to filter on
+
+    Args:
+        todo_list (List): a test list
+        category (Category): a test category
+
+    Returns:
+        dict: the created tasks by name
+    """
+    other = List.objects.create(name = "Other", description = "filters")
+    tasks = {}
+    for name, lst, done, priority, day in [
+        ("Open high", todo_list, False, 5, 1),
+        ("Open low", todo_list, False, 1, 10),
+        ("Done", todo_list, True, 3, 20),
+        ("Elsewhere", other, False, 5, 1),
+    ]:
+        tasks[name] = Task.objects.create(
+            name = name,
+            description = "filters",
+            done = done,
+            priority = priority,
+            due_at = datetime(2026, 2, day, tzinfo=timezone.utc),
+            list = lst
+        )
+    tasks["Child"] = Task.objects.create(
+        name = "Child",
+        description = "filters",
+        due_at = datetime(2026, 2, 1, tzinfo=timezone.utc),
+        list = todo_list,
+        parent = tasks["Open high"]
+    )
+    tasks["Open low"].categories.add(category)
+    return tasks
+
+def _names(response):
+    assert response.status_code == 200
+    return sorted(tsk["name"] for tsk in response.json())
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("query, expected", [
+    ("list_token=hashed_token&done=false", ["Child", "Open high", "Open low", "Test Task"]),
+    ("done=true", ["Done"]),
+    ("priority=5", ["Elsewhere", "Open high"]),
+    ("priority_min=2&priority_max=4&list_token=hashed_token", ["Child", "Done", "Test Task"]),
+    ("due_after=2026-02-05T00:00:00Z&due_before=2026-02-15T00:00:00Z", ["Open low"]),
+    ("parent=null&list_token=hashed_token&done=0", ["Open high", "Open low", "Test Task"]),
+])
+def test_task_filters(api_client, filtered_tasks, query, expected):
+    """tests tasks can be filtered server side
+
+    Args:
+        api_client (APIClient): simulates http request
+        filtered_tasks (dict): the tasks to filter
+        query (str): query string
+        expected (list[str]): names of the matching tasks
+    """
+    assert _names(api_client.get(f"/api/tasks/?{query}")) == expected
+
+@pytest.mark.django_db
+def test_task_filter_by_list_id_parent_and_category(api_client, filtered_tasks, todo_list, category):
+    """tests filters taking ids
+
+    Args:
+        api_client (APIClient): simulates http request
+        filtered_tasks (dict): the tasks to filter
+        todo_list (List): a test list
+        category (Category): a test category
+    """
+    assert "Elsewhere" not in _names(api_client.get(f"/api/tasks/?list={todo_list.id}"))
+    assert _names(api_client.get(f"/api/tasks/?parent={filtered_tasks['Open high'].id}")) == ["Child"]
+    assert _names(api_client.get(f"/api/tasks/?categories={category.id},999")) == ["Open low", "Test Task"]
+
+@pytest.mark.django_db
+def test_invalid_task_filters(api_client):
+    """tests malformed filters are rejected
+
+    Args:
+        api_client (APIClient): simulates http request
+    """
+    response = api_client.get("/api/tasks/?done=maybe&priority=high&due_after=tomorrow")
+    assert response.status_code == 400
+    assert set(response.json()) == {"done", "priority", "due_after"}
+
+@pytest.mark.django_db
+def test_list_nested_tasks(api_client, filtered_tasks, todo_list):
+    """tests the tasks of a list are served under the list route
+
+    Args:
+        api_client (APIClient): simulates http request
+        filtered_tasks (dict): the tasks to filter
+        todo_list (List): a test list
+    """
+    response = api_client.get(f"/api/lists/{todo_list.public_token}/tasks/?done=false")
+    assert response.status_code == 200
+    names = [tsk["name"] for tsk in response.json()]
+    assert names[0] == "Open high"
+    assert sorted(names) == ["Child", "Open high", "Open low", "Test Task"]
+
+    response = api_client.get(f"/api/lists/{todo_list.public_token}/tasks/?page_size=2")
+    assert len(response.json()["results"]) == 2
+
+    response = api_client.get("/api/lists/unknown/tasks/")
+    assert response.status_code == 404
+
+### BULK ###
+
+def _bulk_payload(todo_list, count, prefix="Bulk", categories=()):
+    """builds a bulk creation payload
+
+    Args:
+        todo_list (List): list the tasks belong to
+        count (int): number of tasks
+        prefix (str): task name prefix
+        categories (tuple[int]): category ids set on every task
+
+    Returns:
+        list[dict]: the payload
+    """
+    return [
+        {
+            "name": f"{prefix} {i}",
+            "description": "bulk",
+            "due_at": "2026-01-01T00:00:00Z",
+            "list": todo_list.id,
+            "categories": list(categories)
+        }
+        for i in range(count)
+    ]
+
+@pytest.mark.django_db
+def test_bulk_create_tasks(api_client, todo_list, category):
+    """tests many tasks are created with their categories
+
+    Args:
+        api_client (APIClient): simulates http request
+        todo_list (List): a test list
+        category (Category): a test category
+    """
+    response = api_client.post("/api/tasks/bulk/", _bulk_payload(todo_list, 3, categories=[category.id]), format="json")
+    assert response.status_code == 201
+    data = response.json()
+    assert [tsk["name"] for tsk in data] == ["Bulk 0", "Bulk 1", "Bulk 2"]
+    assert all(tsk["categories"] == [category.id] for tsk in data)
+    assert category.tasks.count() == 4
+    assert all(tsk.path == f"{tsk.id}/" for tsk in Task.objects.filter(name__startswith = "Bulk"))
+
+@pytest.mark.django_db
+def test_bulk_create_query_count_is_flat(api_client, todo_list, category):
+    """tests bulk creation does not issue queries per item
+
+    Args:
+        api_client (APIClient): simulates http request
+        todo_list (List): a test list
+        category (Category): a test category
+    """
+    counts = []
+    for prefix, count in (("Small", 2), ("Large", 60)):
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.post(
+                "/api/tasks/bulk/", _bulk_payload(todo_list, count, prefix, [category.id]), format="json"
+            )
+        assert response.status_code == 201
+        counts.append(len(queries))
+    assert counts[0] == counts[1]
+
+@pytest.mark.django_db
+def test_bulk_create_reports_errors_per_item(api_client, todo_list, task):
+    """tests invalid items are reported at their index and nothing is written
+
+    Args:
+        api_client (APIClient): simulates http request
+        todo_list (List): a test list
+        task (Task): a test task
+    """
+    payload = _bulk_payload(todo_list, 4)
+    payload[1]["name"] = task.name
+    payload[2]["list"] = 999
+    payload[3]["name"] = "Bulk 0"
+
+    response = api_client.post("/api/tasks/bulk/", payload, format="json")
+    assert response.status_code == 400
+    errors = response.json()
+    assert errors[0] == {}
+    assert "name" in errors[1]
+    assert "list" in errors[2]
+    assert "name" in errors[3]
+    assert Task.objects.count() == 1
+
+@pytest.mark.django_db
+def test_bulk_update_tasks(api_client, todo_list, task, category):
+    """tests many tasks are partially updated at once
+
+    Args:
+        api_client (APIClient): simulates http request
+        todo_list (List): a test list
+        task (Task): a test task
+        category (Category): a test category
+    """
+    other = Task.objects.create(
+        name = "Other",
+        description = "bulk",
+        due_at = datetime(2026, 1, 1, tzinfo=timezone.utc),
+        list = todo_list
+    )
+    before = other.updated_at
+    payload = [
+        {"id": task.id, "done": True, "categories": []},
+        {"id": other.id, "done": True, "name": "Renamed", "categories": [category.id]},
+    ]
+
+    response = api_client.patch("/api/tasks/bulk/", payload, format="json")
+    assert response.status_code == 200
+    assert [tsk["done"] for tsk in response.json()] == [True, True]
+    task.refresh_from_db()
+    other.refresh_from_db()
+    assert other.name == "Renamed"
+    assert other.updated_at > before
+    assert list(task.categories.all()) == []
+    assert list(other.categories.all()) == [category]
+
+@pytest.mark.django_db
+def test_bulk_update_unknown_task(api_client, task):
+    """tests updating an unknown task is reported at its index
+
+    Args:
+        api_client (APIClient): simulates http request
+        task (Task): a test task
+    """
+    payload = [{"id": task.id, "done": True}, {"id": 999, "done": True}]
+    response = api_client.patch("/api/tasks/bulk/", payload, format="json")
+    assert response.status_code == 400
+    assert response.json()[0] == {}
+    assert "id" in response.json()[1]
+    task.refresh_from_db()
+    assert task.done is False
+
+@pytest.mark.django_db
+def test_bulk_update_reparents_in_batch_order(api_client, todo_list):
+    """tests tasks moved under a task moved by an earlier item get the paths of the new tree
+
+    Args:
+        api_client (APIClient): simulates http request
+        todo_list (List): a test list
+    """
+    due_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    moved = Task.objects.create(name="Moved", description="bulk", due_at=due_at, list=todo_list)
+    target = Task.objects.create(name="Target", description="bulk", due_at=due_at, list=todo_list)
+    child = Task.objects.create(name="Child", description="bulk", due_at=due_at, list=todo_list)
+    leaf = Task.objects.create(name="Leaf", description="bulk", due_at=due_at, list=todo_list, parent=child)
+    payload = [
+        {"id": moved.id, "parent": target.id},
+        {"id": child.id, "parent": moved.id},
+    ]
+
+    response = api_client.patch("/api/tasks/bulk/", payload, format="json")
+    assert response.status_code == 200
+    leaf.refresh_from_db()
+    assert leaf.path == f"{target.id}/{moved.id}/{child.id}/{leaf.id}/"
+    assert set(target.descendants()) == {moved, child, leaf}
+
+    # the items are applied in their order, the child moved first
+    payload = [
+        {"id": child.id, "parent": target.id},
+        {"id": target.id, "parent": None},
+        {"id": moved.id, "parent": child.id},
+    ]
+    response = api_client.patch("/api/tasks/bulk/", payload, format="json")
+    assert response.status_code == 200
+    for tsk in (target, moved, child, leaf):
+        tsk.refresh_from_db()
+    assert [tsk.path for tsk in (child, moved, leaf)] == [
+        f"{target.id}/{child.id}/",
+        f"{target.id}/{child.id}/{moved.id}/",
+        f"{target.id}/{child.id}/{leaf.id}/",
+    ]
+
+@pytest.mark.django_db
+def test_bulk_update_rejects_cycles(api_client, todo_list):
+    """tests moves forming a cycle once the whole batch is applied are rejected
+
+    Args:
+        api_client (APIClient): simulates http request
+        todo_list (List): a test list
+    """
+    due_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    first = Task.objects.create(name="First", description="bulk", due_at=due_at, list=todo_list)
+    second = Task.objects.create(name="Second", description="bulk", due_at=due_at, list=todo_list)
+    child = Task.objects.create(name="Child", description="bulk", due_at=due_at, list=todo_list, parent=second)
+
+    payload = [{"id": first.id, "parent": second.id}, {"id": second.id, "parent": first.id}]
+    response = api_client.patch("/api/tasks/bulk/", payload, format="json")
+    assert response.status_code == 400
+    assert all("parent" in errors for errors in response.json())
+
+    # through a task the batch does not move
+    payload = [{"id": first.id, "parent": child.id}, {"id": second.id, "parent": first.id}, {"id": child.id, "done": True}]
+    response = api_client.patch("/api/tasks/bulk/", payload, format="json")
+    assert response.status_code == 400
+    assert [list(errors) for errors in response.json()] == [["parent"], ["parent"], []]
+    first.refresh_from_db()
+    second.refresh_from_db()
+    assert (first.parent_id, second.parent_id) == (None, None)
+    assert (first.path, second.path) == (f"{first.id}/", f"{second.id}/")
+
+@pytest.mark.django_db
+def test_bulk_delete_tasks(api_client, todo_list, task):
+    """tests many tasks are deleted at once
+
+    Args:
+        api_client (APIClient): simulates http request
+        todo_list (List): a test list
+        task (Task): a test task
+    """
+    other = Task.objects.create(
+        name = "Other",
+        description = "bulk",
+        due_at = datetime(2026, 1, 1, tzinfo=timezone.utc),
+        list = todo_list
+    )
+
+    response = api_client.delete("/api/tasks/bulk/", [task.id, 999], format="json")
+    assert response.status_code == 400
+    assert Task.objects.count() == 2
+
+    response = api_client.delete("/api/tasks/bulk/", [task.id, other.id], format="json")
+    assert response.status_code == 204
+    assert Task.objects.count() == 0
+    assert TaskTombstone.objects.filter(list = todo_list).count() == 2
+
+@pytest.mark.django_db
+def test_bulk_delete_writes_tombstones_at_once(api_client, django_assert_max_num_queries, todo_list):
+    """tests a bulk delete logs its tasks, cascaded subtasks included, without one insert per task
+
+    Args:
+        api_client (APIClient): simulates http request
+        django_assert_max_num_queries (callable): query counting context manager
+        todo_list (List): a test list
+    """
+    due_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    tasks = [
+        Task.objects.create(name = f"Doomed {n}", description = "bulk", due_at = due_at, list = todo_list)
+        for n in range(100)
+    ]
+    child = Task.objects.create(name = "Child", description = "bulk", due_at = due_at, list = todo_list, parent = tasks[0])
+
+    with django_assert_max_num_queries(15):
+        response = api_client.delete("/api/tasks/bulk/", [task.id for task in tasks], format="json")
+    assert response.status_code == 204
+    logged = set(TaskTombstone.objects.filter(list = todo_list).values_list("task_id", flat = True))
+    assert logged == {task.id for task in tasks} | {child.id}
+
+### CONDITIONAL REQUESTS ###
+
+@pytest.mark.django_db
+def test_list_not_modified(api_client, django_assert_num_queries, task):
+    """tests an unchanged list is answered with a 304 in a single query
+
+    Args:
+        api_client (APIClient): simulates http request
+        django_assert_num_queries (callable): query counting context manager
+        task (Task): a test task
+    """
+    url = f"/api/lists/{task.list.public_token}/"
+    response = api_client.get(url)
+    etag = response["ETag"]
+    assert response.has_header("Last-Modified")
+
+    with django_assert_num_queries(1):
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+
+    task.done = True
+    task.save()
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+@pytest.mark.django_db
+def test_list_etag_changes_on_task_delete(api_client, todo_list, task):
+    """tests deleting a task invalidates the list validators
+
+    Args:
+        api_client (APIClient): simulates http request
+        todo_list (List): a test list
+        task (Task): a test task
+    """
+    Task.objects.create(
+        name = "Old",
+        description = "conditional",
+        due_at = datetime(2026, 1, 1, tzinfo=timezone.utc),
+        list = todo_list
+    )
+    url = f"/api/lists/{todo_list.public_token}/"
+    etag = api_client.get(url)["ETag"]
+    Task.objects.filter(name = "Old").delete()
+    assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+@pytest.mark.django_db
+def test_task_routes_not_modified(api_client, task):
+    """tests task retrieve and filtered listing honour If-None-Match
+
+    Args:
+        api_client (APIClient): simulates http request
+        task (Task): a test task
+    """
+    for url in (f"/api/tasks/{task.id}/", "/api/tasks/?done=false"):
+        etag = api_client.get(url)["ETag"]
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    other = api_client.get("/api/tasks/?done=true")["ETag"]
+    assert other != api_client.get("/api/tasks/?done=false")["ETag"]
+
+@pytest.mark.django_db
+def test_expanded_categories_are_validated(api_client, django_capture_on_commit_callbacks, todo_list, task, category):
+    """tests responses embedding categories are not validated once a category changes
+
+    Args:
+        api_client (APIClient): simulates http request
+        django_capture_on_commit_callbacks (callable): runs on_commit callbacks
+        todo_list (List): a test list
+        task (Task): a test task
+        category (Category): a test category
+    """
+    urls = [
+        "/api/tasks/?expand=categories",
+        f"/api/tasks/{task.id}/?expand=categories",
+        f"/api/lists/{todo_list.public_token}/?expand=tasks.categories",
+    ]
+    etags = {url: api_client.get(url)["ETag"] for url in urls}
+    plain = api_client.get("/api/tasks/")["ETag"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        category.name = "Renamed"
+        category.save()
+    for url in urls:
+        response = api_client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+        assert response.status_code == 200
+        assert "Renamed" in response.content.decode()
+        etags[url] = response["ETag"]
+    assert api_client.get("/api/tasks/", HTTP_IF_NONE_MATCH=plain).status_code == 304
+
+    # an unlinked category leaves the tasks
+    Category.objects.create(name="Other", description="", color="#000000").tasks.add(task)
+    etags = {url: api_client.get(url)["ETag"] for url in urls}
+    with django_capture_on_commit_callbacks(execute=True):
+        Category.objects.filter(name="Other").delete()
+    for url in urls:
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=etags[url]).status_code == 200
+
+@pytest.mark.django_db
+def test_if_match_rejects_lost_update(api_client, task):
+    """tests a write based on a stale copy is refused
+
+    Args:
+        api_client (APIClient): simulates http request
+        task (Task): a test task
+    """
+    url = f"/api/tasks/{task.id}/"
+    etag = api_client.get(url)["ETag"]
+
+    response = api_client.patch(url, {"done": True}, format="json", HTTP_IF_MATCH=etag)
+    assert response.status_code == 200
+    fresh = response["ETag"]
+    assert fresh != etag
+
+    response = api_client.patch(url, {"done": False}, format="json", HTTP_IF_MATCH=etag)
+    assert response.status_code == 412
+    task.refresh_from_db()
+    assert task.done is True
+
+    assert api_client.delete(url, HTTP_IF_MATCH=fresh).status_code == 204
+
+### LIST CACHE ###
+
+@pytest.mark.django_db
+def test_list_payload_is_cached(api_client, django_assert_num_queries, task):
+    """tests a repeated retrieve is served from the cache
+
+    Args:
+        api_client (APIClient): simulates http request
+        django_assert_num_queries (callable): query counting context manager
+        task (Task): a test task
+    """
+    url = f"/api/lists/{task.list.public_token}/"
+    before = list_cache.stats()
+    first = api_client.get(url)
+    assert first["X-Cache"] == "MISS"
+
+    # validators only
+    with django_assert_num_queries(1):
+        second = api_client.get(url)
+    assert second["X-Cache"] == "HIT"
+    assert second.json() == first.json()
+    assert list_cache.stats()["hits"] == before["hits"] + 1
+    assert list_cache.stats()["misses"] == before["misses"] + 1
+
+@pytest.mark.django_db
+def test_list_cache_is_versioned_by_writes(api_client, django_capture_on_commit_callbacks, todo_list, task, category):
+    """tests task, list and category writes make the cached payload stale
+
+    Args:
+        api_client (APIClient): simulates http request
+        django_capture_on_commit_callbacks (callable): runs on_commit callbacks
+        todo_list (List): a test list
+        task (Task): a test task
+        category (Category): a test category
+    """
+    url = f"/api/lists/{todo_list.public_token}/"
+    writes = [
+        lambda: api_client.patch(f"/api/tasks/{task.id}/", {"done": True}, format="json"),
+        lambda: api_client.patch(url, {"name": "Renamed"}, format="json"),
+        lambda: category.delete(),
+        lambda: api_client.post("/api/tasks/bulk/", [{
+            "name": "Bulk", "description": "cache", "due_at": "2026-01-01T00:00:00Z", "list": todo_list.id
+        }], format="json"),
+        lambda: api_client.delete(f"/api/tasks/{task.id}/"),
+    ]
+    for write in writes:
+        api_client.get(url)
+        assert api_client.get(url)["X-Cache"] == "HIT"
+        with django_capture_on_commit_callbacks(execute=True):
+            write()
+        response = api_client.get(url)
+        assert response["X-Cache"] == "MISS"
+
+    data = response.json()
+    assert data["name"] == "Renamed"
+    assert [tsk["name"] for tsk in data["tasks"]] == ["Bulk"]
+
+@pytest.mark.django_db
+def test_list_cache_follows_moved_tasks(api_client, django_capture_on_commit_callbacks, todo_list, task):
+    """tests moving a task to another list refreshes the list it left
+
+    Args:
+        api_client (APIClient): simulates http request
+        django_capture_on_commit_callbacks (callable): runs on_commit callbacks
+        todo_list (List): a test list
+        task (Task): a test task
+    """
+    other = List.objects.create(name = "Other", description = "cache")
+    url = f"/api/lists/{todo_list.public_token}/"
+    api_client.get(url)
+    with django_capture_on_commit_callbacks(execute=True):
+        api_client.patch(f"/api/tasks/{task.id}/", {"list": other.id}, format="json")
+    assert api_client.get(url).json()["tasks"] == []
+
+### SUBTASK TREES ###
+
+@pytest.fixture
+def task_chain(todo_list):
+    """creates a root task with two children, the first one having a chain of descendants
+
+    Args:
+        todo_list (List): a test list
+
+    Returns:
+        list[Task]: root, child, grandchild, great grandchild, second child
+    """
+    due_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    chain = [Task.objects.create(name = "Root", description = "tree", due_at = due_at, list = todo_list)]
+    for level, name in enumerate(["Child", "Grandchild", "Great grandchild"], start=1):
+        chain.append(Task.objects.create(
+            name = name, description = "tree", level = level, priority = 5, due_at = due_at,
+            list = todo_list, parent = chain[-1]
+        ))
+    chain.append(Task.objects.create(
+        name = "Second child", description = "tree", level = 1, due_at = due_at, list = todo_list, parent = chain[0]
+    ))
+    return chain
+
+def _shape(node):
+    return {node["name"]: [_shape(child) for child in node["subtasks"]]}
+
+@pytest.mark.django_db
+def test_task_tree(api_client, django_assert_num_queries, task_chain):
+    """tests a task is returned with its whole hierarchy in a fixed number of queries
+
+    Args:
+        api_client (APIClient): simulates http request
+        django_assert_num_queries (callable): query counting context manager
+        task_chain (list[Task]): a task hierarchy
+    """
+    # root, subtree range scan, categories
+    with django_assert_num_queries(3):
+        response = api_client.get(f"/api/tasks/{task_chain[0].id}/tree/")
+    assert response.status_code == 200
+    assert _shape(response.json()) == {
+        "Root": [{"Child": [{"Grandchild": [{"Great grandchild": []}]}]}, {"Second child": []}]
+    }
+
+    response = api_client.get(f"/api/tasks/{task_chain[1].id}/tree/?depth=1")
+    assert _shape(response.json()) == {"Child": [{"Grandchild": []}]}
+
+    assert api_client.get("/api/tasks/999/tree/").status_code == 404
+
+@pytest.mark.django_db
+def test_task_tree_depth_cap(api_client, task_chain, settings):
+    """tests the configured depth cap cannot be exceeded
+
+    Args:
+        api_client (APIClient): simulates http request
+        task_chain (list[Task]): a task hierarchy
+        settings (SettingsWrapper): django settings override
+    """
+    settings.TASK_TREE_MAX_DEPTH = 1
+    response = api_client.get(f"/api/tasks/{task_chain[0].id}/tree/?depth=10")
+    assert _shape(response.json()) == {"Root": [{"Child": []}, {"Second child": []}]}
+    assert api_client.get(f"/api/tasks/{task_chain[0].id}/tree/?depth=deep").status_code == 400
+
+@pytest.mark.django_db
+def test_nested_list_retrieve(api_client, task, task_chain):
+    """tests ?nested=1 nests subtasks under their parents in the list payload
+
+    Args:
+        api_client (APIClient): simulates http request
+        task (Task): a test task
+        task_chain (list[Task]): a task hierarchy
+    """
+    url = f"/api/lists/{task.list.public_token}/"
+    assert len(api_client.get(url).json()["tasks"]) == 6
+
+    tasks = api_client.get(f"{url}?nested=1").json()["tasks"]
+    assert sorted(tsk["name"] for tsk in tasks) == ["Root", "Test Task"]
+    root = next(tsk for tsk in tasks if tsk["name"] == "Root")
+    assert _shape(root)["Root"][0] == {"Child": [{"Grandchild": [{"Great grandchild": []}]}]}
+
+@pytest.mark.django_db
+def test_complete_subtree(api_client, django_capture_on_commit_callbacks, task, task_chain):
+    """tests a task and its subtasks are marked done at once
+
+    Args:
+        api_client (APIClient): simulates http request
+        django_capture_on_commit_callbacks (callable): runs on_commit callbacks
+        task (Task): a test task, outside the hierarchy
+        task_chain (list[Task]): a task hierarchy
+    """
+    url = f"/api/lists/{task.list.public_token}/"
+    api_client.get(url)
+    with django_capture_on_commit_callbacks(execute=True):
+        response = api_client.post(f"/api/tasks/{task_chain[1].id}/complete/")
+    assert response.status_code == 200
+    assert response.json() == {"updated": 3}
+    done = {tsk["name"] for tsk in api_client.get(url).json()["tasks"] if tsk["done"]}
+    assert done == {"Child", "Grandchild", "Great grandchild"}
+
+    response = api_client.post(f"/api/tasks/{task_chain[0].id}/complete/", {"done": False}, format="json")
+    assert response.json() == {"updated": 5}
+    assert not Task.objects.filter(done = True).exists()
+
+@pytest.mark.django_db
+def test_cannot_reparent_under_descendant(api_client, task_chain):
+    """tests a task cannot become a subtask of its own subtree
+
+    Args:
+        api_client (APIClient): simulates http request
+        task_chain (list[Task]): a task hierarchy
+    """
+    response = api_client.patch(f"/api/tasks/{task_chain[0].id}/", {"parent": task_chain[2].id}, format="json")
+    assert response.status_code == 400
+    assert "parent" in response.json()
+
+### EXPORT ###
+
+@pytest.mark.django_db
+def test_export_json_matches_retrieve(api_client, task, task_chain, category):
+    """tests the streamed json export holds the same data as the list payload
+
+    Args:
+        api_client (APIClient): simulates http request
+        task (Task): a test task
+        task_chain (list[Task]): a task hierarchy
+        category (Category): a test category
+    """
+    url = f"/api/lists/{task.list.public_token}/"
+    response = api_client.get(f"{url}export/")
+    assert response.status_code == 200
+    assert response.streaming
+    assert response["Content-Type"].startswith("application/json")
+    exported = json.loads(b"".join(response.streaming_content))
+    assert exported == api_client.get(url).json()
+
+@pytest.mark.django_db
+def test_export_json_lines_and_csv(api_client, task, category):
+    """tests tasks can be exported as json lines and csv
+
+    Args:
+        api_client (APIClient): simulates http request
+        task (Task): a test task
+        category (Category): a test category
+    """
+    url = f"/api/lists/{task.list.public_token}/export/"
+    response = api_client.get(f"{url}?format=jsonl")
+    assert response["Content-Type"].startswith("application/x-ndjson")
+    lines = b"".join(response.streaming_content).decode().splitlines()
+    assert [json.loads(line)["name"] for line in lines] == ["Test Task"]
+
+    response = api_client.get(url, HTTP_ACCEPT="text/csv")
+    assert response["Content-Type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(b"".join(response.streaming_content).decode())))
+    assert rows[0]["name"] == "Test Task"
+    assert rows[0]["categories"] == str(category.id)
+
+    assert api_client.get("/api/lists/unknown/export/").status_code == 404
+
+@pytest.mark.django_db
+def test_export_empty_list(api_client, todo_list):
+    """tests a list without tasks exports an empty array
+
+    Args:
+        api_client (APIClient): simulates http request
+        todo_list (List): a test list
+    """
+    response = api_client.get(f"/api/lists/{todo_list.public_token}/export/")
+    assert json.loads(b"".join(response.streaming_content))["tasks"] == []
+
+@pytest.mark.django_db
+def test_export_reads_keyset_batches(django_assert_num_queries, todo_list):
+    """tests exported rows are read one bounded query at a time, in display order
+
+    Args:
+        django_assert_num_queries (callable): query counting context manager
+        todo_list (List): a test list
+    """
+    due_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for index in range(5):
+        Task.objects.create(name=f"Export {index}", description="", priority=index % 2, done=index == 2, due_at=due_at, list=todo_list)
+    expected = list(Task.objects.order_by(*DISPLAY_ORDER))
+
+    with django_assert_num_queries(3):
+        rows = list(keyset_batches(Task.objects.all(), TaskPagination(), size=2))
+    assert rows == expected
+
+### IMPORT ###
+
+def _upload(name, content):
+    return SimpleUploadedFile(name, content.encode(), content_type="application/octet-stream")
+
+@pytest.mark.django_db
+def test_import_json_lines(api_client, todo_list, category):
+    """tests tasks are imported from json lines, invalid rows being reported
+
+    Args:
+        api_client (APIClient): simulates http request
+        todo_list (List): a test list
+        category (Category): a test category
+    """
+    content = "\n".join([
+        json.dumps({"name": "Imported", "description": "jsonl", "due_at": "2026-01-01T00:00:00Z", "categories": [category.name]}),
+        "",
+        "{broken",
+        json.dumps({"description": "no name", "due_at": "2026-01-01T00:00:00Z"}),
+        json.dumps({"name": "Unknown category", "description": "jsonl", "due_at": "2026-01-01T00:00:00Z", "categories": ["Nope"]}),
+        json.dumps({"name": "Imported", "description": "duplicate", "due_at": "2026-01-01T00:00:00Z"}),
+    ])
+    response = api_client.post(
+        f"/api/lists/{todo_list.public_token}/import/", {"file": _upload("tasks.jsonl", content)}, format="multipart"
+    )
+    assert response.status_code == 201
+    report = response.json()
+    assert report["created"] == 1
+    # rows are numbered by file line, blank lines included
+    assert [error["row"] for error in report["errors"]] == [3, 4, 5, 6]
+    assert "name" in report["errors"][1]["errors"]
+    assert "categories" in report["errors"][2]["errors"]
+    imported = Task.objects.get(name = "Imported")
+    assert imported.list == todo_list
+    assert list(imported.categories.all()) == [category]
+
+@pytest.mark.django_db
+def test_import_csv_dry_run(api_client, todo_list, category):
+    """tests a csv dry run validates the rows without writing them
+
+    Args:
+        api_client (APIClient): simulates http request
+        todo_list (List): a test list
+        category (Category): a test category
+    """
+    content = (
+        "name,description,priority,done,due_at,categories,parent\n"
+        f"First,csv,5,True,2026-01-01T00:00:00Z,{category.name},\n"
+        f"Second,csv,,,2026-01-02T00:00:00Z,{category.id},\n"
+    )
+    url = f"/api/lists/{todo_list.public_token}/import/"
+    response = api_client.post(f"{url}?dry_run=1", {"file": _upload("tasks.csv", content)}, format="multipart")
+    assert response.status_code == 200
+    assert response.json()["created"] == 2
+    assert not Task.objects.filter(description = "csv").exists()
+
+    response = api_client.post(url, {"file": _upload("tasks.csv", content)}, format="multipart")
+    assert response.status_code == 201
+    first, second = Task.objects.filter(description = "csv").order_by("name")
+    assert first.done is True and first.priority == 5
+    assert second.priority == 3
+    assert list(second.categories.all()) == [category]
+
+@pytest.mark.django_db
+def test_import_csv_reports_file_lines(api_client, todo_list):
+    """tests csv errors carry the file line of their row, quoted line breaks included
+
+    Args:
+        api_client (APIClient): simulates http request
+        todo_list (List): a test list
+    """
+    content = (
+        "name,description,due_at\n"
+        '"Multi","line\nbreak",2026-01-01T00:00:00Z\n'
+        "Broken,csv,not a date\n"
+    )
+    response = api_client.post(
+        f"/api/lists/{todo_list.public_token}/import/", {"file": _upload("tasks.csv", content)}, format="multipart"
+    )
+    report = response.json()
+    assert report["created"] == 1
+    assert [error["row"] for error in report["errors"]] == [4]
+
+@pytest.mark.django_db
+def test_import_json_array(api_client, todo_list):
+    """tests a .json file is read as an array of objects, errors carrying the line of their item
+
+    Args:
+        api_client (APIClient): simulates http request
+        todo_list (List): a test list
+    """
+    url = f"/api/lists/{todo_list.public_token}/import/"
+    content = "[\n" + ",\n".join([
+        json.dumps({"name": "First", "description": "json", "due_at": "2026-01-01T00:00:00Z"}),
+        json.dumps({"name": "Second", "description": "json", "due_at": "2026-01-01T00:00:00Z"}, indent=2),
+        json.dumps({"description": "no name", "due_at": "2026-01-01T00:00:00Z"}),
+        "42",
+    ]) + "\n]\n"
+    report = api_client.post(url, {"file": _upload("tasks.json", content)}, format="multipart").json()
+    assert report["created"] == 2
+    errors = {error["row"]: error["errors"] for error in report["errors"]}
+    assert sorted(errors) == [8, 9]
+    assert "name" in errors[8]
+    assert errors[9] == {"non_field_errors": ["Expected a JSON object."]}
+
+    report = api_client.post(url, {"file": _upload("tasks.json", '{"tasks": []}')}, format="multipart").json()
+    assert report["errors"] == [{"row": 1, "errors": {"non_field_errors": ["Expected a JSON array of objects."]}}]
+    report = api_client.post(url, {"file": _upload("tasks.json", '[{"name": "Third"}\n{"name": "Fourth"}]')}, format="multipart").json()
+    assert sorted(error["row"] for error in report["errors"]) == [1, 2]
+
+@pytest.mark.django_db
+def test_import_rejects_unknown_format(api_client, todo_list):
+    """tests files that are neither json lines nor csv are refused
+
+    Args:
+        api_client (APIClient): simulates http request
+        todo_list (List): a test list
+    """
+    url = f"/api/lists/{todo_list.public_token}/import/"
+    response = api_client.post(url, {"file": _upload("tasks.xlsx", "")}, format="multipart")
+    assert response.status_code == 400
+    assert "format" in response.json()
+    assert api_client.post(url, {}, format="multipart").status_code == 400
+
+### ASYNC READS ###
+
+@pytest.mark.django_db
+@pytest.mark.urls("api.test_urls")
+def test_async_reads_match_viewsets(api_client, async_client, task, task_chain, category):
+    """tests the async read paths render the payloads of the DRF viewsets
+
+    Args:
+        api_client (APIClient): simulates http request
+        async_client (AsyncClient): simulates http request against async views
+        task (Task): a test task
+        task_chain (list[Task]): nested test tasks
+        category (Category): a test category
+    """
+    for url in ("/api/tasks/", f"/api/lists/{task.list.public_token}/", "/api/categories/", "/api/tasks/?done=false&parent=null"):
+        response = async_to_sync(async_client.get)(url)
+        assert response.status_code == 200
+        # DRF views answer with an Allow header, async paths do not
+        assert "Allow" not in response
+        separator = "&" if "?" in url else "?"
+        drf = api_client.get(f"{url}{separator}format=json")
+        assert "Allow" in drf
+        assert response.content == drf.content
+        assert response["Content-Type"] == drf["Content-Type"]
+
+@pytest.mark.django_db
+@pytest.mark.urls("api.test_urls")
+def test_async_list_retrieve_is_conditional_and_cached(async_client, django_assert_num_queries, task):
+    """tests the async list retrieve shares validators and cache with the viewset
+
+    Args:
+        async_client (AsyncClient): simulates http request against async views
+        django_assert_num_queries (callable): query counting context manager
+        task (Task): a test task
+    """
+    get = async_to_sync(async_client.get)
+    url = f"/api/lists/{task.list.public_token}/"
+    with django_assert_num_queries(4):
+        first = get(url)
+    assert first["X-Cache"] == "MISS"
+    with django_assert_num_queries(1):
+        second = get(url)
+    assert second["X-Cache"] == "HIT"
+    assert second.json() == first.json()
+    assert get(url, headers={"If-None-Match": first["ETag"]}).status_code == 304
+
+@pytest.mark.django_db
+@pytest.mark.urls("api.test_urls")
+def test_async_reads_fall_back_to_viewsets(async_client, todo_list, task):
+    """tests requests the async paths do not cover are served by the viewsets
+
+    Args:
+        async_client (AsyncClient): simulates http request against async views
+        todo_list (List): a test list
+        task (Task): a test task
+    """
+    get = async_to_sync(async_client.get)
+    assert "results" in get("/api/tasks/?page_size=1").json()
+    assert get("/api/tasks/?done=maybe").status_code == 400
+    assert get("/api/lists/unknown/").status_code == 404
+    assert get(f"/api/lists/{todo_list.public_token}/?view=summary").json()["task_count"] == 1
+    assert "text/html" in get("/api/categories/", headers={"Accept": "text/html"})["Content-Type"]
+
+    response = async_to_sync(async_client.post)("/api/tasks/", {
+        "name": "Async", "description": "fallback", "due_at": "2026-01-01T00:00:00Z", "list": todo_list.id
+    }, content_type="application/json")
+    assert response.status_code == 201
+    assert [tsk["name"] for tsk in get("/api/tasks/?priority=3").json()] == ["Async"]
+
+### LIST EVENTS ###
+
+@pytest.mark.django_db
+def test_list_events_stream(async_client, django_capture_on_commit_callbacks, todo_list, task, category):
+    """tests list changes are pushed to the event stream of the list
+
+    Args:
+        async_client (AsyncClient): simulates http request against async views
+        django_capture_on_commit_callbacks (callable): runs on_commit callbacks
+        todo_list (List): a test list
+        task (Task): a test task
+        category (Category): a test category
+    """
+    other = List.objects.create(public_token = "other_token", name = "Other", description = "events")
+    category_id = category.id
+
+    def write():
+        with django_capture_on_commit_callbacks(execute=True):
+            task.done = True
+            task.save()
+        with django_capture_on_commit_callbacks(execute=True):
+            Task.objects.create(name = "Elsewhere", description = "events", due_at = task.due_at, list = other)
+        with django_capture_on_commit_callbacks(execute=True):
+            category.delete()
+        with django_capture_on_commit_callbacks(execute=True):
+            moved = Task.objects.get(pk = task.pk)
+            moved.list = other
+            moved.save()
+        with django_capture_on_commit_callbacks(execute=True):
+            todo_list.name = "Renamed"
+            todo_list.save()
+
+    async def scenario():
+        response = await async_client.get(f"/api/lists/{todo_list.public_token}/events/")
+        assert response["Content-Type"] == "text/event-stream"
+        stream = response.streaming_content
+        assert await anext(stream) == b"retry: 3000\n\n"
+        await sync_to_async(write)()
+        events = []
+        while len(events) < 4:
+            chunk = (await anext(stream)).decode()
+            fields = dict(line.split(": ", 1) for line in chunk.splitlines() if line)
+            events.append((fields["event"], json.loads(fields["data"])))
+        await stream.aclose()
+        return events
+
+    events = async_to_sync(scenario)()
+    assert events[0][0] == "task.saved" and events[0][1]["done"] is True
+    assert events[1] == ("category.deleted", {"id": category_id})
+    assert events[2] == ("task.deleted", {"id": task.id})
+    assert events[3][0] == "list.saved" and events[3][1]["name"] == "Renamed"
+    assert broker.idle
+
+@pytest.mark.django_db(transaction=True)
+def test_list_events_published_in_autocommit(api_client, todo_list, task):
+    """tests writes outside of a transaction publish their events once recorded
+
+    Args:
+        api_client (APIClient): simulates http request
+        todo_list (List): a test list
+        task (Task): a test task
+    """
+    async def scenario():
+        subscription = broker.subscribe(todo_list.public_token)
+        try:
+            response = await sync_to_async(api_client.patch)(f"/api/tasks/{task.id}/", {"done": True}, format="json")
+            assert response.status_code == 200
+            response = await sync_to_async(api_client.patch)(f"/api/lists/{todo_list.public_token}/", {"name": "Renamed"}, format="json")
+            assert response.status_code == 200
+            return [await asyncio.wait_for(subscription.get(), 1) for _ in range(2)]
+        finally:
+            subscription.close()
+
+    events = async_to_sync(scenario)()
+    assert [event["type"] for event in events] == ["task.saved", "list.saved"]
+    assert events[0]["data"]["done"] is True
+    assert events[1]["data"]["name"] == "Renamed"
+
+@pytest.mark.django_db
+def test_list_events_errors(api_client, async_client, todo_list):
+    """tests unknown lists and WSGI requests get no stream
+
+    Args:
+        api_client (APIClient): simulates http request
+        async_client (AsyncClient): simulates http request against async views
+        todo_list (List): a test list
+    """
+    assert async_to_sync(async_client.get)("/api/lists/unknown/events/").status_code == 404
+    assert api_client.get(f"/api/lists/{todo_list.public_token}/events/").status_code == 501
+
+### CHANGE FEED ###
+
+@pytest.mark.django_db
+def test_list_changes_since_cursor(api_client, django_assert_num_queries, settings, todo_list, task, category):
+    """tests the change feed returns what changed since the cursor only
+
+    Args:
+        api_client (APIClient): simulates http request
+        django_assert_num_queries (callable): query counting context manager
+        settings (SettingsWrapper): django settings
+        todo_list (List): a test list
+        task (Task): a test task
+        category (Category): a test category
+    """
+    settings.LIST_CHANGES_OVERLAP = 0
+    url = f"/api/lists/{todo_list.public_token}/changes/"
+    kept, removed, moved = (
+        Task.objects.create(name = name, description = "changes", due_at = task.due_at, list = todo_list)
+        for name in ("Kept", "Removed", "Moved")
+    )
+    full = api_client.get(url).json()
+    assert full["list"]["name"] == "Test list"
+    assert {tsk["name"] for tsk in full["tasks"]} == {"Test Task", "Kept", "Removed", "Moved"}
+    assert full["deleted"] == []
+
+    other = List.objects.create(name = "Other", description = "changes")
+    api_client.patch(f"/api/tasks/{task.id}/", {"done": True}, format="json")
+    api_client.delete(f"/api/tasks/{removed.id}/")
+    api_client.patch(f"/api/tasks/{moved.id}/", {"list": other.id}, format="json")
+    kept.categories.add(category)
+
+    with django_assert_num_queries(4):
+        response = api_client.get(url, {"since": full["cursor"]})
+    changes = response.json()
+    assert changes["list"] is None
+    assert {tsk["name"] for tsk in changes["tasks"]} == {"Test Task", "Kept"}
+    assert changes["deleted"] == sorted([removed.id, moved.id])
+
+    assert api_client.get(url, {"since": changes["cursor"]}).json()["tasks"] == []
+
+@pytest.mark.django_db
+def test_list_changes_rejects_bad_cursors(api_client, todo_list):
+    """tests invalid and expired cursors
+
+    Args:
+        api_client (APIClient): simulates http request
+        todo_list (List): a test list
+    """
+    url = f"/api/lists/{todo_list.public_token}/changes/"
+    assert api_client.get(url, {"since": "yesterday"}).status_code == 400
+    assert api_client.get(url, {"since": "2000-01-01T00:00:00Z"}).status_code == 410
+    assert api_client.get("/api/lists/unknown/changes/").status_code == 404
+
+### SPARSE FIELDSETS ###
+
+@pytest.mark.django_db
+def test_sparse_fields_trim_payload_and_columns(api_client, task, category):
+    """tests ?fields= selects the serialized fields and the loaded columns
+
+    Args:
+        api_client (APIClient): simulates http request
+        task (Task): a test task
+        category (Category): a test category
+    """
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.get("/api/tasks/", {"fields": "id,name,done"})
+    assert response.json() == [{"id": task.id, "name": "Test Task", "done": False}]
+    task_query = next(query["sql"] for query in queries if 'FROM "tasks_task"' in query["sql"] and "MAX" not in query["sql"])
+    assert '"description"' not in task_query and '"name"' in task_query
+
+    assert api_client.get("/api/categories/", {"fields": "name,color"}).json() == [{"name": "Test Category", "color": "#00ff99"}]
+    assert api_client.get("/api/tasks/", {"fields": "id,unknown"}).status_code == 400
+
+    # writes ignore the selection
+    response = api_client.patch(f"/api/tasks/{task.id}/?fields=id", {"done": True}, format="json")
+    assert response.json()["done"] is True
+    task.refresh_from_db()
+    assert task.done is True
+
+@pytest.mark.django_db
+def test_sparse_fields_on_lists(api_client, django_assert_num_queries, todo_list, task):
+    """tests ?fields= on lists, with dotted paths for their tasks
+
+    Args:
+        api_client (APIClient): simulates http request
+        django_assert_num_queries (callable): query counting context manager
+        todo_list (List): a test list
+        task (Task): a test task
+    """
+    # validators and the list, no task is loaded
+    with django_assert_num_queries(2):
+        response = api_client.get("/api/lists/", {"fields": "public_token,name"})
+    assert response.json() == [{"public_token": todo_list.public_token, "name": "Test list"}]
+
+    response = api_client.get(f"/api/lists/{todo_list.public_token}/", {"fields": "name,tasks.id,tasks.done"})
+    assert response.json() == {"name": "Test list", "tasks": [{"id": task.id, "done": False}]}
+
+@pytest.mark.django_db
+def test_expand_categories(api_client, todo_list, task, category):
+    """tests ?expand=categories inlines category objects
+
+    Args:
+        api_client (APIClient): simulates http request
+        todo_list (List): a test list
+        task (Task): a test task
+        category (Category): a test category
+    """
+    expanded = api_client.get(f"/api/tasks/{task.id}/", {"expand": "categories"}).json()["categories"]
+    assert expanded == [api_client.get(f"/api/categories/{category.id}/").json()]
+
+    response = api_client.get(f"/api/lists/{todo_list.public_token}/", {
+        "fields": "tasks.name,tasks.categories.name", "expand": "categories"
+    })
+    assert response.json() == {"tasks": [{"name": "Test Task", "categories": [{"name": "Test Category"}]}]}
+    assert api_client.get(f"/api/lists/{todo_list.public_token}/").json()["tasks"][0]["categories"] == [category.id]
+
+### FAST SERIALIZATION ###
+
+@pytest.mark.django_db
+def test_fast_serialization_matches_drf(api_client, todo_list, task, task_chain, category):
+    """tests the values path and the orjson renderer produce the bytes of DRF
+
+    Args:
+        api_client (APIClient): simulates http request
+        todo_list (List): a test list
+        task (Task): a test task
+        task_chain (list[Task]): nested test tasks
+        category (Category): a test category
+    """
+    other = Category.objects.create(name="Other", description="Second", color="#123456")
+    task.description = "line\u2028separator, café \U0001f600"
+    task.due_at = datetime(2026, 3, 1, 8, 30, 15, 123456, tzinfo=timezone.utc)
+    task.save()
+    task.categories.set([other, category])
+    task_chain[1].categories.set([category])
+
+    tasks = Task.objects.filter(list=todo_list).order_by(*DISPLAY_ORDER)
+    serializer = TaskSerializer()
+    expected = TaskSerializer(tasks.prefetch_related(categories_by_id()), many=True).data
+    assert serialize_values(serializer, tasks) == expected
+    assert FastJSONRenderer().render(expected) == JSONRenderer().render(expected)
+
+    response = api_client.get(f"/api/lists/{todo_list.public_token}/")
+    assert response.content == JSONRenderer().render(ListSerializer(ListViewSet.queryset.get(pk=todo_list.pk)).data)
+    response = api_client.get("/api/tasks/")
+    assert response.content == JSONRenderer().render(TaskSerializer(Task.objects.order_by("id"), many=True).data)
+
+    # nested serializers need the model instances
+    request = Request(APIRequestFactory().get("/api/tasks/", {"expand": "categories"}))
+    expanding = TaskSerializer(context={"request": request})
+    assert values_plan(expanding) is None
+
+### MESSAGEPACK ###
+
+@pytest.mark.django_db
+def test_msgpack_responses(api_client, todo_list, task, category):
+    """tests MessagePack is negotiated by the viewsets, with its own validators
+
+    Args:
+        api_client (APIClient): simulates http request
+        todo_list (List): a test list
+        task (Task): a test task
+        category (Category): a test category
+    """
+    msgpack = pytest.importorskip("msgpack")
+    for url in ("/api/tasks/", f"/api/lists/{todo_list.public_token}/", "/api/categories/"):
+        response = api_client.get(url, HTTP_ACCEPT="application/msgpack")
+        assert response["Content-Type"] == "application/msgpack"
+        assert msgpack.unpackb(response.content) == api_client.get(url).json()
+        if response.has_header("ETag"):
+            assert response["ETag"] != api_client.get(url)["ETag"]
+
+    response = api_client.get(f"/api/lists/{todo_list.public_token}/", HTTP_ACCEPT="application/msgpack; layout=rows")
+    tasks = msgpack.unpackb(response.content)["tasks"]
+    assert tasks["columns"][:2] == ["id", "name"]
+    assert tasks["rows"] == [[row[column] for column in tasks["columns"]] for row in api_client.get("/api/tasks/").json()]
+
+@pytest.mark.django_db
+def test_msgpack_requests(api_client, todo_list, category):
+    """tests MessagePack request bodies, including the rows layout on bulk writes
+
+    Args:
+        api_client (APIClient): simulates http request
+        todo_list (List): a test list
+        category (Category): a test category
+    """
+    msgpack = pytest.importorskip("msgpack")
+    payload = {"name": "Packed", "description": "d", "due_at": "2026-01-01T00:00:00Z", "list": todo_list.id}
+    response = api_client.post("/api/tasks/", msgpack.packb(payload), content_type="application/msgpack")
+    assert response.status_code == 201
+    assert response.json()["name"] == "Packed"
+
+    table = {"columns": ["name", "description", "due_at", "list", "categories"], "rows": [
+        ["Row one", "d", "2026-01-01T00:00:00Z", todo_list.id, [category.id]],
+        ["Row two", "d", "2026-01-02T00:00:00Z", todo_list.id, []],
+    ]}
+    response = api_client.post("/api/tasks/bulk/", msgpack.packb(table), content_type="application/msgpack; layout=rows")
+    assert response.status_code == 201
+    assert [task["categories"] for task in response.json()] == [[category.id], []]
+
+    response = api_client.post("/api/tasks/", b"\xc1", content_type="application/msgpack")
+    assert response.status_code == 400
+
+### COMPRESSION ###
+
+@pytest.mark.django_db
+def test_compressed_responses(api_client, settings, todo_list, task, task_chain):
+    """tests responses are compressed as negotiated, over the size threshold, streams included
+
+    Args:
+        api_client (APIClient): simulates http request
+        settings (SettingsWrapper): overrides django settings
+        todo_list (List): a test list
+        task (Task): a test task
+        task_chain (list[Task]): nested test tasks
+    """
+    brotli = pytest.importorskip("brotli")
+    settings.COMPRESSION_MIN_SIZE = 200
+    plain = api_client.get("/api/tasks/")
+    assert not plain.has_header("Content-Encoding")
+
+    response = api_client.get("/api/tasks/", HTTP_ACCEPT_ENCODING="gzip, deflate")
+    assert response["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response["Vary"]
+    assert response["ETag"] == f"W/{plain['ETag']}"
+    assert gzip.decompress(response.content) == plain.content
+
+    response = api_client.get("/api/tasks/", HTTP_ACCEPT_ENCODING="gzip, br")
+    assert brotli.decompress(response.content) == plain.content
+    assert api_client.get("/api/tasks/", HTTP_ACCEPT_ENCODING="gzip;q=0.5, br;q=0")["Content-Encoding"] == "gzip"
+
+    url = f"/api/lists/{todo_list.public_token}/export/"
+    response = api_client.get(url, {"format": "jsonl"}, HTTP_ACCEPT_ENCODING="gzip")
+    assert response["Content-Encoding"] == "gzip"
+    assert gzip.decompress(b"".join(response.streaming_content)) == b"".join(api_client.get(url, {"format": "jsonl"}).streaming_content)
+
+    settings.COMPRESSION_MIN_SIZE = 10 ** 6
+    assert not api_client.get("/api/tasks/", HTTP_ACCEPT_ENCODING="gzip").has_header("Content-Encoding")
+
+@pytest.mark.django_db
+def test_list_cache_stores_compressed_payloads(api_client, settings, monkeypatch, todo_list, task, task_chain):
+    """tests cached list payloads are sent compressed without compressing them again
+
+    Args:
+        api_client (APIClient): simulates http request
+        settings (SettingsWrapper): overrides django settings
+        monkeypatch (MonkeyPatch): patches the compressor
+        todo_list (List): a test list
+        task (Task): a test task
+        task_chain (list[Task]): nested test tasks
+    """
+    settings.COMPRESSION_MIN_SIZE = 200
+    url = f"/api/lists/{todo_list.public_token}/"
+    first = api_client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+    assert first["X-Cache"] == "MISS" and first["Content-Encoding"] == "gzip"
+    assert gzip.decompress(first.content) == api_client.get(url).content
+
+    monkeypatch.setattr(gzip, "compress", None)
+    second = api_client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+    assert second["X-Cache"] == "HIT" and second["Content-Encoding"] == "gzip"
+    assert second.content == first.content
+
+    # the weakened validator still guards writes
+    response = api_client.patch(url, {"name": "Renamed"}, format="json", HTTP_IF_MATCH=second["ETag"])
+    assert response.status_code == 200
+
+### SEARCH ###
+
+@pytest.fixture
+def search_index():
+    """empties the in-process search index, the test database is rolled back between tests"""
+    inverted_index.reset()
+    yield inverted_index
+    inverted_index.reset()
+
+@pytest.mark.django_db
+def test_search_ranks_and_paginates(api_client, search_index, todo_list, task, category):
+    """tests /api/search/ ranks names above descriptions and pages through the results
+
+    Args:
+        api_client (APIClient): simulates http request
+        search_index (InvertedIndex): the search index
+        todo_list (List): a test list
+        task (Task): a test task
+        category (Category): a test category
+    """
+    due_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    named = Task.objects.create(name="Buy groceries", description="milk", due_at=due_at, list=todo_list)
+    described = Task.objects.create(name="Errands", description="groceries and bread", due_at=due_at, list=todo_list)
+    List.objects.create(name="Groceries", description="weekly")
+
+    response = api_client.get("/api/search/", {"q": "groceries "})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [(result["type"], result["data"]["name"]) for result in results] == [
+        ("list", "Groceries"), ("task", "Buy groceries"), ("task", "Errands")
+    ]
+    assert results[1]["list_token"] == todo_list.public_token
+    assert results[1]["score"] > results[2]["score"]
+
+    # the last word is a prefix, the others match whole words
+    assert [result["data"]["id"] for result in api_client.get("/api/search/", {"q": "groc", "type": "task"}).json()["results"]] == [named.id, described.id]
+    assert [result["data"]["id"] for result in api_client.get("/api/search/", {"q": "groceries bre"}).json()["results"]] == [described.id]
+    assert api_client.get("/api/search/", {"q": "grocer "}).json()["results"] == []
+
+    first = api_client.get("/api/search/", {"q": "groceries", "page_size": 2}).json()
+    assert len(first["results"]) == 2 and first["previous"] is None
+    second = api_client.get(first["next"]).json()
+    assert [result["data"]["name"] for result in second["results"]] == ["Errands"]
+    assert second["next"] is None
+    assert api_client.get(second["previous"]).json()["results"] == first["results"]
+
+    for params in ({}, {"q": " "}, {"q": "x", "type": "user"}):
+        assert api_client.get("/api/search/", params).status_code == 400
+
+@pytest.mark.django_db
+def test_search_index_follows_writes(api_client, search_index, django_capture_on_commit_callbacks, todo_list, task):
+    """tests the inverted index picks up renamed, deleted and new rows
+
+    Args:
+        api_client (APIClient): simulates http request
+        search_index (InvertedIndex): the search index
+        django_capture_on_commit_callbacks (callable): runs on_commit callbacks
+        todo_list (List): a test list
+        task (Task): a test task
+    """
+    def names(query):
+        return [result["data"]["name"] for result in api_client.get("/api/search/", {"q": query}).json()["results"]]
+
+    assert names("test task") == ["Test Task"]
+    with django_capture_on_commit_callbacks(execute=True):
+        api_client.patch(f"/api/tasks/{task.id}/", {"name": "Renamed chore"}, format="json")
+    assert names("test task") == []
+    assert names("chore") == ["Renamed chore"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        api_client.delete(f"/api/tasks/{task.id}/")
+    assert names("chore") == []
+    assert ("task", task.id) not in search_index.documents
+
+    # rows deleted without a tombstone are dropped once returned
+    other = List.objects.create(name="Doomed", description="")
+    assert names("doomed") == ["Doomed"]
+    List.objects.filter(pk=other.pk).delete()
+    assert names("doomed") == []
+    assert ("list", other.pk) not in search_index.documents
+
+@pytest.mark.django_db
+def test_search_falls_back_to_database(api_client, search_index, settings, todo_list, task):
+    """tests tables holding more rows than SEARCH_INDEX_MAX_ROWS are searched in the database
+
+    Args:
+        api_client (APIClient): simulates http request
+        search_index (InvertedIndex): the search index
+        settings (SettingsWrapper): django settings
+        todo_list (List): a test list
+        task (Task): a test task
+    """
+    settings.SEARCH_INDEX_MAX_ROWS = 1
+    due_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    Task.objects.create(name="Groceries run", description="buy groceries", due_at=due_at, list=todo_list)
+    Task.objects.create(name="Gardening", description="", due_at=due_at, list=todo_list)
+
+    response = api_client.get("/api/search/", {"q": "groceries"})
+    assert [result["data"]["name"] for result in response.json()["results"]] == ["Groceries run"]
+    response = api_client.get("/api/search/", {"q": "gr"})
+    assert [result["data"]["name"] for result in response.json()["results"]] == ["Groceries run"]
+    assert search_index.oversized and search_index.documents == {}
+
+    # an index outgrowing the limit between two syncs is emptied
+    settings.SEARCH_INDEX_MAX_ROWS = 100
+    search_index.reset()
+    search_index.warm()
+    assert search_index.documents
+    settings.SEARCH_INDEX_MAX_ROWS = 1
+    response = api_client.get("/api/search/", {"q": "garden"})
+    assert [result["data"]["name"] for result in response.json()["results"]] == ["Gardening"]
+    assert search_index.oversized and search_index.documents == {}
+
+### AGENDA ###
+
+@pytest.mark.django_db
+def test_agenda_buckets(api_client, django_assert_num_queries, todo_list):
+    """tests /api/tasks/agenda/ buckets open tasks by due window and pages through one
+
+    Args:
+        api_client (APIClient): simulates http request
+        django_assert_num_queries (callable): query counting context manager
+        todo_list (List): a test list
+    """
+    now = django_timezone.now()
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+    other = List.objects.create(name="Other", description="")
+    due = {
+        "late": now - timedelta(days=2),
+        "soon": now + (midnight - now) / 2,
+        "next week": now + timedelta(days=3),
+        "later": now + timedelta(days=30),
+    }
+    for index, (name, due_at) in enumerate(due.items()):
+        Task.objects.create(name=name, description="", due_at=due_at, list=other if index % 2 else todo_list)
+    Task.objects.create(name="closed", description="", due_at=due["late"], done=True, list=todo_list)
+    for index in range(3):
+        Task.objects.create(name=f"late {index}", description="", due_at=due["late"] + timedelta(hours=index), list=todo_list)
+
+    # counts, then one page per bucket with its categories
+    with django_assert_num_queries(7):
+        response = api_client.get("/api/tasks/agenda/", {"tz": "UTC", "page_size": 2})
+    buckets = response.json()["buckets"]
+    assert {name: bucket["count"] for name, bucket in buckets.items()} == {"overdue": 4, "today": 1, "week": 1}
+    assert [task["name"] for task in buckets["overdue"]["results"]] == ["late", "late 0"]
+    assert [task["name"] for task in buckets["today"]["results"]] == ["soon"]
+    assert buckets["today"]["next"] is None
+
+    page = api_client.get(buckets["overdue"]["next"]).json()
+    assert list(page["buckets"]) == ["overdue"]
+    assert [task["name"] for task in page["buckets"]["overdue"]["results"]] == ["late 1", "late 2"]
+
+    response = api_client.get("/api/tasks/agenda/", {"list": other.public_token})
+    assert [task["name"] for task in response.json()["buckets"]["week"]["results"]] == []
+    assert response.json()["buckets"]["today"]["results"][0]["name"] == "soon"
+
+    for params in ({"tz": "Mars/Olympus"}, {"bucket": "someday"}, {"cursor": "abc"}):
+        assert api_client.get("/api/tasks/agenda/", params).status_code == 400
+
+### CATEGORY STATS ###
+
+@pytest.mark.django_db
+def test_category_stats(api_client, django_assert_num_queries, todo_list, task, category):
+    """tests ?with_stats=1 and /api/lists/<token>/categories/ count tasks in one query
+
+    Args:
+        api_client (APIClient): simulates http request
+        django_assert_num_queries (callable): query counting context manager
+        todo_list (List): a test list
+        task (Task): a test task, in category
+        category (Category): a test category
+    """
+    now = django_timezone.now()
+    other = List.objects.create(name="Other", description="")
+    idle = Category.objects.create(name="Idle", description="", color="#000000")
+    soon = now + timedelta(days=1)
+    task.due_at = now + timedelta(days=5)
+    task.save()
+    for name, due_at, done, todo in (
+        ("late", now - timedelta(days=1), False, todo_list),
+        ("soon", soon, False, todo_list),
+        ("closed", now - timedelta(days=3), True, todo_list),
+        ("elsewhere", now + timedelta(hours=1), False, other),
+    ):
+        Task.objects.create(name=name, description="", due_at=due_at, done=done, list=todo).categories.add(category)
+
+    with django_assert_num_queries(1):
+        response = api_client.get("/api/categories/", {"with_stats": "1"})
+    stats = {item["name"]: item for item in response.json()}
+    assert {key: stats["Test Category"][key] for key in ("task_count", "open_count", "overdue_count")} == {
+        "task_count": 5, "open_count": 4, "overdue_count": 1
+    }
+    assert datetime.fromisoformat(stats["Test Category"]["next_due_at"]) == now + timedelta(hours=1)
+    assert stats["Idle"]["task_count"] == 0 and stats["Idle"]["next_due_at"] is None
+    assert "task_count" not in api_client.get(f"/api/categories/{idle.id}/").json()
+
+    with django_assert_num_queries(2):
+        response = api_client.get(f"/api/lists/{todo_list.public_token}/categories/")
+    [item] = response.json()
+    assert (item["id"], item["task_count"], item["open_count"], item["overdue_count"]) == (category.id, 4, 3, 1)
+    assert datetime.fromisoformat(item["next_due_at"]) == soon
+    assert api_client.get("/api/lists/unknown/categories/").status_code == 404
+
+### GROUPED LIST ###
+
+@pytest.mark.django_db
+def test_list_grouped_by_category(api_client, django_assert_max_num_queries, todo_list, task, category):
+    """tests ?group_by=category returns the tasks grouped and ordered like the list page
+
+    Args:
+        api_client (APIClient): simulates http request
+        django_assert_max_num_queries (callable): query counting context manager
+        todo_list (List): a test list
+        task (Task): a test task, in category
+        category (Category): a test category
+    """
+    url = f"/api/lists/{todo_list.public_token}/"
+    due_at = task.due_at
+    ecole = Category.objects.create(name="École", description="", color="#000000")
+    archive = Category.objects.create(name="Archive", description="", color="#000000")
+    both = Task.objects.create(name="both", description="", priority=5, due_at=due_at, list=todo_list)
+    both.categories.add(category, ecole)
+    Task.objects.create(name="closed", description="", done=True, due_at=due_at, list=todo_list).categories.add(archive)
+    loose = Task.objects.create(name="loose", description="", due_at=due_at, list=todo_list)
+
+    with django_assert_max_num_queries(5):
+        data = api_client.get(url, {"group_by": "category"}).json()
+    assert "tasks" not in data
+    groups = [(group["category"] and group["category"]["name"], group["open_count"], [item["name"] for item in group["tasks"]]) for group in data["groups"]]
+    assert groups == [
+        ("École", 1, ["both"]),
+        ("Test Category", 2, ["both", task.name]),
+        (None, 1, ["loose"]),
+        ("Archive", 0, ["closed"]),
+    ]
+    assert data["groups"][0]["category"]["id"] == ecole.id
+    assert data["groups"][2]["tasks"][0] == TaskSerializer(loose).data
+
+    expanded = api_client.get(url, {"group_by": "category", "expand": "tasks.categories"}).json()
+    assert [group["open_count"] for group in expanded["groups"]] == [1, 2, 1, 0]
+    assert api_client.get(url, {"group_by": "list"}).status_code == 400
+    assert api_client.get(url, {"group_by": "category", "fields": "id,tasks.name"}).status_code == 400
+
+@pytest.mark.django_db
+def test_grouped_list_follows_categories(api_client, django_capture_on_commit_callbacks, todo_list, task, category):
+    """tests a grouped list is not validated once one of its categories is renamed
+
+    Args:
+        api_client (APIClient): simulates http request
+        django_capture_on_commit_callbacks (callable): runs on_commit callbacks
+        todo_list (List): a test list
+        task (Task): a test task, in category
+        category (Category): a test category
+    """
+    url = f"/api/lists/{todo_list.public_token}/?group_by=category"
+    etag = api_client.get(url)["ETag"]
+    assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    with django_capture_on_commit_callbacks(execute=True):
+        category.name = "Renamed"
+        category.save()
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.json()["groups"][0]["category"]["name"] == "Renamed"
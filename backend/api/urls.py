@@ -1,8 +1,23 @@
+from django.conf import settings
+from django.urls import re_path
 from rest_framework.routers import DefaultRouter
-from .views import TaskViewSet, ListViewSet, CategoryViewSet
+from . import async_views
+from .views import TaskViewSet, ListViewSet, CategoryViewSet, SearchViewSet
 
 router = DefaultRouter()
 router.register(r"tasks", TaskViewSet)
 router.register(r"lists", ListViewSet)
 router.register(r"categories", CategoryViewSet)
-urlpatterns = router.urls
+router.register(r"search", SearchViewSet, basename="search")
+
+# async read paths, falling back to the router views for everything else
+views = {url.name: url.callback for url in router.urls}
+async_urlpatterns = [
+    re_path(r"^tasks/$", async_views.async_read(async_views.task_list, views["task-list"])),
+    re_path(r"^lists/(?P<token>[^/.]+)/$", async_views.async_read(async_views.list_detail, views["list-detail"])),
+    re_path(r"^categories/$", async_views.async_read(async_views.category_list, views["category-list"])),
+]
+
+urlpatterns = (async_urlpatterns if settings.API_ASYNC_READS else []) + [
+    re_path(r"^lists/(?P<token>[^/.]+)/events/$", async_views.list_events, name="list-events"),
+] + router.urls
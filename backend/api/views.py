@@ -1,27 +1,627 @@
-from rest_framework import viewsets
-from tasks.models import Task
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from tasks.models import DISPLAY_ORDER, Task, TaskTombstone, categories_by_id
 from tasks.serializers import TaskSerializer
+from tasks.imports import detect_format, import_tasks, read_rows
+from tasks.receivers import batched_tombstones
+from tasks.signals import tasks_bulk_saved
+from tasks.groups import group_by_category
+from tasks.tree import build_tree, subtree
 from lists.models import List
-from lists.serializers import ListSerializer
+from lists.serializers import ListHeaderSerializer, ListSerializer, ListSummarySerializer
 from categories.models import Category
-from categories.serializers import CategorySerializer
-from django.db.models import Prefetch
+from categories.serializers import CategorySerializer, CategoryStatsSerializer
+from core.middleware import compress_content, select_encoding, set_content_encoding
+from core.serializers import only_selected, serialize_values, values_plan
+from django.db import transaction
+from django.db.models import Count, Max, Min, Prefetch, Q
+from django.utils import timezone
+from datetime import datetime, time, timedelta
+from .cache import list_cache
+from .conditional import ConditionalMixin
+from .export import keyset_batches, stream_csv, stream_json, stream_json_lines
+from .filters import TRUE_VALUES, TaskFilterBackend, parse_aware_datetime, parse_int, parse_timezone
+from .pagination import AgendaPagination, RankedPagination, TaskPagination
+from .parsers import MSGPACK_PARSERS
+from .search import MAX_QUERY_LENGTH, SEARCH_FIELDS, get_backend, serialize_hits
+from .renderers import MSGPACK_RENDERERS, CSVRenderer, FastJSONRenderer, JSONLinesRenderer
 
-class TaskViewSet(viewsets.ModelViewSet):
-    queryset = Task.objects.all()
+# JSON first, MessagePack when msgpack is installed
+API_RENDERERS = [*api_settings.DEFAULT_RENDERER_CLASSES, *MSGPACK_RENDERERS]
+API_PARSERS = [*api_settings.DEFAULT_PARSER_CLASSES, *MSGPACK_PARSERS]
+
+def tree_depth(request):
+    """reads the ?depth= of tree representations, bounded by TASK_TREE_MAX_DEPTH
+
+    Args:
+        request (Request): the current request
+
+    Raises:
+        ValidationError: depth is not an integer
+
+    Returns:
+        int: the depth
+    """
+    if "depth" not in request.query_params:
+        return settings.TASK_TREE_MAX_DEPTH
+    try:
+        depth = parse_int(request.query_params["depth"])
+    except ValueError as e:
+        raise ValidationError({"depth": [str(e)]})
+    return max(0, min(depth, settings.TASK_TREE_MAX_DEPTH))
+
+def agenda_windows(now, zone):
+    """computes the due windows of the agenda
+
+    Args:
+        now (datetime): the current time
+        zone (tzinfo): time zone the days of the client start in
+
+    Returns:
+        dict: {bucket: (start, end)}, None for an open bound
+    """
+    today = now.astimezone(zone).date()
+    tomorrow = datetime.combine(today + timedelta(days=1), time(), tzinfo=zone)
+    week_end = datetime.combine(today + timedelta(days=7), time(), tzinfo=zone)
+    return {
+        "overdue": (None, now),
+        "today": (now, tomorrow),
+        "week": (tomorrow, week_end),
+    }
+
+def with_task_stats(categories):
+    """annotates categories with the counters of their tasks, aggregated in the same query
+
+    Filters on tasks applied to the queryset beforehand (e.g. tasks__list)
+    restrict the counted tasks.
+
+    Args:
+        categories (QuerySet): categories
+
+    Returns:
+        QuerySet: categories with task_count, open_count, overdue_count and
+        next_due_at, the nearest due date of their open tasks not overdue
+    """
+    now = timezone.now()
+    return categories.annotate(
+        task_count=Count("tasks"),
+        open_count=Count("tasks", filter=Q(tasks__done=False)),
+        overdue_count=Count("tasks", filter=Q(tasks__done=False, tasks__due_at__lt=now)),
+        next_due_at=Min("tasks__due_at", filter=Q(tasks__done=False, tasks__due_at__gte=now)),
+    )
+
+def inlines_categories(request):
+    """whether a response embeds category objects, which its validators must follow
+
+    Args:
+        request (Request): the request
+
+    Returns:
+        bool: True when ?expand= expands the categories of tasks (see
+        DynamicFieldsMixin) or ?group_by=category heads groups with them
+    """
+    expand = {name.strip() for name in request.query_params.get("expand", "").split(",")}
+    return bool(expand & {"categories", "tasks.categories"}) or request.query_params.get("group_by") == "category"
+
+def represent_many(view, queryset):
+    """serializes the rows of a queryset with the serializer of a view
+
+    Goes through serialize_values() when the selected fields allow it, which
+    skips building model instances; the output is the same.
+
+    Args:
+        view (GenericAPIView): the view
+        queryset (QuerySet): the rows, in order
+
+    Returns:
+        list[dict]: serialized rows
+    """
+    data = serialize_values(view.get_serializer(), queryset)
+    if data is None:
+        data = view.get_serializer(queryset, many=True).data
+    return data
+
+class TaskViewSet(ConditionalMixin, viewsets.ModelViewSet):
+    queryset = Task.objects.order_by("id").prefetch_related(categories_by_id())
     serializer_class = TaskSerializer
+    pagination_class = TaskPagination
+    filter_backends = [TaskFilterBackend]
+    renderer_classes = API_RENDERERS
+    parser_classes = API_PARSERS
 
-class ListViewSet(viewsets.ModelViewSet):
+    def get_queryset(self):
+        # ?fields= trims the loaded columns too
+        return only_selected(super().get_queryset(), self.get_serializer())
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(self.list_tasks, request, *args, **kwargs)
+
+    def list_tasks(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(represent_many(self, queryset))
+
+    def get_validator_state(self):
+        categories = inlines_categories(self.request)
+        if self.detail:
+            try:
+                tasks = Task.objects.filter(pk=self.kwargs["pk"])
+            except ValueError:
+                return None
+            if not categories:
+                updated_at = tasks.values_list("updated_at", flat=True).first()
+                return None if updated_at is None else (updated_at, 1)
+        else:
+            tasks = self.filter_queryset(Task.objects.all())
+        if not categories:
+            state = tasks.aggregate(last_modified=Max("updated_at"), size=Count("id"))
+            return state["last_modified"], state["size"]
+        # expanded categories change with their own rows
+        state = tasks.aggregate(
+            last_modified=Max("updated_at"),
+            size=Count("id", distinct=True),
+            categories_modified=Max("categories__updated_at"),
+            categories=Count("categories"),
+        )
+        if self.detail and not state["size"]:
+            return None
+        modified = [value for value in (state["last_modified"], state["categories_modified"]) if value]
+        return max(modified, default=None), f"{state['size']}:{state['categories']}"
+
+    @action(detail=True)
+    def tree(self, request, pk=None):
+        """returns a task with its whole subtask hierarchy"""
+        root = get_object_or_404(Task.objects.only("id", "path"), pk=pk)
+        data = self.get_serializer(subtree(root, tree_depth(request)), many=True).data
+        return Response(build_tree(data, tree_depth(request), root_ids={root.pk})[0])
+
+    @action(detail=False, filter_backends=[TaskFilterBackend])
+    def agenda(self, request):
+        """returns the open tasks of every list by due window, with the size of each window
+
+        Windows are overdue (due before now), today (until midnight in ?tz=,
+        the server time zone by default) and week (the next six days). Each
+        window lists its first page, soonest first; ?bucket= with the cursor of
+        a next / previous link pages through one window. The filters of
+        /api/tasks/ apply, e.g. ?list=.
+        """
+        zone = timezone.get_current_timezone()
+        if "tz" in request.query_params:
+            try:
+                zone = parse_timezone(request.query_params["tz"])
+            except ValueError as e:
+                raise ValidationError({"tz": [str(e)]})
+        now = timezone.now()
+        windows = agenda_windows(now, zone)
+        buckets = list(windows)
+        if "bucket" in request.query_params:
+            buckets = [request.query_params["bucket"]]
+            if buckets[0] not in windows:
+                raise ValidationError({"bucket": [f"Expected one of {', '.join(windows)}."]})
+        elif "cursor" in request.query_params:
+            raise ValidationError({"bucket": ["A cursor pages through one bucket, pass it too."]})
+
+        # range scans of the (done, due_at) index
+        tasks = self.filter_queryset(self.get_queryset()).filter(done=False)
+        ranges = {
+            name: Q(due_at__lt=end) if start is None else Q(due_at__gte=start, due_at__lt=end)
+            for name, (start, end) in windows.items()
+        }
+        counts = tasks.filter(due_at__lt=windows["week"][1]).aggregate(
+            **{name: Count("id", filter=condition) for name, condition in ranges.items()}
+        )
+        data = {}
+        for name in buckets:
+            paginator = AgendaPagination(name)
+            page = paginator.paginate(tasks.filter(ranges[name]), request)
+            data[name] = {
+                "count": counts[name],
+                "next": paginator.get_next_link(),
+                "previous": paginator.get_previous_link(),
+                "results": self.get_serializer(page, many=True).data,
+            }
+        return Response({"now": now, "buckets": data})
+
+    @action(detail=True, methods=["post"])
+    def complete(self, request, pk=None):
+        """marks a task and all its subtasks done (or open with {"done": false}) in one update"""
+        root = get_object_or_404(Task.objects.only("id", "path"), pk=pk)
+        done = request.data.get("done", True)
+        if not isinstance(done, bool):
+            raise ValidationError({"done": ["Must be a valid boolean."]})
+        subtree_tasks = root.descendants(include_self=True)
+        with transaction.atomic():
+            updated = subtree_tasks.update(done=done, updated_at=timezone.now())
+            tasks_bulk_saved.send(sender=Task, tasks=subtree_tasks.only("id", "list_id"), created=False)
+        return Response({"updated": updated})
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """creates many tasks at once, errors are reported per item"""
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        tasks = serializer.save()
+        return Response(self.serialize_many([task.pk for task in tasks]), status=status.HTTP_201_CREATED)
+
+    @bulk.mapping.patch
+    def bulk_update(self, request):
+        """partially updates many tasks at once, each item carries its id"""
+        ids = [item.get("id") for item in request.data if isinstance(item, dict)] if isinstance(request.data, list) else []
+        instances = Task.objects.filter(pk__in=[pk for pk in ids if isinstance(pk, int)])
+        serializer = self.get_serializer(instances, data=request.data, many=True, partial=True)
+        serializer.is_valid(raise_exception=True)
+        tasks = serializer.save()
+        return Response(self.serialize_many([task.pk for task in tasks]))
+
+    @bulk.mapping.delete
+    def bulk_destroy(self, request):
+        """deletes many tasks at once from an array of ids"""
+        if not isinstance(request.data, list):
+            return Response({"non_field_errors": ["Expected a list of ids."]}, status=status.HTTP_400_BAD_REQUEST)
+        ids = [pk for pk in request.data if isinstance(pk, int) and not isinstance(pk, bool)]
+        existing = set(Task.objects.filter(pk__in=ids).values_list("pk", flat=True))
+        errors = [{} if pk in existing else {"id": [f'Task "{pk}" does not exist.']} for pk in request.data]
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic(), batched_tombstones():
+            Task.objects.filter(pk__in=existing).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def serialize_many(self, ids):
+        """serializes tasks in the given order, with their categories prefetched
+
+        Args:
+            ids (list[int]): task ids
+
+        Returns:
+            list[dict]: serialized tasks
+        """
+        tasks = self.get_queryset().in_bulk(ids)
+        return self.get_serializer([tasks[pk] for pk in ids], many=True).data
+
+class ListViewSet(ConditionalMixin, viewsets.ModelViewSet):
     serializer_class = ListSerializer
     lookup_field = "public_token"
     lookup_url_kwarg = "token"
+    renderer_classes = API_RENDERERS
+    parser_classes = API_PARSERS
     queryset = List.objects.all().prefetch_related(
         Prefetch(
             "tasks",
-            queryset=Task.objects.order_by("done", "-priority", "due_at")
+            queryset=Task.objects.order_by(*DISPLAY_ORDER).prefetch_related(categories_by_id())
         )
     )
+
+    def is_summary(self):
+        """whether the client asked for the lightweight ?view=summary representation"""
+        return self.action in ("list", "retrieve") and self.request.query_params.get("view") == "summary"
+
+    def get_queryset(self):
+        if not self.is_summary():
+            serializer = self.get_serializer()
+            columns = serializer.model_fields()
+            if columns is None:
+                return super().get_queryset()
+            # ?fields= trims the loaded columns, and skips the tasks when they are not selected
+            queryset = List.objects.only(*columns)
+            if "tasks" in serializer.fields:
+                tasks = only_selected(Task.objects.all(), serializer.fields["tasks"].child, "list")
+                queryset = queryset.prefetch_related(Prefetch(
+                    "tasks",
+                    queryset=tasks.order_by(*DISPLAY_ORDER).prefetch_related(categories_by_id())
+                ))
+            return queryset
+        # counters are aggregated in the same query as the lists
+        return List.objects.annotate(
+            task_count=Count("tasks"),
+            done_count=Count("tasks", filter=Q(tasks__done=True)),
+            overdue_count=Count("tasks", filter=Q(tasks__done=False, tasks__due_at__lt=timezone.now())),
+        )
+
+    def get_serializer_class(self):
+        if self.is_summary():
+            return ListSummarySerializer
+        return super().get_serializer_class()
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(self.read_through, request, *args, **kwargs)
+
+    def read_through(self, request, token=None):
+        """serves the list payload from the versioned cache, building it on a miss
+
+        Payloads are cached rendered and compressed, hits are sent as they are.
+        The browsable API caches the data, its pages are rendered per request.
+        """
+        if self.is_summary():
+            return super(ConditionalMixin, self).retrieve(request, token=token)
+        renderer = request.accepted_renderer
+        if renderer.format == "api":
+            data, hit = list_cache.get_or_build(token, request.query_params, self.build_payload)
+            response = Response(data)
+        else:
+            encoding = select_encoding(request)
+            (content, encoding), hit = list_cache.get_or_build(
+                token, request.query_params, lambda: self.build_content(encoding),
+                representation=f"{request.accepted_media_type}|{encoding or ''}"
+            )
+            content_type = f"{renderer.media_type}; charset={renderer.charset}" if renderer.charset else renderer.media_type
+            response = HttpResponse(content, content_type=content_type)
+            set_content_encoding(response, encoding)
+        response["X-Cache"] = "HIT" if hit else "MISS"
+        return response
+
+    def build_content(self, encoding):
+        """renders and compresses the list payload
+
+        Args:
+            encoding (str | None): negotiated content coding
+
+        Returns:
+            tuple[bytes, str | None]: result of compress_content()
+        """
+        content = self.request.accepted_renderer.render(
+            self.build_payload(), self.request.accepted_media_type, self.get_renderer_context()
+        )
+        return compress_content(content, encoding)
+
+    def build_payload(self):
+        """serializes the requested list, nesting subtasks under ?nested=1
+
+        ?group_by=category replaces the tasks with their groups, see group_by_category().
+        """
+        group_by = self.request.query_params.get("group_by")
+        if group_by not in (None, "category"):
+            raise ValidationError({"group_by": ["Expected category."]})
+        data = self.serialize_list()
+        if self.request.query_params.get("nested", "").lower() in TRUE_VALUES:
+            data["tasks"] = build_tree(data["tasks"], tree_depth(self.request))
+        if group_by:
+            data["groups"] = self.group_tasks(data.pop("tasks", None))
+        return data
+
+    def group_tasks(self, items):
+        """groups serialized tasks by category, nested ones by the categories of their roots
+
+        Raises:
+            ValidationError: ?fields= left out the tasks, or their categories or done field
+        """
+        if items is None or any("categories" not in item or "done" not in item for item in items):
+            raise ValidationError({"group_by": ["Grouping needs the categories and done fields of the tasks."]})
+        ids = {category["id"] if isinstance(category, dict) else category for item in items for category in item["categories"]}
+        serializer = CategorySerializer(context=self.get_serializer_context())
+        categories = {category.id: serializer.to_representation(category) for category in Category.objects.filter(pk__in=ids)}
+        return group_by_category(items, categories)
+
+    def serialize_list(self):
+        """serializes the requested list, its tasks through serialize_values() when possible
+
+        Returns:
+            dict: the representation of ListSerializer
+        """
+        serializer = self.get_serializer()
+        tasks = serializer.fields.get("tasks")
+        if tasks is None or values_plan(tasks.child) is None:
+            return self.get_serializer(self.get_object()).data
+        todo_list = get_object_or_404(self.get_queryset().prefetch_related(None), public_token=self.kwargs["token"])
+        names = list(serializer.fields)
+        del serializer.fields["tasks"]
+        data = serializer.to_representation(todo_list)
+        data["tasks"] = serialize_values(tasks.child, Task.objects.filter(list=todo_list).order_by(*DISPLAY_ORDER))
+        return {name: data[name] for name in names}
+
+    def get_validator_state(self):
+        if self.is_summary():
+            # overdue counters change with time, not with writes
+            return None
+        lists = List.objects.all()
+        if self.detail:
+            lists = lists.filter(public_token=self.kwargs["token"])
+        aggregates = self.validator_aggregates(categories=inlines_categories(self.request))
+        return self.validator_state(lists.aggregate(**aggregates), self.detail)
+
+    @staticmethod
+    def validator_aggregates(categories=False):
+        """aggregates the validator state of lists is computed from
+
+        Args:
+            categories (bool): whether the categories of the tasks are embedded, their rows count then
+        """
+        aggregates = {
+            "lists_modified": Max("updated_at"),
+            "tasks_modified": Max("tasks__updated_at"),
+            "list_count": Count("id", distinct=True),
+            "task_count": Count("tasks"),
+        }
+        if categories:
+            aggregates.update(
+                task_count=Count("tasks", distinct=True),
+                categories_modified=Max("tasks__categories__updated_at"),
+                category_count=Count("tasks__categories"),
+            )
+        return aggregates
+
+    @staticmethod
+    def validator_state(state, detail):
+        """turns the aggregates of validator_aggregates() into a (last_modified, size) state
+
+        Args:
+            state (dict): the aggregated values
+            detail (bool): whether one list was aggregated
+
+        Returns:
+            tuple | None: the state, None for a missing list
+        """
+        if detail and not state["list_count"]:
+            return None
+        modified = [state["lists_modified"], state["tasks_modified"], state.get("categories_modified")]
+        size = f"{state['list_count']}:{state['task_count']}"
+        if "category_count" in state:
+            size = f"{size}:{state['category_count']}"
+        return max((value for value in modified if value), default=None), size
+
+    @action(
+        detail=True,
+        serializer_class=TaskSerializer,
+        pagination_class=TaskPagination,
+        filter_backends=[TaskFilterBackend]
+    )
+    def tasks(self, request, token=None):
+        """lists the tasks of a list, accepting the same filters as /api/tasks/"""
+        return self.conditional(self.list_tasks, request, token=token)
+
+    def list_tasks(self, request, token=None):
+        todo_list = get_object_or_404(List.objects.only("id"), public_token=token)
+        queryset = self.filter_queryset(only_selected(
+            Task.objects.filter(list=todo_list)
+            .order_by(*DISPLAY_ORDER)
+            .prefetch_related(categories_by_id()),
+            self.get_serializer()
+        ))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(represent_many(self, queryset))
     
+    @action(detail=True, url_path="categories", serializer_class=CategoryStatsSerializer)
+    def category_stats(self, request, token=None):
+        """lists the categories of the tasks of a list, with the counters of these tasks"""
+        todo_list = get_object_or_404(List.objects.only("id"), public_token=token)
+        categories = with_task_stats(Category.objects.filter(tasks__list=todo_list))
+        return Response(self.get_serializer(categories, many=True).data)
+
+    @action(detail=True)
+    def changes(self, request, token=None):
+        """returns the tasks of a list changed since ?since=, and the ids of the ones that left it
+
+        Without ?since= every task is returned. The response cursor is the
+        ?since= of the next call; a cursor older than the deletion log is
+        answered with 410 and the client reloads the list.
+        """
+        todo_list = get_object_or_404(List, public_token=token)
+        since = None
+        if "since" in request.query_params:
+            try:
+                since = parse_aware_datetime(request.query_params["since"])
+            except ValueError as e:
+                raise ValidationError({"since": [str(e)]})
+            if timezone.is_naive(since):
+                since = timezone.make_aware(since)
+        now = timezone.now()
+        if since is not None and since < now - timedelta(days=settings.TASK_TOMBSTONE_RETENTION_DAYS):
+            return Response({"detail": "The cursor expired, reload the list."}, status=status.HTTP_410_GONE)
+
+        tasks = Task.objects.filter(list=todo_list).order_by("updated_at", "id").prefetch_related(categories_by_id())
+        deleted = set()
+        if since is not None:
+            tasks = tasks.filter(updated_at__gt=since)
+            deleted = set(TaskTombstone.objects.filter(list=todo_list, deleted_at__gt=since).values_list("task_id", flat=True))
+        serializer = TaskSerializer(context=self.get_serializer_context())
+        data = serialize_values(serializer, tasks)
+        if data is None:
+            data = TaskSerializer(tasks, many=True, context=self.get_serializer_context()).data
+        changed = since is None or todo_list.updated_at > since
+        return Response({
+            "cursor": (now - timedelta(seconds=settings.LIST_CHANGES_OVERLAP)).isoformat(),
+            "list": ListHeaderSerializer(todo_list, context=self.get_serializer_context()).data if changed else None,
+            "tasks": data,
+            # a task that left and came back is in tasks
+            "deleted": sorted(deleted - {task["id"] for task in data}),
+        })
+
+    @action(detail=True, renderer_classes=[FastJSONRenderer, JSONLinesRenderer, CSVRenderer, BrowsableAPIRenderer])
+    def export(self, request, token=None):
+        """streams the list and its tasks as JSON, JSON Lines (?format=jsonl) or CSV (?format=csv)"""
+        todo_list = get_object_or_404(List, public_token=token)
+        context = self.get_serializer_context()
+        serializer = TaskSerializer(context=context)
+        # the columns the batches seek on are loaded whatever ?fields= selects
+        ordering = [key.lstrip("-") for key in TaskPagination.ordering]
+        tasks = keyset_batches(
+            only_selected(Task.objects.filter(list=todo_list).prefetch_related(categories_by_id()), serializer, *ordering),
+            TaskPagination()
+        )
+        rows = (serializer.to_representation(task) for task in tasks)
+
+        renderer = request.accepted_renderer
+        if renderer.format == "jsonl":
+            stream = stream_json_lines(rows)
+        elif renderer.format == "csv":
+            stream = stream_csv(list(serializer.fields), rows)
+        else:
+            renderer = FastJSONRenderer()
+            stream = stream_json(ListHeaderSerializer(todo_list, context=context).data, rows)
+        response = StreamingHttpResponse(stream, content_type=f"{renderer.media_type}; charset=utf-8")
+        response["Content-Disposition"] = f'attachment; filename="{token}.{renderer.format}"'
+        return response
+
+    @action(detail=True, methods=["post"], url_path="import", parser_classes=[MultiPartParser])
+    def import_file(self, request, token=None):
+        """imports tasks from an uploaded JSON Lines, JSON array or CSV file, ?dry_run=1 validates without writing"""
+        todo_list = get_object_or_404(List, public_token=token)
+        upload = request.FILES.get("file")
+        if upload is None:
+            raise ValidationError({"file": ["No file was submitted."]})
+        try:
+            file_format = detect_format(upload.name, request.data.get("format"))
+        except ValueError as e:
+            raise ValidationError({"format": [str(e)]})
+        dry_run = request.query_params.get("dry_run", "").lower() in TRUE_VALUES
+        report = import_tasks(todo_list, read_rows(upload, file_format), dry_run=dry_run)
+        created = report["created"] and not dry_run
+        return Response(report, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
 class CategoryViewSet(viewsets.ModelViewSet):
     queryset = Category.objects.all()
-    serializer_class = CategorySerializer
\ No newline at end of file
+    serializer_class = CategorySerializer
+    renderer_classes = API_RENDERERS
+    parser_classes = API_PARSERS
+
+    def with_stats(self):
+        """whether the client asked for the task counters with ?with_stats=1"""
+        return self.action in ("list", "retrieve") and self.request.query_params.get("with_stats", "").lower() in TRUE_VALUES
+
+    def get_queryset(self):
+        queryset = only_selected(super().get_queryset(), self.get_serializer())
+        return with_task_stats(queryset) if self.with_stats() else queryset
+
+    def get_serializer_class(self):
+        if self.with_stats():
+            return CategoryStatsSerializer
+        return super().get_serializer_class()
+
+class SearchViewSet(viewsets.ViewSet):
+    """Ranked full-text search over task, list and category names and descriptions
+
+    GET /api/search/?q= matches every word of q, the last one as a prefix.
+    ?type= restricts the results to task, list and / or category (comma
+    separated). Results are paginated with ?page_size= and ?cursor=.
+    """
+    renderer_classes = API_RENDERERS
+    pagination_class = RankedPagination
+
+    def list(self, request):
+        query = request.query_params.get("q", "")
+        if not query.strip():
+            raise ValidationError({"q": ["This query parameter is required."]})
+        if len(query) > MAX_QUERY_LENGTH:
+            raise ValidationError({"q": [f"Ensure this value has at most {MAX_QUERY_LENGTH} characters."]})
+        types = list(SEARCH_FIELDS)
+        if "type" in request.query_params:
+            types = [kind.strip() for kind in request.query_params["type"].split(",") if kind.strip()]
+            unknown = [kind for kind in types if kind not in SEARCH_FIELDS]
+            if unknown or not types:
+                raise ValidationError({"type": [f"Expected a comma separated list of {', '.join(SEARCH_FIELDS)}."]})
+        backend = get_backend()
+        paginator = self.pagination_class()
+        hits = paginator.paginate_ranked(lambda limit: backend.search(query, types, limit), request)
+        return paginator.get_paginated_response(serialize_hits(hits, {"request": request, "view": self}))
@@ -12,5 +12,9 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+# async read endpoints, see api/async_views.py
+os.environ.setdefault('API_ASYNC_READS', 'true')
+# requests do not reuse their thread under ASGI, persistent connections would pile up
+os.environ.setdefault('DB_CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
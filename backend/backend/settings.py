@@ -12,7 +12,9 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import dj_database_url
+import importlib.util
 import os
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 # .env file loading
@@ -25,7 +27,40 @@ ENV = {
     'SERVER_IP' : os.getenv('SERVER_IP'),
     'FRONT_ROUTE_1': os.getenv('FRONT_ROUTE_1'),
     'FRONT_ROUTE_2': os.getenv('FRONT_ROUTE_2'),
-    'SECRET_KEY': os.getenv('SECRET_KEY')
+    'SECRET_KEY': os.getenv('SECRET_KEY'),
+    'API_PAGE_SIZE': os.getenv('API_PAGE_SIZE', 50),
+    'API_MAX_PAGE_SIZE': os.getenv('API_MAX_PAGE_SIZE', 500),
+    'API_BULK_MAX_ITEMS': os.getenv('API_BULK_MAX_ITEMS', 10000),
+    'LIST_CACHE_BACKEND': os.getenv('LIST_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+    'LIST_CACHE_LOCATION': os.getenv('LIST_CACHE_LOCATION', 'lists'),
+    'LIST_CACHE_TIMEOUT': os.getenv('LIST_CACHE_TIMEOUT', 3600),
+    'LIST_CACHE_MAX_ENTRIES': os.getenv('LIST_CACHE_MAX_ENTRIES', 1000),
+    'TASK_TREE_MAX_DEPTH': os.getenv('TASK_TREE_MAX_DEPTH', 32),
+    'DB_CONN_MAX_AGE': os.getenv('DB_CONN_MAX_AGE', 60),
+    'DB_CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'true'),
+    'DB_POOL': os.getenv('DB_POOL', 'false'),
+    'DB_POOL_MIN_SIZE': os.getenv('DB_POOL_MIN_SIZE', 2),
+    'DB_POOL_MAX_SIZE': os.getenv('DB_POOL_MAX_SIZE', 10),
+    'DB_POOL_TIMEOUT': os.getenv('DB_POOL_TIMEOUT', 10),
+    'DB_POOL_RECYCLE': os.getenv('DB_POOL_RECYCLE', 3600),
+    'API_ASYNC_READS': os.getenv('API_ASYNC_READS', 'false'),
+    'LIST_EVENTS_BROKER': os.getenv('LIST_EVENTS_BROKER', 'api.events.LocalBroker'),
+    'LIST_EVENTS_REDIS_URL': os.getenv('LIST_EVENTS_REDIS_URL', 'redis://localhost:6379/0'),
+    'LIST_EVENTS_HEARTBEAT': os.getenv('LIST_EVENTS_HEARTBEAT', 15),
+    'LIST_CHANGES_OVERLAP': os.getenv('LIST_CHANGES_OVERLAP', 5),
+    'TASK_TOMBSTONE_RETENTION_DAYS': os.getenv('TASK_TOMBSTONE_RETENTION_DAYS', 30),
+    'SEARCH_BACKEND': os.getenv('SEARCH_BACKEND', 'auto'),
+    'SEARCH_MAX_RESULTS': os.getenv('SEARCH_MAX_RESULTS', 1000),
+    'SEARCH_INDEX_OVERLAP': os.getenv('SEARCH_INDEX_OVERLAP', 5),
+    'SEARCH_INDEX_MAX_ROWS': os.getenv('SEARCH_INDEX_MAX_ROWS', 200000),
+    'COMPRESSION_ENCODINGS': os.getenv('COMPRESSION_ENCODINGS', 'br,gzip'),
+    'COMPRESSION_MIN_SIZE': os.getenv('COMPRESSION_MIN_SIZE', 1024),
+    'COMPRESSION_GZIP_LEVEL': os.getenv('COMPRESSION_GZIP_LEVEL', 6),
+    'COMPRESSION_BROTLI_QUALITY': os.getenv('COMPRESSION_BROTLI_QUALITY', 5),
+    'COMPRESSION_TYPES': os.getenv(
+        'COMPRESSION_TYPES',
+        'application/json,application/x-ndjson,application/msgpack,text/csv,text/html,text/plain,text/css,application/javascript'
+    )
    }
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -64,6 +99,8 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # before the middlewares touching the body, so that it compresses last
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -107,10 +144,158 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+def env_flag(value):
+    return str(value).lower() in ('1', 'true', 'yes', 'on')
+
+def env_max_age(value, default=60):
+    """parses a connection lifetime in seconds, "none" (any case) for unlimited, empty for the default"""
+    value = str(value).strip()
+    if not value:
+        return default
+    return None if value.lower() == 'none' else int(value)
+
+# persistent connections: a connection is reused by the requests of a worker
+# for DB_CONN_MAX_AGE seconds (0 closes it after each request, None never does)
+# and pinged first when DB_CONN_HEALTH_CHECKS is on
 DATABASES = {
-   'default': dj_database_url.config(default=ENV['DB_URL'])
+   'default': dj_database_url.config(
+       default=ENV['DB_URL'],
+       conn_max_age=env_max_age(ENV['DB_CONN_MAX_AGE']),
+       conn_health_checks=env_flag(ENV['DB_CONN_HEALTH_CHECKS'])
+   )
+}
+
+# optional connection pool, replaces persistent connections, on by default on
+# MySQL under the gevent and uvicorn workers (see gunicorn.conf.py)
+if env_flag(ENV['DB_POOL']):
+    _db = DATABASES['default']
+    _db['CONN_MAX_AGE'] = 0
+    if 'postgresql' in _db['ENGINE']:
+        # native psycopg pool, https://docs.djangoproject.com/en/5.2/ref/databases/#connection-pool
+        _db.setdefault('OPTIONS', {})['pool'] = {
+            'min_size': int(ENV['DB_POOL_MIN_SIZE']),
+            'max_size': int(ENV['DB_POOL_MAX_SIZE']),
+            'timeout': int(ENV['DB_POOL_TIMEOUT']),
+        }
+    elif 'mysql' in _db['ENGINE']:
+        # Django has no MySQL pool, use django-db-connection-pool
+        if importlib.util.find_spec('dj_db_conn_pool') is None:
+            raise ImproperlyConfigured('DB_POOL with MySQL requires django-db-connection-pool[mysql]')
+        _db['ENGINE'] = 'dj_db_conn_pool.backends.mysql'
+        _db['POOL_OPTIONS'] = {
+            'POOL_SIZE': int(ENV['DB_POOL_MIN_SIZE']),
+            'MAX_OVERFLOW': int(ENV['DB_POOL_MAX_SIZE']) - int(ENV['DB_POOL_MIN_SIZE']),
+            'TIMEOUT': int(ENV['DB_POOL_TIMEOUT']),
+            'RECYCLE': int(ENV['DB_POOL_RECYCLE']),
+        }
+    else:
+        raise ImproperlyConfigured(f"DB_POOL is not supported for {_db['ENGINE']}")
+
+
+# Django REST framework
+# https://www.django-rest-framework.org/api-guide/settings/
+
+# pagination is opt-in: only requests sending ?cursor= or ?page_size= are paginated
+REST_FRAMEWORK = {
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.KeysetPagination',
+    'DEFAULT_RENDERER_CLASSES': [
+        # orjson when installed, see api/renderers.py
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'PAGE_SIZE': int(ENV['API_PAGE_SIZE'])
 }
 
+API_MAX_PAGE_SIZE = int(ENV['API_MAX_PAGE_SIZE'])
+
+# serves the hot read endpoints with async views, see api/async_views.py
+# enabled by backend/asgi.py, under WSGI they would run through async_to_sync
+API_ASYNC_READS = env_flag(ENV['API_ASYNC_READS'])
+
+# maximum number of items accepted by the /api/tasks/bulk/ endpoints
+API_BULK_MAX_ITEMS = int(ENV['API_BULK_MAX_ITEMS'])
+
+# deepest subtask level returned by the tree representations, ?depth= may lower it
+TASK_TREE_MAX_DEPTH = int(ENV['TASK_TREE_MAX_DEPTH'])
+
+# seconds the cursor of /api/lists/<token>/changes/ lags behind, so that rows
+# saved by transactions still running when the feed is read are sent next time;
+# task writes must commit within it, imports commit batch by batch for that
+LIST_CHANGES_OVERLAP = int(ENV['LIST_CHANGES_OVERLAP'])
+
+# days deleted tasks are remembered by the change feed, older cursors must reload
+TASK_TOMBSTONE_RETENTION_DAYS = int(ENV['TASK_TOMBSTONE_RETENTION_DAYS'])
+
+
+# /api/search/ backend, see api/search.py: "fulltext" queries MySQL FULLTEXT
+# indexes, "index" an inverted index held by each process, "database" LIKE
+# queries, "auto" picks fulltext on MySQL and index elsewhere
+SEARCH_BACKEND = ENV['SEARCH_BACKEND']
+
+# deepest ranked result a search can page to
+SEARCH_MAX_RESULTS = int(ENV['SEARCH_MAX_RESULTS'])
+
+# seconds of overlap of the inverted index syncs, so that rows saved by
+# transactions still running during a sync are indexed by the next one
+SEARCH_INDEX_OVERLAP = int(ENV['SEARCH_INDEX_OVERLAP'])
+
+# rows of the searched tables the inverted index holds at most, each worker
+# keeps its own copy (about 1.4 GB and a 45 s build for a million tasks),
+# larger tables are searched with the "database" backend instead
+SEARCH_INDEX_MAX_ROWS = int(ENV['SEARCH_INDEX_MAX_ROWS'])
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# serialized list payloads, see api/cache.py
+# locmem evicts least recently used entries past MAX_ENTRIES, for redis
+# set LIST_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache and
+# configure the server with maxmemory-policy allkeys-lru
+LIST_CACHE_ALIAS = 'lists'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    LIST_CACHE_ALIAS: {
+        'BACKEND': ENV['LIST_CACHE_BACKEND'],
+        'LOCATION': ENV['LIST_CACHE_LOCATION'],
+        'TIMEOUT': int(ENV['LIST_CACHE_TIMEOUT']),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(ENV['LIST_CACHE_MAX_ENTRIES'])
+        }
+    }
+}
+
+
+# List events
+# pushed to /api/lists/<token>/events/ streams, see api/events.py
+# LocalBroker reaches the streams of the process publishing the change, with
+# several workers use LIST_EVENTS_BROKER=api.events.RedisBroker, as compose.yml does
+LIST_EVENTS_BROKER = ENV['LIST_EVENTS_BROKER']
+LIST_EVENTS_REDIS_URL = ENV['LIST_EVENTS_REDIS_URL']
+
+# seconds between keep-alive comments of idle streams
+LIST_EVENTS_HEARTBEAT = int(ENV['LIST_EVENTS_HEARTBEAT'])
+
+
+# Response compression
+# see core/middleware.py, brotli requires the brotli package
+
+# content codings in order of preference, empty disables compression
+COMPRESSION_ENCODINGS = [encoding.strip() for encoding in ENV['COMPRESSION_ENCODINGS'].split(',') if encoding.strip()]
+
+# bytes under which responses are sent as is, compressing them costs more than it saves
+COMPRESSION_MIN_SIZE = int(ENV['COMPRESSION_MIN_SIZE'])
+
+# the defaults favor speed, responses are compressed on the fly
+COMPRESSION_GZIP_LEVEL = int(ENV['COMPRESSION_GZIP_LEVEL'])
+COMPRESSION_BROTLI_QUALITY = int(ENV['COMPRESSION_BROTLI_QUALITY'])
+
+# compressed content types, event streams are left out
+COMPRESSION_TYPES = {content_type.strip() for content_type in ENV['COMPRESSION_TYPES'].split(',') if content_type.strip()}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
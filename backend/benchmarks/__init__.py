@@ -0,0 +1,26 @@
+"""Request level benchmarks, run from the backend directory with python -m benchmarks.<name>"""
+import os
+
+import django
+
+
+def setup():
+    """configures Django for a standalone benchmark and allows test client requests"""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+    django.setup()
+    from django.test.utils import setup_test_environment
+    setup_test_environment()
+
+
+def percentile(values, q):
+    """returns the q-th percentile of a list of timings
+
+    Args:
+        values (list[float]): timings
+        q (int): percentile, 0-100
+
+    Returns:
+        float: the percentile
+    """
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 20:09
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0004_alter_category_color'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='category',
+            options={'ordering': ['id']},
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:12
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0005_category_ordering'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='category',
+            options={},
+        ),
+    ]
@@ -1,7 +1,15 @@
 from rest_framework import serializers
+from core.serializers import DynamicFieldsMixin
 from .models import Category
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+class CategoryStatsSerializer(CategorySerializer):
+    """Category carrying the task counters annotated on the queryset, see api.views.with_task_stats()"""
+    task_count = serializers.IntegerField(read_only=True)
+    open_count = serializers.IntegerField(read_only=True)
+    overdue_count = serializers.IntegerField(read_only=True)
+    next_due_at = serializers.DateTimeField(read_only=True)
@@ -1,4 +1,5 @@
 import pytest
+from django.core.cache import caches
 from rest_framework.test import APIClient
 from datetime import datetime, timezone
 from lists.models import List
@@ -63,4 +64,10 @@ def api_client():
     Returns:
         APIClient: an api client for http(s) requests
     """
-    return APIClient()
\ No newline at end of file
+    return APIClient()
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """empties the caches so no payload leaks from one test to another"""
+    for cache in caches.all():
+        cache.clear()
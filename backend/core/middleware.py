@@ -0,0 +1,182 @@
+import gzip
+import zlib
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:  # optional, gzip only
+    brotli = None
+
+
+def available_encodings():
+    """the configured content codings this process can produce, in order of preference"""
+    return [
+        encoding for encoding in settings.COMPRESSION_ENCODINGS
+        if encoding == "gzip" or (encoding == "br" and brotli is not None)
+    ]
+
+
+def select_encoding(request):
+    """negotiates the content coding of a response from the Accept-Encoding header
+
+    Args:
+        request (HttpRequest): the request
+
+    Returns:
+        str | None: "br", "gzip", or None to send the response as is
+    """
+    accepted = {}
+    for item in request.headers.get("Accept-Encoding", "").split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            accepted[coding.lower()] = quality
+    wildcard = accepted.get("*", 0.0)
+    candidates = [(accepted.get(encoding, wildcard), encoding) for encoding in available_encodings()]
+    candidates = [(quality, encoding) for quality, encoding in candidates if quality > 0]
+    if not candidates:
+        return None
+    # the stable max keeps the configured order between equal qualities
+    return max(candidates, key=lambda candidate: candidate[0])[1]
+
+
+def compress_content(content, encoding):
+    """compresses a response body, unless it is too small to be worth it
+
+    Args:
+        content (bytes): the body
+        encoding (str | None): result of select_encoding()
+
+    Returns:
+        tuple[bytes, str | None]: the body and its content coding, None when sent as is
+    """
+    if encoding is None or len(content) < settings.COMPRESSION_MIN_SIZE:
+        return content, None
+    if encoding == "br":
+        compressed = brotli.compress(content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    else:
+        # a fixed mtime keeps the output stable for equal bodies
+        compressed = gzip.compress(content, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+    if len(compressed) >= len(content):
+        return content, None
+    return compressed, encoding
+
+
+class StreamCompressor:
+    """Compresses a stream chunk by chunk, each chunk is flushed so that clients receive it right away"""
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == "br":
+            self.compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+        else:
+            self.compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, chunk):
+        if isinstance(chunk, str):
+            chunk = chunk.encode()
+        if self.encoding == "br":
+            return self.compressor.process(chunk) + self.compressor.flush()
+        return self.compressor.compress(chunk) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.encoding == "br":
+            return self.compressor.finish()
+        return self.compressor.flush()
+
+
+def compress_stream(chunks, encoding):
+    """compresses the chunks of a streaming response
+
+    Args:
+        chunks (iterator[bytes | str]): the content
+        encoding (str): "br" or "gzip"
+
+    Yields:
+        bytes: compressed chunks
+    """
+    compressor = StreamCompressor(encoding)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def acompress_stream(chunks, encoding):
+    """compress_stream() for async streaming responses"""
+    compressor = StreamCompressor(encoding)
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def set_content_encoding(response, encoding):
+    """marks a response negotiated on Accept-Encoding, with the coding of its body
+
+    Args:
+        response (HttpResponse): the response
+        encoding (str | None): the content coding, None for a body sent as is
+    """
+    patch_vary_headers(response, ("Accept-Encoding",))
+    if encoding is not None:
+        response["Content-Encoding"] = encoding
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compresses responses with brotli or gzip, as negotiated through Accept-Encoding
+
+    Responses of COMPRESSION_TYPES over COMPRESSION_MIN_SIZE bytes are
+    compressed, streaming ones chunk by chunk. Responses already carrying a
+    Content-Encoding (e.g. precompressed cache entries) are left as they are.
+
+    Like GZipMiddleware, strong ETags of compressed responses are made weak.
+    Clients echo them in If-Match, whose comparison is strong: the W/ prefix
+    this middleware added is dropped from the request header.
+    """
+
+    def process_request(self, request):
+        if_match = request.META.get("HTTP_IF_MATCH")
+        if if_match and "W/" in if_match:
+            request.META["HTTP_IF_MATCH"] = if_match.replace('W/"', '"')
+
+    def process_response(self, request, response):
+        if not response.has_header("Content-Encoding"):
+            content_type = response.get("Content-Type", "").split(";")[0].strip()
+            if content_type not in settings.COMPRESSION_TYPES:
+                return response
+            if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+                return response
+            patch_vary_headers(response, ("Accept-Encoding",))
+            encoding = select_encoding(request)
+            if encoding is None:
+                return response
+            if response.streaming:
+                if response.is_async:
+                    response.streaming_content = acompress_stream(response.streaming_content, encoding)
+                else:
+                    response.streaming_content = compress_stream(response.streaming_content, encoding)
+                # unknown until streamed
+                del response.headers["Content-Length"]
+            else:
+                content, encoding = compress_content(response.content, encoding)
+                if encoding is None:
+                    return response
+                response.content = content
+                response["Content-Length"] = str(len(content))
+            response["Content-Encoding"] = encoding
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        return response
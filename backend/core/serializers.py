@@ -0,0 +1,301 @@
+import datetime
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+SAFE_METHODS = ("GET", "HEAD")
+
+# fields representing a database value as the value itself
+PLAIN_FIELDS = (serializers.CharField, serializers.IntegerField, serializers.BooleanField)
+
+# ids per query when reading many to many links
+VALUES_BATCH_SIZE = 2000
+
+
+def parse_field_paths(value):
+    """parses a comma separated list of dotted field paths into a tree
+
+    Args:
+        value (str): e.g. "id,name,tasks.id"
+
+    Returns:
+        dict: e.g. {"id": {}, "name": {}, "tasks": {"id": {}}}
+    """
+    tree = {}
+    for path in value.split(","):
+        node = tree
+        for name in path.strip().split("."):
+            if name:
+                node = node.setdefault(name, {})
+    return tree
+
+
+class DynamicFieldsMixin:
+    """Serializer mixin trimming fields with ?fields= and expanding relations with ?expand=
+
+    ?fields=id,name keeps the listed fields, dotted paths (tasks.id) select the
+    fields of nested serializers; a serializer without a selection keeps all
+    its fields. ?expand=categories renders a relation listed in
+    expandable_fields ({name: serializer class}) as objects instead of ids,
+    tasks.categories expands it at one level only. Both only apply to reads,
+    writes always see every field.
+    """
+
+    expandable_fields = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get("request")
+        self.trimmed = False
+        if request is None or request.method not in SAFE_METHODS:
+            return fields
+        path = self.field_path()
+
+        selection = parse_field_paths(request.query_params.get("fields", ""))
+        for name in path:
+            selection = selection.get(name, {})
+        if selection:
+            unknown = set(selection) - set(fields)
+            if unknown:
+                label = ".".join(path + [sorted(unknown)[0]])
+                raise serializers.ValidationError({"fields": [f'Unknown field "{label}".']})
+            fields = {name: field for name, field in fields.items() if name in selection}
+            self.trimmed = True
+
+        expand = {name.strip() for name in request.query_params.get("expand", "").split(",")}
+        for name, serializer_class in self.expandable_fields.items():
+            if name in fields and (name in expand or ".".join(path + [name]) in expand):
+                many = isinstance(fields[name], serializers.ManyRelatedField)
+                fields[name] = serializer_class(many=many, read_only=True, source=fields[name].source)
+        return fields
+
+    def field_path(self):
+        """names of the fields leading from the root serializer to this one"""
+        path = []
+        node = self
+        while node is not None:
+            if node.field_name:
+                path.append(node.field_name)
+            node = node.parent
+        return path[::-1]
+
+    def model_fields(self, *required):
+        """columns a queryset has to load for the selected fields
+
+        Args:
+            required (str): model fields loaded anyway, e.g. the foreign key of a prefetch
+
+        Returns:
+            list[str] | None: field names for QuerySet.only(), None when the serializer is not trimmed
+        """
+        fields = self.fields
+        if not self.trimmed:
+            return None
+        opts = self.Meta.model._meta
+        names = {opts.pk.name, *required}
+        for field in fields.values():
+            try:
+                model_field = opts.get_field(field.source)
+            except FieldDoesNotExist:
+                continue
+            if model_field.concrete and not model_field.many_to_many:
+                names.add(model_field.name)
+        return sorted(names)
+
+
+def only_selected(queryset, serializer, *required):
+    """restricts the columns of a queryset to the fields selected by ?fields=
+
+    Args:
+        queryset (QuerySet): the queryset
+        serializer (DynamicFieldsMixin): a serializer built with the request context
+        required (str): model fields loaded anyway
+
+    Returns:
+        QuerySet: the queryset
+    """
+    columns = serializer.model_fields(*required)
+    return queryset if columns is None else queryset.only(*columns)
+
+
+class CachedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key field reading related objects from the serializer context
+
+    Bulk serializers store the objects they preloaded in context["related_cache"]
+    ({model: {pk: object}}), which saves one query per item. Without a cache the
+    field behaves like PrimaryKeyRelatedField.
+    """
+
+    def to_internal_value(self, data):
+        model = self.queryset.model
+        cache = self.context.get("related_cache", {}).get(model)
+        if cache is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            pk = model._meta.pk.to_python(data)
+        except DjangoValidationError:
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        if pk not in cache:
+            self.fail("does_not_exist", pk_value=data)
+        return cache[pk]
+
+
+def preload_related(serializer, items):
+    """fetches the related objects referenced by many items, one query per model
+
+    Args:
+        serializer (Serializer): the child serializer the items will be validated with
+        items (list[dict]): raw items
+
+    Returns:
+        dict: {model: {pk: object}}, to be stored in context["related_cache"]
+    """
+    wanted = {}
+    for name, field in serializer.fields.items():
+        many = isinstance(field, serializers.ManyRelatedField)
+        relation = field.child_relation if many else field
+        if field.read_only or not isinstance(relation, CachedPrimaryKeyRelatedField):
+            continue
+        queryset, pks = wanted.setdefault(relation.queryset.model, (relation.queryset, set()))
+        for item in items:
+            if not isinstance(item, dict) or item.get(name) is None:
+                continue
+            values = item[name] if many else [item[name]]
+            if not isinstance(values, list):
+                continue
+            for value in values:
+                try:
+                    pks.add(queryset.model._meta.pk.to_python(value))
+                except (DjangoValidationError, TypeError):
+                    pass
+    return {
+        model: queryset.in_bulk(pks) if pks else {}
+        for model, (queryset, pks) in wanted.items()
+    }
+
+
+def values_plan(serializer):
+    """maps the fields of a model serializer to the columns they represent
+
+    Args:
+        serializer (ModelSerializer): the serializer, trimmed or not
+
+    Returns:
+        list[tuple] | None: (name, kind, source, field) for every field, kind
+        being "column", "datetime" or "many"; None when a field needs the
+        model instance (nested serializers, methods, custom fields...)
+    """
+    opts = serializer.Meta.model._meta
+    plan = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        try:
+            model_field = opts.get_field(field.source)
+        except FieldDoesNotExist:
+            return None
+        if isinstance(field, serializers.ManyRelatedField):
+            relation = field.child_relation
+            if not isinstance(relation, serializers.PrimaryKeyRelatedField) or relation.pk_field is not None:
+                return None
+            # related ids are read from the through table in id order, instance
+            # paths prefetch them the same way, see tasks.models.categories_by_id()
+            plan.append((name, "many", model_field, field))
+        elif isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None and model_field.concrete:
+            plan.append((name, "column", model_field.attname, field))
+        elif type(field) is serializers.DateTimeField and model_field.concrete:
+            if getattr(field, "format", api_settings.DATETIME_FORMAT) != api_settings.DATETIME_FORMAT:
+                return None
+            plan.append((name, "datetime", model_field.attname, field))
+        elif type(field) in PLAIN_FIELDS and model_field.concrete:
+            plan.append((name, "column", model_field.attname, field))
+        else:
+            return None
+    return plan
+
+
+def format_datetimes(field, values):
+    """formats a column of datetimes the way field.to_representation() does
+
+    Args:
+        field (DateTimeField): the serializer field
+        values (iterable[datetime]): the column
+
+    Returns:
+        list[str | None]: the formatted values
+    """
+    zone = field.timezone if hasattr(field, "timezone") else field.default_timezone()
+    if api_settings.DATETIME_FORMAT.lower() != "iso-8601" or zone is None or zone.utcoffset(None) != datetime.timedelta(0):
+        return [field.to_representation(value) for value in values]
+    # in UTC the representation is the isoformat of the stored value
+    formatted = []
+    for value in values:
+        if not value:
+            formatted.append(None)
+        elif value.utcoffset() == datetime.timedelta(0):
+            text = value.isoformat()
+            formatted.append(text[:-6] + "Z" if text.endswith("+00:00") else text)
+        else:
+            formatted.append(field.to_representation(value))
+    return formatted
+
+
+def serialize_values(serializer, queryset):
+    """serializes a queryset like serializer(queryset, many=True).data, from value tuples
+
+    Rows are read with values_list() and formatted column by column instead of
+    building model instances and running every field on each of them. Many to
+    many ids are read from the through table.
+
+    Args:
+        serializer (ModelSerializer): the child serializer
+        queryset (QuerySet): the rows, in order
+
+    Returns:
+        list[dict] | None: the representation, None when values_plan() has no plan
+    """
+    plan = values_plan(serializer)
+    if plan is None:
+        return None
+    opts = serializer.Meta.model._meta
+    sources = [source for _, kind, source, _ in plan if kind != "many"]
+    rows = list(queryset.prefetch_related(None).values_list(opts.pk.attname, *sources))
+    if not rows:
+        return []
+    ids, *columns = zip(*rows)
+    columns = iter(columns)
+
+    output = []
+    for name, kind, source, field in plan:
+        if kind == "many":
+            output.append((name, many_to_many_ids(source, ids)))
+            continue
+        column = next(columns)
+        if kind == "datetime":
+            column = format_datetimes(field, column)
+        output.append((name, column))
+    names = [name for name, _ in output]
+    return [dict(zip(names, values)) for values in zip(*(column for _, column in output))]
+
+
+def many_to_many_ids(model_field, ids):
+    """reads the related ids of many rows from a many to many through table
+
+    Args:
+        model_field (ManyToManyField): the relation
+        ids (list): ids of the rows
+
+    Returns:
+        list[list]: related ids of every row, in the order of ids
+    """
+    through = model_field.remote_field.through
+    source = f"{model_field.m2m_field_name()}_id"
+    target = f"{model_field.m2m_reverse_field_name()}_id"
+    related = {pk: [] for pk in ids}
+    for start in range(0, len(ids), VALUES_BATCH_SIZE):
+        links = through.objects.filter(**{f"{source}__in": ids[start:start + VALUES_BATCH_SIZE]})
+        for pk, related_pk in links.order_by(target).values_list(source, target):
+            related[pk].append(related_pk)
+    return [related[pk] for pk in ids]
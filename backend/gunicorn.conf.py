@@ -0,0 +1,84 @@
+"""Gunicorn configuration, loaded with gunicorn -c gunicorn.conf.py
+
+GUNICORN_WORKER_CLASS selects the serving mode:
+    uvicorn  (default) ASGI app (backend.asgi), requires uvicorn-worker, the
+             only mode serving the list event streams
+    gevent   WSGI app, one greenlet per request, blocking PyMySQL calls yield
+             to other requests once the stdlib is monkey-patched
+    gthread  WSGI app, a thread pool per worker
+    sync     WSGI app, one request at a time per worker
+"""
+import importlib.util
+import multiprocessing
+import os
+
+worker_mode = os.getenv("GUNICORN_WORKER_CLASS", "uvicorn")
+
+if worker_mode == "gevent":
+    # patch before anything imports socket / threading, the gevent worker only
+    # patches once the worker starts, after the master imported this module
+    from gevent import monkey
+    monkey.patch_all()
+    # Django connections are greenlet-local under gevent: a persistent connection
+    # would outlive its greenlet, close them at the end of each request instead
+    os.environ.setdefault("DB_CONN_MAX_AGE", "0")
+
+if worker_mode in ("gevent", "uvicorn") and (os.getenv("DATABASE_URL") or os.getenv("DB_URL") or "").startswith("mysql"):
+    # neither mode keeps a connection per thread (see above and backend/asgi.py):
+    # the process wide pool of django-db-connection-pool reuses them instead
+    os.environ.setdefault("DB_POOL", "true")
+
+cpu_count = multiprocessing.cpu_count()
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+wsgi_app = "backend.wsgi:application"
+
+if worker_mode == "gevent":
+    worker_class = "gevent"
+    workers = int(os.getenv("GUNICORN_WORKERS", cpu_count + 1))
+    worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 1000))
+elif worker_mode == "uvicorn":
+    if importlib.util.find_spec("uvicorn_worker") is not None:
+        worker_class = "uvicorn_worker.UvicornWorker"
+    elif importlib.util.find_spec("uvicorn") is not None:
+        worker_class = "uvicorn.workers.UvicornWorker"
+    else:
+        raise RuntimeError("GUNICORN_WORKER_CLASS=uvicorn requires uvicorn-worker")
+    wsgi_app = "backend.asgi:application"
+    workers = int(os.getenv("GUNICORN_WORKERS", cpu_count + 1))
+elif worker_mode == "gthread":
+    worker_class = "gthread"
+    workers = int(os.getenv("GUNICORN_WORKERS", cpu_count + 1))
+    threads = int(os.getenv("GUNICORN_THREADS", cpu_count * 2))
+elif worker_mode == "sync":
+    worker_class = "sync"
+    workers = int(os.getenv("GUNICORN_WORKERS", cpu_count * 2 + 1))
+else:
+    raise RuntimeError(f"Unknown GUNICORN_WORKER_CLASS {worker_mode!r}")
+
+# seconds an idle client connection is kept open, behind a proxy this must
+# exceed the proxy upstream keep-alive
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+
+# workers are recycled after max_requests (+ up to jitter) requests to bound
+# memory growth, the jitter keeps them from restarting all at once
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 100))
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+
+
+def post_worker_init(worker):
+    """builds the in-process search index before the worker takes requests, see api/search.py"""
+    from django.db import connections
+    from api.search import warm_up
+    try:
+        warm_up()
+    except Exception:
+        # the first search builds it then
+        worker.log.exception("Search index warm-up failed")
+    finally:
+        connections.close_all()
@@ -1,9 +1,25 @@
 from rest_framework import serializers
+from core.serializers import DynamicFieldsMixin
 from tasks.serializers import TaskSerializer
 from .models import List
 
-class ListSerializer(serializers.ModelSerializer):
+class ListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     tasks = TaskSerializer(many=True, read_only=True)
     class Meta:
         model = List
-        fields = ["id", "public_token", "name", "description", "priority", "created_at", "updated_at", "tasks"]
\ No newline at end of file
+        fields = ["id", "public_token", "name", "description", "priority", "created_at", "updated_at", "tasks"]
+
+class ListHeaderSerializer(ListSerializer):
+    """List fields without the tasks, for payloads that send tasks separately"""
+    tasks = None
+    class Meta(ListSerializer.Meta):
+        fields = [field for field in ListSerializer.Meta.fields if field != "tasks"]
+
+class ListSummarySerializer(serializers.ModelSerializer):
+    """List without its tasks, carrying the task counters annotated on the queryset"""
+    task_count = serializers.IntegerField(read_only=True)
+    done_count = serializers.IntegerField(read_only=True)
+    overdue_count = serializers.IntegerField(read_only=True)
+    class Meta:
+        model = List
+        fields = ["id", "public_token", "name", "priority", "task_count", "done_count", "overdue_count"]
@@ -0,0 +1,40 @@
+import unicodedata
+
+
+def collation_key(name):
+    """sorts names case and accent insensitively, close to a French locale comparison"""
+    decomposed = unicodedata.normalize("NFKD", name)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold(), name
+
+
+def group_by_category(items, categories):
+    """groups serialized tasks by category in a single pass
+
+    A task is listed in each of its categories, tasks without one in a group
+    whose category is None. Groups holding an open task come first, then
+    groups are sorted by category name, the uncategorized group last.
+
+    Args:
+        items (list[dict]): serialized tasks carrying done and categories (ids or expanded objects), in display order
+        categories (dict[int, dict]): serialized categories by id
+
+    Returns:
+        list[dict]: {"category", "open_count", "tasks"} groups, tasks kept in display order
+    """
+    groups = {}
+    for item in items:
+        ids = [category["id"] if isinstance(category, dict) else category for category in item["categories"]]
+        for pk in ids or (None,):
+            group = groups.get(pk)
+            if group is None:
+                group = groups[pk] = {"category": categories.get(pk), "open_count": 0, "tasks": []}
+            group["tasks"].append(item)
+            if not item["done"]:
+                group["open_count"] += 1
+
+    def order(group):
+        category = group["category"]
+        if category is None:
+            return not group["open_count"], True, ("", ""), 0
+        return not group["open_count"], False, collation_key(category["name"]), category["id"]
+    return sorted(groups.values(), key=order)
@@ -0,0 +1,215 @@
+import csv
+import io
+import json
+import re
+from contextlib import nullcontext
+from django.conf import settings
+from django.db import transaction
+from categories.models import Category
+from .serializers import TaskSerializer
+
+IMPORT_BATCH_SIZE = 500
+# errors past this count are counted but not listed, so the report stays small
+IMPORT_MAX_REPORTED_ERRORS = 1000
+FORMATS = ("jsonl", "json", "csv")
+
+WHITESPACE_RE = re.compile(r"\s*")
+
+
+class RowError(Exception):
+    """A row that could not be parsed"""
+
+
+def detect_format(name, declared=None):
+    """picks the import format from an explicit value or the file name
+
+    Args:
+        name (str): file name
+        declared (str): format requested by the caller
+
+    Raises:
+        ValueError: the format is unknown
+
+    Returns:
+        str: "jsonl", "json" (an array of objects) or "csv"
+    """
+    value = (declared or name.rsplit(".", 1)[-1]).lower()
+    if value == "ndjson":
+        value = "jsonl"
+    if value not in FORMATS:
+        raise ValueError(f"Unsupported format, expected one of {', '.join(FORMATS)}.")
+    return value
+
+
+def read_rows(stream, file_format):
+    """parses an uploaded file lazily, one row at a time
+
+    Args:
+        stream (file): binary file object
+        file_format (str): "jsonl", "json" or "csv"
+
+    Yields:
+        tuple[int, dict | RowError]: the line of the file each row ends on (starts
+        on for a JSON array), and the parsed row
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if file_format == "json":
+        yield from read_json_array(text.read())
+        return
+    if file_format == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            # empty cells fall back to the model defaults
+            row = {key: value for key, value in row.items() if key and value not in ("", None)}
+            if "categories" in row:
+                row["categories"] = [item for item in row["categories"].split(";") if item]
+            yield reader.line_num, row
+        return
+    for number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield number, RowError(f"Invalid JSON: {e}")
+            continue
+        yield number, row if isinstance(row, dict) else RowError("Expected a JSON object.")
+
+
+def read_json_array(content):
+    """parses a JSON array of objects item by item, so that one broken item is reported at its line
+
+    Args:
+        content (str): the file
+
+    Yields:
+        tuple[int, dict | RowError]: the line each item starts on, and the parsed item
+    """
+    decoder = json.JSONDecoder()
+    line, counted = 1, 0
+
+    def line_at(position):
+        nonlocal line, counted
+        line += content.count("\n", counted, position)
+        counted = position
+        return line
+
+    position = WHITESPACE_RE.match(content).end()
+    if content[position:position + 1] != "[":
+        yield line_at(position), RowError("Expected a JSON array of objects.")
+        return
+    position = WHITESPACE_RE.match(content, position + 1).end()
+    if content[position:position + 1] == "]":
+        return
+    while True:
+        start = position
+        try:
+            row, position = decoder.raw_decode(content, start)
+        except ValueError as e:
+            # the rest of the array cannot be delimited
+            yield line_at(start), RowError(f"Invalid JSON: {e}")
+            return
+        yield line_at(start), row if isinstance(row, dict) else RowError("Expected a JSON object.")
+        position = WHITESPACE_RE.match(content, position).end()
+        separator = content[position:position + 1]
+        if separator == "]":
+            return
+        if separator != ",":
+            yield line_at(position), RowError("Invalid JSON: expected , or ] after an item of the array.")
+            return
+        position = WHITESPACE_RE.match(content, position + 1).end()
+
+
+def resolve_categories(items):
+    """replaces category names by ids, with one lookup for the whole batch
+
+    Numeric values that match no name are kept as ids.
+
+    Args:
+        items (list[dict]): rows of a batch, modified in place
+
+    Returns:
+        dict: {index: errors} for rows naming unknown categories
+    """
+    names = {
+        value for item in items for value in item.get("categories") or []
+        if isinstance(value, str)
+    } if items else set()
+    ids = dict(Category.objects.filter(name__in=names).values_list("name", "id")) if names else {}
+    errors = {}
+    for index, item in enumerate(items):
+        values = item.get("categories")
+        if not isinstance(values, list):
+            continue
+        resolved = []
+        for value in values:
+            if isinstance(value, str) and value in ids:
+                resolved.append(ids[value])
+            elif isinstance(value, int) or (isinstance(value, str) and value.isdigit()):
+                resolved.append(int(value))
+            else:
+                errors.setdefault(index, {"categories": []})["categories"].append(f'Category "{value}" does not exist.')
+        item["categories"] = resolved
+    return errors
+
+
+def import_tasks(todo_list, rows, batch_size=IMPORT_BATCH_SIZE, dry_run=False):
+    """validates and inserts rows into a list, batch by batch
+
+    Valid rows are inserted, invalid ones are reported with their line in the file.
+    Each batch commits on its own: rows are stamped with updated_at when saved,
+    and a transaction outliving LIST_CHANGES_OVERLAP would commit them behind
+    the change feed cursors handed out meanwhile. A dry run runs in one
+    transaction, rolled back.
+
+    Args:
+        todo_list (List): the list receiving the tasks
+        rows (iterable[tuple[int, dict | RowError]]): line numbers and parsed rows, see read_rows()
+        batch_size (int): rows validated and inserted together
+        dry_run (bool): validate and insert, then roll back
+
+    Returns:
+        dict: created and failed counts, and the reported errors
+    """
+    report = {"created": 0, "failed": 0, "errors": [], "dry_run": dry_run}
+    batch_size = max(1, min(batch_size, settings.API_BULK_MAX_ITEMS))
+
+    def fail(row_number, errors):
+        report["failed"] += 1
+        if len(report["errors"]) < IMPORT_MAX_REPORTED_ERRORS:
+            report["errors"].append({"row": row_number, "errors": errors})
+
+    def flush(batch):
+        numbers = [number for number, _ in batch]
+        items = [row for _, row in batch]
+        for item in items:
+            item["list"] = todo_list.pk
+        rejected = resolve_categories(items)
+        pending = [index for index in range(len(items)) if index not in rejected]
+        # invalid rows are dropped and the rest validated again, until the batch is clean
+        while pending:
+            serializer = TaskSerializer(data=[items[index] for index in pending], many=True)
+            if serializer.is_valid():
+                report["created"] += len(serializer.save())
+                break
+            invalid = {pending[position]: errors for position, errors in enumerate(serializer.errors) if errors}
+            rejected.update(invalid)
+            pending = [index for index in pending if index not in invalid]
+        for index in sorted(rejected):
+            fail(numbers[index], rejected[index])
+
+    with transaction.atomic() if dry_run else nullcontext():
+        batch = []
+        for number, row in rows:
+            if isinstance(row, RowError):
+                fail(number, {"non_field_errors": [str(row)]})
+                continue
+            batch.append((number, row))
+            if len(batch) == batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+        if dry_run:
+            transaction.set_rollback(True)
+    return report
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from lists.models import List
+from tasks.imports import IMPORT_BATCH_SIZE, detect_format, import_tasks, read_rows
+
+
+class Command(BaseCommand):
+    help = "Imports tasks into a list from a JSON Lines, JSON array or CSV file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("token", help="public token of the receiving list")
+        parser.add_argument("path", help="file to import")
+        parser.add_argument("--format", choices=["jsonl", "json", "csv"], help="defaults to the file extension")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument("--dry-run", action="store_true", help="validate without writing anything")
+
+    def handle(self, *args, **options):
+        todo_list = List.objects.filter(public_token=options["token"]).first()
+        if todo_list is None:
+            raise CommandError(f'List "{options["token"]}" does not exist.')
+        try:
+            file_format = detect_format(options["path"], options["format"])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        with open(options["path"], "rb") as stream:
+            report = import_tasks(
+                todo_list,
+                read_rows(stream, file_format),
+                batch_size=options["batch_size"],
+                dry_run=options["dry_run"],
+            )
+
+        for error in report["errors"]:
+            self.stderr.write(f'row {error["row"]}: {error["errors"]}')
+        verb = "would be created" if options["dry_run"] else "created"
+        self.stdout.write(self.style.SUCCESS(f'{report["created"]} tasks {verb}, {report["failed"]} rows failed'))
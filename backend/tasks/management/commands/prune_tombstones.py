@@ -0,0 +1,17 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from tasks.models import TaskTombstone
+
+
+class Command(BaseCommand):
+    help = "Deletes the task tombstones older than the change feed retention"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.TASK_TOMBSTONE_RETENTION_DAYS)
+
+    def handle(self, *args, **options):
+        horizon = timezone.now() - timedelta(days=options["days"])
+        deleted, _ = TaskTombstone.objects.filter(deleted_at__lt=horizon).delete()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} tombstones deleted"))
@@ -0,0 +1,142 @@
+import random
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from categories.models import Category
+from lists.models import List
+from tasks.models import PATH_SEPARATOR, Task
+
+# names of the seeded lists and categories start with it, see --clear
+BENCH_PREFIX = "bench"
+
+# words task names and descriptions are drawn from, searchable by benchmarks.search
+WORDS = (
+    "courses", "rapport", "réunion", "facture", "jardin", "voyage", "projet", "lecture",
+    "sport", "budget", "cuisine", "dossier", "appel", "client", "livraison", "révision",
+    "ménage", "banque", "garage", "dentiste", "impôts", "planning", "relance", "colis",
+)
+
+COLORS = ("#E53935", "#8E24AA", "#1E88E5", "#00897B", "#7CB342", "#FDD835", "#FB8C00", "#6D4C41")
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = "Seeds lists, tasks (with subtask trees) and categories for the benchmarks, with bulk inserts"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lists", type=int, default=20)
+        parser.add_argument("--tasks", type=int, default=5000, help="tasks in all, spread over the lists")
+        parser.add_argument("--categories", type=int, default=12)
+        parser.add_argument("--categories-per-task", type=int, default=2, help="most categories of a task, some get none")
+        parser.add_argument("--subtasks", type=float, default=0.4, help="share of the tasks that are subtasks")
+        parser.add_argument("--depth", type=int, default=4, help="deepest subtask level")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--clear", action="store_true", help="deletes the previously seeded data first")
+
+    def handle(self, *args, **options):
+        if min(options["lists"], options["categories"]) < 1 or options["tasks"] < 0:
+            raise CommandError("--lists and --categories must be positive, --tasks not negative.")
+        if not 0 <= options["subtasks"] < 1 or options["depth"] < 1:
+            raise CommandError("--subtasks must be in [0, 1) and --depth positive.")
+        rng = random.Random(options["seed"])
+        now = timezone.now()
+
+        with transaction.atomic():
+            seeded = List.objects.filter(name__startswith=f"{BENCH_PREFIX} ")
+            if options["clear"]:
+                seeded.delete()
+                Category.objects.filter(name__startswith=f"{BENCH_PREFIX} ").delete()
+            elif seeded.exists():
+                raise CommandError("Benchmark data is already seeded, pass --clear to replace it.")
+
+            categories = self.create_categories(options["categories"])
+            lists = self.create_lists(options["lists"], rng)
+            tasks = self.create_tasks(lists, options, rng, now)
+            links = self.link_categories(tasks, categories, options["categories_per_task"], rng)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(lists)} lists, {len(tasks)} tasks, {len(categories)} categories and {links} category links created"
+        ))
+
+    def create_categories(self, count):
+        categories = [
+            Category(name=f"{BENCH_PREFIX} {WORDS[n % len(WORDS)]} {n}", description=WORDS[n % len(WORDS)], color=COLORS[n % len(COLORS)])
+            for n in range(count)
+        ]
+        Category.objects.bulk_create(categories, batch_size=BATCH_SIZE)
+        return list(Category.objects.filter(name__in=[category.name for category in categories]))
+
+    def create_lists(self, count, rng):
+        lists = [
+            List(name=f"{BENCH_PREFIX} {n}", description=" ".join(rng.sample(WORDS, 3)), priority=rng.randint(1, 5))
+            for n in range(count)
+        ]
+        List.objects.bulk_create(lists, batch_size=BATCH_SIZE)
+        return list(List.objects.filter(public_token__in=[todo_list.public_token for todo_list in lists]))
+
+    def create_tasks(self, lists, options, rng, now):
+        """inserts the tasks level by level, each subtask under a task of the level above in its list
+
+        Args:
+            lists (list[List]): the seeded lists
+            options (dict): command options
+            rng (random.Random): seeded generator
+            now (datetime): due dates are spread around it
+
+        Returns:
+            list[Task]: the tasks, with their ids and paths
+        """
+        roots = round(options["tasks"] * (1 - options["subtasks"]))
+        sizes = [roots] + spread(options["tasks"] - roots, options["depth"])
+        created = []
+        parents = []
+        for level, size in enumerate(sizes):
+            if not size:
+                break
+            batch = []
+            for _ in range(size):
+                n = len(created) + len(batch)
+                parent = rng.choice(parents) if level else None
+                batch.append(Task(
+                    name=f"{rng.choice(WORDS)} {rng.choice(WORDS)} {n}",
+                    description=" ".join(rng.sample(WORDS, rng.randint(1, 6))),
+                    priority=rng.randint(1, 5),
+                    done=rng.random() < 0.3,
+                    due_at=now + timedelta(minutes=rng.randint(-30 * 24 * 60, 60 * 24 * 60)),
+                    list=parent.list if parent else rng.choice(lists),
+                    parent=parent,
+                ))
+            self.insert(batch)
+            created.extend(batch)
+            parents = batch
+        return created
+
+    def insert(self, tasks):
+        """bulk inserts tasks and stores their paths, their parents must be inserted already"""
+        Task.objects.bulk_create(tasks, batch_size=BATCH_SIZE)
+        if not connection.features.can_return_rows_from_bulk_insert:
+            # MySQL does not hand back the new ids, names are unique so look them up
+            ids = dict(Task.objects.filter(name__in=[task.name for task in tasks]).values_list("name", "id"))
+            for task in tasks:
+                task.pk = ids[task.name]
+        for task in tasks:
+            parent_path = task.parent.path if task.parent else ""
+            task.path = f"{parent_path}{task.pk}{PATH_SEPARATOR}"
+        Task.objects.bulk_update(tasks, ["path"], batch_size=BATCH_SIZE)
+
+    def link_categories(self, tasks, categories, most, rng):
+        through = Task.categories.through
+        links = [
+            through(task_id=task.pk, category_id=category.pk)
+            for task in tasks
+            for category in rng.sample(categories, min(len(categories), rng.randint(0, most)))
+        ]
+        through.objects.bulk_create(links, batch_size=BATCH_SIZE)
+        return len(links)
+
+
+def spread(total, parts):
+    """splits a total into parts differing by one at most, largest first"""
+    return [total // parts + (1 if index < total % parts else 0) for index in range(parts)]
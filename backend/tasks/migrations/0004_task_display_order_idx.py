@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0004_alter_category_color'),
+        ('lists', '0003_alter_list_public_token'),
+        ('tasks', '0003_alter_task_list'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['done', '-priority', 'due_at', 'id'], name='task_display_order_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0004_alter_category_color'),
+        ('lists', '0003_alter_list_public_token'),
+        ('tasks', '0004_task_display_order_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['list', 'done', 'priority', 'due_at'], name='task_list_filter_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:52
+
+from django.db import migrations, models
+
+
+def fill_paths(apps, schema_editor):
+    """computes the materialized path of every existing task"""
+    Task = apps.get_model('tasks', 'Task')
+    parents = dict(Task.objects.values_list('id', 'parent_id'))
+    paths = {}
+
+    def path_of(pk):
+        chain = []
+        while pk is not None and pk not in paths and pk not in chain:
+            chain.append(pk)
+            pk = parents.get(pk)
+        prefix = paths.get(pk, '')
+        for node in reversed(chain):
+            prefix = paths[node] = f'{prefix}{node}/'
+        return paths[chain[0]] if chain else prefix
+
+    tasks = [Task(id=pk, path=path_of(pk)) for pk in parents]
+    Task.objects.bulk_update(tasks, ['path'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_task_list_filter_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=512),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+    ]
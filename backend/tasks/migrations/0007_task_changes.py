@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 20:04
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0004_alter_category_color'),
+        ('lists', '0003_alter_list_public_token'),
+        ('tasks', '0006_task_path'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['list', 'updated_at'], name='task_list_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='tasktombstone',
+            name='list',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tombstones', to='lists.list'),
+        ),
+        migrations.AddIndex(
+            model_name='tasktombstone',
+            index=models.Index(fields=['list', 'deleted_at'], name='tombstone_list_deleted_idx'),
+        ),
+    ]
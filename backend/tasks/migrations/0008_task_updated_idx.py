@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 20:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0005_category_ordering'),
+        ('lists', '0003_alter_list_public_token'),
+        ('tasks', '0007_task_changes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['updated_at'], name='task_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 20:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0005_category_ordering'),
+        ('lists', '0003_alter_list_public_token'),
+        ('tasks', '0008_task_updated_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['done', 'due_at'], name='task_open_due_idx'),
+        ),
+    ]
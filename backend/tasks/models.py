@@ -1,4 +1,20 @@
 from django.db import models
+from django.db.models import Prefetch, Value
+from django.utils import timezone
+from django.db.models.functions import Concat, Length, Replace, Substr
+from categories.models import Category
+
+PATH_SEPARATOR = "/"
+
+# order tasks are displayed in, id last so that it is total
+DISPLAY_ORDER = ("done", "-priority", "due_at", "id")
+
+
+def categories_by_id():
+        """prefetches the categories of tasks in id order, the order core.serializers.serialize_values() reads them in"""
+        return Prefetch("categories", queryset=Category.objects.order_by("id"))
+
+
 class Task(models.Model):
         name = models.CharField(max_length=30, null=False, unique=True)
         description = models.CharField(max_length=200)
@@ -19,6 +35,129 @@ class Task(models.Model):
         )
         parent = models.ForeignKey("self", verbose_name="Parent task", on_delete=models.CASCADE, related_name="subtasks", null=True, blank=True)
         categories = models.ManyToManyField("categories.Category", related_name="tasks", blank=True)
+
+        # materialized path of ancestor ids down to this task, e.g. "1/5/12/"
+        # a subtree is the range of paths starting with its root path
+        path = models.CharField(max_length=512, editable=False, default="", db_index=True)
         
+        class Meta:
+                indexes = [
+                        # matches the display order, used by keyset pagination
+                        models.Index(fields=["done", "-priority", "due_at", "id"], name="task_display_order_idx"),
+                        # serves the list / done / priority / due range filters
+                        models.Index(fields=["list", "done", "priority", "due_at"], name="task_list_filter_idx"),
+                        # serves the list change feed, tasks updated since a cursor
+                        models.Index(fields=["list", "updated_at"], name="task_list_updated_idx"),
+                        # serves the search index sync, tasks updated since a cursor in any list
+                        models.Index(fields=["updated_at"], name="task_updated_idx"),
+                        # serves the agenda, open tasks by due date across lists
+                        models.Index(fields=["done", "due_at"], name="task_open_due_idx"),
+                ]
+
+        @classmethod
+        def from_db(cls, db, field_names, values):
+                instance = super().from_db(db, field_names, values)
+                # stored values, to detect tasks moving between lists or parents
+                instance._loaded_values = dict(zip(field_names, values))
+                return instance
+
+        def save(self, *args, **kwargs):
+                super().save(*args, **kwargs)
+                update_fields = kwargs.get("update_fields")
+                if update_fields is None or "parent" in update_fields or "parent_id" in update_fields:
+                        self.sync_path()
+                if hasattr(self, "_loaded_values"):
+                        # post_save receivers compared with the list the task was loaded from, it is current now
+                        self._loaded_values["list_id"] = self.list_id
+
+        def build_path(self):
+                """builds the path of the task from the path of its parent
+
+                Returns:
+                        str: the materialized path
+                """
+                parent_path = ""
+                if self.parent_id is not None:
+                        if Task.parent.is_cached(self) and self.parent.path:
+                                parent_path = self.parent.path
+                        else:
+                                parent_path = Task.objects.filter(pk=self.parent_id).values_list("path", flat=True).first() or ""
+                return f"{parent_path}{self.pk}{PATH_SEPARATOR}"
+
+        def sync_path(self):
+                """stores the path of the task and rewrites its descendants after a reparent"""
+                loaded_parent = getattr(self, "_loaded_values", {}).get("parent_id", self.parent_id)
+                if self.path and loaded_parent == self.parent_id:
+                        return
+                self.set_path(self.build_path())
+
+        def set_path(self, path):
+                """stores a new path for the task and rewrites the paths of its descendants
+
+                Args:
+                        path (str): the materialized path
+                """
+                old = self.path
+                if old != path:
+                        Task.objects.filter(pk=self.pk).update(path=path)
+                        if old:
+                                Task.objects.filter(path__startswith=old).exclude(pk=self.pk).update(
+                                        path=Concat(Value(path), Substr("path", len(old) + 1))
+                                )
+                        self.path = path
+                if hasattr(self, "_loaded_values"):
+                        self._loaded_values["parent_id"] = self.parent_id
+
+        def descendants(self, include_self=False):
+                """returns the subtree of the task with one range scan on the path index
+
+                Args:
+                        include_self (bool): whether the task itself is part of the result
+
+                Returns:
+                        QuerySet: the descendants
+                """
+                if not self.path:
+                        raise ValueError("The task has no path, save it first.")
+                queryset = Task.objects.filter(path__startswith=self.path)
+                return queryset if include_self else queryset.exclude(pk=self.pk)
+
+        def ancestors(self):
+                """returns the ancestors of the task, read from its path
+
+                Returns:
+                        QuerySet: the ancestors
+                """
+                ids = [int(pk) for pk in self.path.split(PATH_SEPARATOR) if pk][:-1]
+                return Task.objects.filter(pk__in=ids)
+
+        @property
+        def depth(self):
+                """depth of the task in its hierarchy, roots are at 0"""
+                return self.path.count(PATH_SEPARATOR) - 1
+
+        @staticmethod
+        def path_depth():
+                """expression computing the depth of a task from its path"""
+                return Length("path") - Length(Replace("path", Value(PATH_SEPARATOR), Value(""))) - 1
+
         def __str__(self):
-                return self.name
\ No newline at end of file
+                return self.name
+
+class TaskTombstone(models.Model):
+        """Deletion log: a task left a list, deleted or moved to another one
+
+        Read by the list change feed so that clients drop the task. Rows older
+        than TASK_TOMBSTONE_RETENTION_DAYS are removed by prune_tombstones.
+        """
+        task_id = models.BigIntegerField()
+        list = models.ForeignKey("lists.List", on_delete=models.CASCADE, related_name="tombstones")
+        deleted_at = models.DateTimeField(default=timezone.now)
+
+        class Meta:
+                indexes = [
+                        models.Index(fields=["list", "deleted_at"], name="tombstone_list_deleted_idx"),
+                ]
+
+        def __str__(self):
+                return f"{self.task_id} left {self.list_id}"
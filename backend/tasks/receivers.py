@@ -0,0 +1,93 @@
+import threading
+from contextlib import contextmanager
+from django.db.models import QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from categories.models import Category
+from lists.models import List
+from .models import Task, TaskTombstone
+from .serializers import BULK_BATCH_SIZE
+from .signals import tasks_bulk_saved
+
+
+def moved_tombstones(tasks):
+    """builds the tombstones of tasks moved out of the list they were loaded from
+
+    Args:
+        tasks (iterable[Task]): saved tasks
+
+    Returns:
+        list[TaskTombstone]: unsaved tombstones
+    """
+    tombstones = []
+    for task in tasks:
+        loaded = getattr(task, "_loaded_values", {}).get("list_id", task.list_id)
+        if loaded != task.list_id:
+            tombstones.append(TaskTombstone(task_id=task.pk, list_id=loaded))
+    return tombstones
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created, **kwargs):
+    if not created:
+        TaskTombstone.objects.bulk_create(moved_tombstones([instance]))
+
+
+@receiver(tasks_bulk_saved, sender=Task)
+def tasks_bulk_saved_moved(sender, tasks, created, **kwargs):
+    if not created:
+        TaskTombstone.objects.bulk_create(moved_tombstones(tasks))
+
+
+_batch = threading.local()
+
+
+@contextmanager
+def batched_tombstones():
+    """inserts the tombstones of the tasks deleted in the block at once, when it exits
+
+    A queryset delete sends post_delete for every task, cascaded subtasks
+    included: inside the block task_deleted only collects their tombstones.
+    Nothing is written if the block raises.
+    """
+    pending = _batch.pending = []
+    try:
+        yield
+    finally:
+        _batch.pending = None
+    TaskTombstone.objects.bulk_create(pending, batch_size=BULK_BATCH_SIZE)
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, origin=None, **kwargs):
+    # the tombstones of a deleted list go with it
+    if isinstance(origin, List) or (isinstance(origin, QuerySet) and origin.model is List):
+        return
+    tombstone = TaskTombstone(task_id=instance.pk, list_id=instance.list_id)
+    pending = getattr(_batch, "pending", None)
+    if pending is not None:
+        pending.append(tombstone)
+    else:
+        tombstone.save()
+
+
+# category links are part of the task representation: touching updated_at
+# keeps validators and the change feed in step with them
+
+@receiver(m2m_changed, sender=Task.categories.through)
+def task_categories_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    now = timezone.now()
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            Task.objects.filter(pk=instance.pk).update(updated_at=now)
+            instance.updated_at = now
+    elif action in ("post_add", "post_remove"):
+        Task.objects.filter(pk__in=pk_set).update(updated_at=now)
+    elif action == "pre_clear":
+        instance.tasks.update(updated_at=now)
+
+
+@receiver(pre_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    Task.objects.filter(categories=instance).update(updated_at=timezone.now())
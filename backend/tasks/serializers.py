@@ -1,7 +1,227 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Task
+from rest_framework.validators import UniqueValidator
+from categories.serializers import CategorySerializer
+from core.serializers import CachedPrimaryKeyRelatedField, DynamicFieldsMixin, preload_related
+from .models import PATH_SEPARATOR, Task
+from .signals import tasks_bulk_saved
 
-class TaskSerializer(serializers.ModelSerializer):
+BULK_BATCH_SIZE = 1000
+
+
+class TaskListSerializer(serializers.ListSerializer):
+    """Validates and writes many tasks with a fixed number of queries per batch
+
+    Related objects are preloaded once for the whole payload and name uniqueness
+    is checked with a single query, instead of one lookup per item. Writes go
+    through bulk_create / bulk_update inside one transaction.
+
+    Re-parenting is checked and applied for the batch as a whole: an item may
+    move a task under one moved by an earlier item, so cycles are looked for
+    and paths rebuilt against the tree once every item is applied.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("max_length", settings.API_BULK_MAX_ITEMS)
+        super().__init__(*args, **kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self.context["related_cache"] = preload_related(self.child, data)
+            name = self.child.fields["name"]
+            name.validators = [v for v in name.validators if not isinstance(v, UniqueValidator)]
+            self._instances = {task.pk: task for task in self.instance or []}
+            self._matched = []
+            self._taken = self.get_taken_names(data)
+            self._seen = set()
+            # id of a re-parented task: (index of its item, new parent or None)
+            self._moves = {}
+        value = super().to_internal_value(data)
+        if isinstance(data, list) and self._moves:
+            self.check_cycles(len(value))
+        return value
+
+    def get_taken_names(self, data):
+        """fetches which of the submitted names already belong to another task
+
+        Args:
+            data (list): raw items
+
+        Returns:
+            dict: {name: id of the task owning it}
+        """
+        names = [item["name"] for item in data if isinstance(item, dict) and isinstance(item.get("name"), str)]
+        taken = {}
+        for start in range(0, len(names), BULK_BATCH_SIZE):
+            batch = names[start:start + BULK_BATCH_SIZE]
+            taken.update(Task.objects.filter(name__in=batch).values_list("name", "id"))
+        return taken
+
+    def run_child_validation(self, data):
+        if self.instance is not None:
+            pk = data.get("id") if isinstance(data, dict) else None
+            try:
+                self.child.instance = self._instances[int(pk)]
+            except (KeyError, TypeError, ValueError):
+                raise serializers.ValidationError({"id": [f'Task "{pk}" does not exist.']})
+            self._matched.append(self.child.instance)
+        attrs = self.child.run_validation(data)
+        if self.instance is not None and "parent" in attrs:
+            parent = attrs["parent"]
+            if getattr(parent, "pk", None) != self.child.instance.parent_id:
+                self._moves[self.child.instance.pk] = (len(self._matched) - 1, parent)
+        name = attrs.get("name")
+        if name is not None:
+            owner = self._taken.get(name)
+            if name in self._seen or (owner is not None and owner != getattr(self.child.instance, "pk", None)):
+                raise serializers.ValidationError({"name": ["task with this name already exists."]})
+            self._seen.add(name)
+        return attrs
+
+    def ancestry(self, parent):
+        """yields the ids of a parent and of its ancestors once the moves of the batch are applied
+
+        Stops at a root, or loops forever on a cycle: callers stop at a repeated id.
+
+        Args:
+            parent (Task | None): the parent, as loaded before the batch
+
+        Yields:
+            int: ids, from the parent up
+        """
+        while parent is not None:
+            yield parent.pk
+            if parent.pk in self._moves:
+                parent = self._moves[parent.pk][1]
+                continue
+            ancestors = [int(pk) for pk in parent.path.split(PATH_SEPARATOR) if pk][:-1]
+            parent = None
+            for pk in reversed(ancestors):
+                yield pk
+                if pk in self._moves:
+                    parent = self._moves[pk][1]
+                    break
+
+    def check_cycles(self, count):
+        """rejects the items moving a task under itself once the whole batch is applied
+
+        Args:
+            count (int): number of items
+        """
+        errors = [{} for _ in range(count)]
+        for pk, (index, parent) in self._moves.items():
+            seen = set()
+            for ancestor in self.ancestry(parent):
+                if ancestor == pk:
+                    errors[index] = {"parent": ["A task cannot be a subtask of itself or of its subtasks."]}
+                if ancestor == pk or ancestor in seen:
+                    break
+                seen.add(ancestor)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+    def move_tasks(self):
+        """stores the paths of the re-parented tasks and their subtrees, parents first
+
+        Paths are rebuilt from the paths loaded before the batch and the moves
+        applied so far, as the preloaded parents are stale once an earlier
+        item moved one of their ancestors.
+        """
+        rewrites = []
+
+        def current(path):
+            for old, new in rewrites:
+                if path.startswith(old):
+                    path = new + path[len(old):]
+            return path
+
+        depth = {pk: len(list(self.ancestry(parent))) for pk, (_, parent) in self._moves.items()}
+        for pk in sorted(self._moves, key=depth.get):
+            task = self._instances[pk]
+            parent = self._moves[pk][1]
+            old = current(task.path)
+            new = f"{current(parent.path) if parent else ''}{pk}{PATH_SEPARATOR}"
+            task.path = old
+            task.set_path(new)
+            rewrites.append((old, new))
+        for task in self._matched:
+            task.path = current(task.path)
+
+    def create(self, validated_data):
+        categories = [attrs.pop("categories", []) for attrs in validated_data]
+        tasks = [Task(**attrs) for attrs in validated_data]
+        with transaction.atomic():
+            Task.objects.bulk_create(tasks, batch_size=BULK_BATCH_SIZE)
+            if not connection.features.can_return_rows_from_bulk_insert:
+                # MySQL does not hand back the new ids, names are unique so look them up
+                ids = self.get_taken_names([{"name": task.name} for task in tasks])
+                for task in tasks:
+                    task.pk = ids[task.name]
+            for task in tasks:
+                task.path = task.build_path()
+            Task.objects.bulk_update(tasks, ["path"], batch_size=BULK_BATCH_SIZE)
+            self.set_categories(zip(tasks, categories))
+            tasks_bulk_saved.send(sender=Task, tasks=tasks, created=True)
+        return tasks
+
+    def update(self, instance, validated_data):
+        now = timezone.now()
+        fields = {"updated_at"}
+        categories = []
+        for task, attrs in zip(self._matched, validated_data):
+            if "categories" in attrs:
+                categories.append((task, attrs.pop("categories")))
+            for attr, value in attrs.items():
+                setattr(task, attr, value)
+            fields.update(attrs)
+            # bulk_update skips auto_now
+            task.updated_at = now
+        with transaction.atomic():
+            Task.objects.bulk_update(self._matched, fields, batch_size=BULK_BATCH_SIZE)
+            self.set_categories(categories, replace=True)
+            self.move_tasks()
+            tasks_bulk_saved.send(sender=Task, tasks=self._matched, created=False)
+            for task in self._matched:
+                # see Task.save()
+                task._loaded_values["list_id"] = task.list_id
+        return self._matched
+
+    def set_categories(self, pairs, replace=False):
+        """writes the task / category links of many tasks at once
+
+        Args:
+            pairs (iterable): (task, categories) tuples
+            replace (bool): whether existing links of these tasks are removed first
+        """
+        through = Task.categories.through
+        pairs = list(pairs)
+        if replace and pairs:
+            through.objects.filter(task_id__in=[task.pk for task, _ in pairs]).delete()
+        through.objects.bulk_create(
+            [through(task_id=task.pk, category_id=category.pk) for task, cats in pairs for category in cats],
+            batch_size=BULK_BATCH_SIZE
+        )
+
+
+class TaskSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    serializer_related_field = CachedPrimaryKeyRelatedField
+    expandable_fields = {"categories": CategorySerializer}
     class Meta:
         model = Task
-        fields = '__all__'
\ No newline at end of file
+        # path is an internal index, maintained by Task.save()
+        exclude = ["path"]
+        list_serializer_class = TaskListSerializer
+
+    def validate_parent(self, parent):
+        """prevents a task from being moved under itself or one of its descendants
+
+        Items of a bulk update are checked together by TaskListSerializer.check_cycles().
+        """
+        task = self.instance
+        if isinstance(self.parent, TaskListSerializer):
+            return parent
+        if parent is not None and task is not None and task.path and parent.path.startswith(task.path):
+            raise serializers.ValidationError("A task cannot be a subtask of itself or of its subtasks.")
+        return parent
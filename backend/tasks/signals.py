@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# sent by bulk writes, which bypass the per-instance post_save signal
+# arguments: tasks (list[Task]), created (bool)
+tasks_bulk_saved = Signal()
@@ -1,8 +1,15 @@
+import io
+import json
 import pytest
+from django.core.management import CommandError, call_command
 from django.core.exceptions import ValidationError
+from django.db import connection
 from django.db.utils import IntegrityError
-from datetime import datetime, timezone
-from tasks.models import Task
+from datetime import datetime, timedelta, timezone
+from lists.models import List
+from tasks.imports import import_tasks
+from tasks.models import Task, TaskTombstone
+from tasks.tree import build_tree
 
 @pytest.mark.django_db
 def test_task_creation(task):
@@ -100,3 +107,121 @@ def test_task_creation_with_category(todo_list, category):
     tsk.categories.add(category)
     assert tsk.name == "Default Task"
     assert tsk.categories.first().name == "Test Category"
+
+def test_build_tree_keeps_order_and_skips_cycles():
+    """Ensures subtasks keep their order and unreachable cycles are dropped"""
+    items = [
+        {"id": 1, "parent": None},
+        {"id": 2, "parent": 1},
+        {"id": 3, "parent": 1},
+        {"id": 4, "parent": 2},
+        {"id": 5, "parent": 6},
+        {"id": 6, "parent": 5},
+    ]
+    tree = build_tree(items, max_depth = 5)
+    assert [node["id"] for node in tree] == [1]
+    assert [node["id"] for node in tree[0]["subtasks"]] == [2, 3]
+    assert tree[0]["subtasks"][0]["subtasks"][0]["id"] == 4
+    assert build_tree(items, max_depth = 0)[0]["subtasks"] == []
+
+@pytest.mark.django_db
+def test_path_follows_hierarchy(todo_list):
+    """Ensures the materialized path is kept in sync on create and reparent"""
+    due_at = datetime(2026, 1, 1, tzinfo = timezone.utc)
+    root = Task.objects.create(name = "Root", description = "path", due_at = due_at, list = todo_list)
+    child = Task.objects.create(name = "Child", description = "path", due_at = due_at, list = todo_list, parent = root)
+    leaf = Task.objects.create(name = "Leaf", description = "path", due_at = due_at, list = todo_list, parent = child)
+    other = Task.objects.create(name = "Other", description = "path", due_at = due_at, list = todo_list)
+    assert leaf.path == f"{root.id}/{child.id}/{leaf.id}/"
+    assert leaf.depth == 2
+    assert set(root.descendants()) == {child, leaf}
+    assert set(leaf.ancestors()) == {root, child}
+
+    child = Task.objects.get(pk = child.pk)
+    child.parent = other
+    child.save()
+    leaf.refresh_from_db()
+    assert leaf.path == f"{other.id}/{child.id}/{leaf.id}/"
+    assert set(other.descendants()) == {child, leaf}
+    assert list(root.descendants()) == []
+
+    child.parent = None
+    child.save()
+    leaf.refresh_from_db()
+    assert leaf.path == f"{child.id}/{leaf.id}/"
+
+@pytest.mark.django_db
+def test_import_tasks_command(todo_list, tmp_path):
+    """Ensures the import_tasks command loads a json lines file in batches"""
+    path = tmp_path / "tasks.jsonl"
+    path.write_text("".join(
+        json.dumps({"name": f"Line {i}", "description": "command", "due_at": "2026-01-01T00:00:00Z"}) + "\n"
+        for i in range(5)
+    ))
+    call_command("import_tasks", todo_list.public_token, str(path), "--batch-size", "2", "--dry-run", stdout = io.StringIO())
+    assert Task.objects.count() == 0
+    call_command("import_tasks", todo_list.public_token, str(path), "--batch-size", "2", stdout = io.StringIO())
+    assert Task.objects.filter(list = todo_list).count() == 5
+
+@pytest.mark.django_db(transaction = True)
+def test_import_commits_each_batch(todo_list):
+    """Ensures an import commits batch by batch, so that the change feed sees its rows in time"""
+    inside = []
+
+    def rows():
+        for i in range(5):
+            # rows are read between the batches
+            inside.append(connection.in_atomic_block)
+            yield i + 1, {"name": f"Row {i}", "description": "batches", "due_at": "2026-01-01T00:00:00Z"}
+
+    report = import_tasks(todo_list, rows(), batch_size = 2)
+    assert report["created"] == 5
+    assert inside == [False] * 5
+    assert Task.objects.filter(list = todo_list).count() == 5
+
+    inside.clear()
+    import_tasks(todo_list, rows(), batch_size = 2, dry_run = True)
+    assert inside == [True] * 5
+    assert Task.objects.filter(list = todo_list).count() == 5
+
+@pytest.mark.django_db
+def test_tombstones_record_tasks_leaving_a_list(todo_list, task):
+    """Ensures deleted and moved tasks are logged, and old entries pruned"""
+    other = List.objects.create(name = "Other", description = "tombstones")
+    moved = Task.objects.get(pk = task.pk)
+    moved.list = other
+    moved.save()
+    assert list(TaskTombstone.objects.values_list("task_id", "list_id")) == [(task.id, todo_list.id)]
+
+    # later saves of the moved instance compare with its new list
+    moved.name = "Renamed"
+    moved.save()
+    assert TaskTombstone.objects.count() == 1
+
+    moved.delete()
+    assert TaskTombstone.objects.filter(task_id = task.id, list = other).exists()
+
+    # tasks deleted with their list leave no tombstone behind
+    Task.objects.create(name = "Gone", description = "tombstones", due_at = datetime(2026, 1, 1, tzinfo=timezone.utc), list = other)
+    other.delete()
+    assert not TaskTombstone.objects.filter(list_id = other.id).exists()
+
+    TaskTombstone.objects.update(deleted_at = datetime.now(timezone.utc) - timedelta(days = 365))
+    call_command("prune_tombstones", stdout = io.StringIO())
+    assert not TaskTombstone.objects.exists()
+
+@pytest.mark.django_db
+def test_seed_bench():
+    """Ensures seed_bench builds subtask trees in one list each, and refuses to seed twice"""
+    call_command("seed_bench", "--lists", "3", "--tasks", "60", "--categories", "4", "--depth", "3", stdout = io.StringIO())
+    assert List.objects.count() == 3
+    assert Task.objects.count() == 60
+    assert max(task.depth for task in Task.objects.all()) == 3
+    for task in Task.objects.exclude(parent = None).select_related("parent"):
+        assert task.path == f"{task.parent.path}{task.id}/"
+        assert task.list_id == task.parent.list_id
+
+    with pytest.raises(CommandError):
+        call_command("seed_bench", stdout = io.StringIO())
+    call_command("seed_bench", "--lists", "2", "--tasks", "10", "--categories", "4", "--clear", stdout = io.StringIO())
+    assert (List.objects.count(), Task.objects.count()) == (2, 10)
@@ -0,0 +1,57 @@
+from collections import defaultdict, deque
+from .models import DISPLAY_ORDER, Task, categories_by_id
+
+
+def subtree(root, max_depth):
+    """fetches a task and its descendants with one range scan on the path index
+
+    Args:
+        root (Task): the root task
+        max_depth (int): deepest level fetched below the root
+
+    Returns:
+        QuerySet: the tasks, siblings in display order, categories prefetched
+    """
+    return (
+        root.descendants(include_self=True)
+        .alias(depth=Task.path_depth())
+        .filter(depth__lte=root.depth + max_depth)
+        .order_by(*DISPLAY_ORDER)
+        .prefetch_related(categories_by_id())
+    )
+
+
+def build_tree(items, max_depth, root_ids=None):
+    """nests serialized tasks under their parents in a single pass
+
+    Args:
+        items (list[dict]): serialized tasks carrying id and parent, in display order
+        max_depth (int): deepest level kept below the roots
+        root_ids (set[int]): ids of the roots, defaults to the items whose parent is not among them
+
+    Returns:
+        list[dict]: the roots, each holding its children in "subtasks"
+    """
+    children = defaultdict(list)
+    ids = {item["id"] for item in items}
+    roots = []
+    for item in items:
+        if root_ids is not None:
+            is_root = item["id"] in root_ids
+        else:
+            is_root = item["parent"] not in ids
+        if is_root:
+            roots.append(item)
+        else:
+            children[item["parent"]].append(item)
+
+    forest = []
+    # breadth first from the roots: unreachable items (cycles) are never visited
+    queue = deque((item, forest, 0) for item in roots)
+    while queue:
+        item, siblings, depth = queue.popleft()
+        node = {**item, "subtasks": []}
+        siblings.append(node)
+        if depth < max_depth:
+            queue.extend((child, node["subtasks"], depth + 1) for child in children.get(item["id"], ()))
+    return forest
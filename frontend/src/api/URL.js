@@ -5,9 +5,13 @@ const API_BASE = config.apiBaseUrl + '/api/';
 const URL = {
     // LISTES
     GETLISTS: API_BASE + "lists/",
+    GETLISTS_SUMMARY: API_BASE + "lists/?view=summary",
     CREATELIST: API_BASE + "lists/",
     GETLIST: (tokenOrId) => API_BASE + "lists/" + encodeURIComponent(String(tokenOrId)) + "/",
 
+    // flux d'événements (Server-Sent Events) d'une liste
+    LIST_EVENTS: (token) => API_BASE + "lists/" + encodeURIComponent(String(token)) + "/events/",
+
     GETLIST_BY_ID: (id) => API_BASE + "lists/" + encodeURIComponent(String(id)) + "/",
     // TÂCHES
     CREATE_TASK: API_BASE + "tasks/",
@@ -78,28 +78,25 @@ const Sidebar = ({
     useEffect(() => {
         let canceled = false;
 
-        const fetchCounts = async (l) => {
-            const tok = keyOf(l);
-            if (!tok) return;
+        const missing = (lists || []).some((l) => {
+            const k = keyOf(l);
+            return k && !countsCache[k];
+        });
+        if (!missing) return;
 
+        // un seul appel pour les compteurs de toutes les listes
+        (async () => {
             try {
-                const { data } = await apiClient.get(URL.GETLIST(tok));
-                if (canceled) return;
-                if (Array.isArray(data?.tasks)) {
-                    putCounts(l, computeFromTasks(data));
+                const { data } = await apiClient.get(URL.GETLISTS_SUMMARY);
+                if (canceled || !Array.isArray(data)) return;
+                for (const summary of data) {
+                    putCounts(summary, {
+                        done: summary.done_count,
+                        open: summary.task_count - summary.done_count,
+                    });
                 }
             } catch {
-                // silencieux si l’endpoint ne renvoie pas les tasks
-            }
-        };
-
-        (async () => {
-            for (const l of lists || []) {
-                const k = keyOf(l);
-                if (!k) continue;
-                if (!countsCache[k]) {
-                    fetchCounts(l);
-                }
+                // silencieux si l’endpoint de résumé est indisponible
             }
         })();
 
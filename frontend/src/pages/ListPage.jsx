@@ -7,6 +7,9 @@ import TaskModal from "../components/tasks/TaskModal";
 import ConfirmDialog from "../components/ui/ConfirmDialog";
 import ListModal from "../components/lists/ListModal";
 
+// intervalle de rechargement quand le flux d'événements est indisponible (serveur WSGI)
+const POLL_INTERVAL = 30000;
+
 const FR = {
   selectHint: "Sélectionnez une liste à gauche pour afficher ses tâches.",
   loading: "Chargement des tâches…",
@@ -226,6 +229,73 @@ export default function ListPage() {
     };
   }, [token, listFromNav, listFromContext, notifyListTasks]);
 
+  // Mises à jour en temps réel : applique les événements de la liste au lieu de la recharger
+  useEffect(() => {
+    if (!token || typeof EventSource === "undefined") return;
+    const source = new EventSource(URL.LIST_EVENTS(token));
+    const read = (e) => JSON.parse(e.data);
+    const reload = async () => {
+      try {
+        const { data } = await apiClient.get(URL.GETLIST(token));
+        setListInfo(data);
+        if (Array.isArray(data?.tasks)) setTasks(data.tasks);
+      } catch {}
+    };
+
+    // une réponse en erreur (ex. 501 hors ASGI) ferme le flux pour de bon : on recharge périodiquement,
+    // une coupure est reprise par le navigateur : on recharge à la reconnexion pour rattraper les événements perdus
+    let poll = null;
+    let dropped = false;
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED) {
+        if (!poll) poll = setInterval(reload, POLL_INTERVAL);
+      } else {
+        dropped = true;
+      }
+    };
+    source.onopen = () => {
+      if (dropped) reload();
+      dropped = false;
+    };
+
+    source.addEventListener("task.saved", (e) => {
+      const task = read(e);
+      setTasks((prev) => {
+        const exists = prev.some((t) => t.id === task.id);
+        return exists ? prev.map((t) => (t.id === task.id ? { ...t, ...task } : t)) : [...prev, task];
+      });
+    });
+    source.addEventListener("task.deleted", (e) => {
+      const { id } = read(e);
+      setTasks((prev) => prev.filter((t) => t.id !== id));
+    });
+    source.addEventListener("category.deleted", (e) => {
+      const { id } = read(e);
+      setTasks((prev) =>
+        prev.map((t) =>
+          Array.isArray(t.categories) ? { ...t, categories: t.categories.filter((c) => (c?.id ?? c) !== id) } : t
+        )
+      );
+    });
+    source.addEventListener("list.saved", (e) => {
+      const list = read(e);
+      setListInfo((prev) => ({ ...(prev || {}), ...list }));
+      onListUpdated?.(list);
+    });
+    source.addEventListener("list.deleted", () => {
+      source.close();
+      onListDeleted?.({ public_token: token });
+      navigate("/welcome");
+    });
+    // le serveur a perdu des événements : on recharge la liste
+    source.addEventListener("reset", reload);
+
+    return () => {
+      clearInterval(poll);
+      source.close();
+    };
+  }, [token, navigate, onListUpdated, onListDeleted]);
+
   const categories = useMemo(() => {
     const map = new Map();
     if (Array.isArray(listInfo?.categories)) {